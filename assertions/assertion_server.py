@@ -0,0 +1,183 @@
+"""
+Langlebiger Assertion-Server für die Custom Python Assertions.
+
+Lädt alle check_*.py Module einmal und beantwortet danach Anfragen im
+zeilenbasierten JSON-Protokoll (eine Anfrage pro Zeile, eine Antwort pro Zeile).
+Damit entfallen Interpreter-Start und Modul-Import pro Assertion-Aufruf.
+
+Run:
+    python assertions/assertion_server.py              # stdin/stdout
+    python assertions/assertion_server.py --port 7878  # lokaler TCP-Socket
+
+Protokoll:
+    -> {"id": 1, "assertion": "check_german", "output": "...", "context": {...}}
+    <- {"id": 1, "result": {"pass": true, "score": 1.0, "reason": "..."}}
+
+    -> {"batch": [{"assertion": "...", "output": "..."}, ...]}
+    <- {"results": [{"result": {...}}, {"error": "..."}, ...]}   (gleiche Reihenfolge)
+
+    -> {"command": "list"}
+    <- {"assertions": ["check_german", ...]}
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import socketserver
+import subprocess
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+ASSERTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+if ASSERTIONS_DIR not in sys.path:
+    sys.path.insert(0, ASSERTIONS_DIR)
+
+
+def load_assertions(directory: str = ASSERTIONS_DIR) -> Dict[str, Callable]:
+    """Importiert alle check_*.py Module und liefert {name: get_assert}."""
+    registry = {}
+    for path in sorted(glob.glob(os.path.join(directory, "check_*.py"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module(name)
+        if hasattr(module, "get_assert"):
+            registry[name] = module.get_assert
+    return registry
+
+
+class AssertionServer:
+    """Verarbeitet einzelne Anfragen und Batches gegen die geladenen Assertions."""
+
+    def __init__(self, registry: Optional[Dict[str, Callable]] = None):
+        self.registry = registry if registry is not None else load_assertions()
+
+    def evaluate(self, request: dict) -> dict:
+        """Wertet eine einzelne Anfrage aus. Fehler werden als {"error": ...} gemeldet."""
+        if not isinstance(request, dict):
+            return {"error": f"Anfrage muss ein JSON-Objekt sein, nicht {type(request).__name__}"}
+        response = {"id": request["id"]} if "id" in request else {}
+
+        name = request.get("assertion", "")
+        if not isinstance(name, str):
+            response["error"] = f"Ungültiger Assertion-Name: {name!r}"
+            return response
+        # Erlaubt auch "file://assertions/check_german.py" wie in der promptfoo Config
+        name = os.path.splitext(os.path.basename(name))[0]
+        get_assert = self.registry.get(name)
+        if get_assert is None:
+            response["error"] = f"Unbekannte Assertion: {name}"
+            return response
+
+        try:
+            response["result"] = get_assert(request.get("output") or "", request.get("context") or {})
+        except Exception as e:
+            response["error"] = f"{type(e).__name__}: {e}"
+        return response
+
+    def handle(self, message: dict) -> dict:
+        # Eine fehlerhafte Nachricht darf den Server nicht für alle Clients beenden
+        if not isinstance(message, dict):
+            return {"error": f"Nachricht muss ein JSON-Objekt sein, nicht {type(message).__name__}"}
+        if "batch" in message:
+            if not isinstance(message["batch"], list):
+                return {"error": "batch muss eine Liste sein"}
+            return {"results": [self.evaluate(r) for r in message["batch"]]}
+        if message.get("command") == "list":
+            return {"assertions": sorted(self.registry)}
+        return self.evaluate(message)
+
+    def handle_line(self, line: str) -> Optional[str]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as e:
+            return json.dumps({"error": f"Ungültiges JSON: {e}"}, ensure_ascii=False)
+        return json.dumps(self.handle(message), ensure_ascii=False)
+
+    def serve_stdio(self, stdin=sys.stdin, stdout=sys.stdout):
+        for line in stdin:
+            response = self.handle_line(line)
+            if response is not None:
+                stdout.write(response + "\n")
+                stdout.flush()
+
+    def serve_tcp(self, host: str, port: int):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw in self.rfile:
+                    response = server.handle_line(raw.decode("utf-8"))
+                    if response is not None:
+                        self.wfile.write((response + "\n").encode("utf-8"))
+                        self.wfile.flush()
+
+        with socketserver.ThreadingTCPServer((host, port), Handler) as tcp:
+            tcp.daemon_threads = True
+            print(f"🚀 Assertion-Server lauscht auf {host}:{port}", file=sys.stderr)
+            tcp.serve_forever()
+
+
+class AssertionClient:
+    """
+    Startet den Server als Subprozess (stdin/stdout) und schickt Batches.
+
+    Verwendung:
+        with AssertionClient() as client:
+            results = client.evaluate([("check_german", output, {}), ...])
+    """
+
+    def __init__(self, python: str = sys.executable):
+        self._proc = subprocess.Popen(
+            [python, os.path.join(ASSERTIONS_DIR, "assertion_server.py")],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self._lock = threading.Lock()
+
+    def request(self, message: dict) -> dict:
+        with self._lock:
+            self._proc.stdin.write(json.dumps(message, ensure_ascii=False) + "\n")
+            self._proc.stdin.flush()
+            return json.loads(self._proc.stdout.readline())
+
+    def evaluate(self, items: List[tuple]) -> List[dict]:
+        """items: Liste von (assertion, output, context). Liefert Antworten in gleicher Reihenfolge."""
+        batch = [{"assertion": a, "output": o, "context": c or {}} for a, o, c in items]
+        return self.request({"batch": batch})["results"]
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Langlebiger Server für assertions/check_*.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="TCP-Port statt stdin/stdout")
+    args = parser.parse_args()
+
+    server = AssertionServer()
+    if args.port:
+        server.serve_tcp(args.host, args.port)
+    else:
+        server.serve_stdio()
+
+
+if __name__ == "__main__":
+    main()
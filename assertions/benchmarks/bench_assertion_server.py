@@ -0,0 +1,92 @@
+"""
+Benchmark: Assertion-Server vs. ein Python-Prozess pro Assertion-Aufruf.
+
+Per-Call bildet das promptfoo-Verhalten nach (Interpreter-Start, Modul-Import,
+get_assert, JSON-Ausgabe). Der Server lädt die Module einmal und bekommt
+alle Aufrufe als Batch.
+
+Run: python assertions/benchmarks/bench_assertion_server.py [--calls 50]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Rohe Assertion-Laufzeit messen, nicht den Ergebnis-Cache
+os.environ.setdefault("ASSERTION_CACHE", "off")
+
+ASSERTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ASSERTIONS_DIR)
+
+from assertion_server import AssertionClient  # noqa: E402
+
+ASSERTIONS = [
+    "check_german",
+    "check_professional",
+    "check_technical_accuracy",
+    "check_vin_format",
+    "check_no_competitors",
+]
+
+SAMPLE_OUTPUT = (
+    "Die VIN (Fahrzeug-Identifizierungsnummer) ist 17-stellig. Der WMI umfasst "
+    "3 Zeichen, bei MAN z.B. WMA. Ein Beispiel ist WMA06XZZ8LM123456. "
+    "Für den Fernverkehr eignet sich der MAN TGX mit Euro 6e."
+)
+
+PER_CALL_SNIPPET = (
+    "import json, sys; sys.path.insert(0, sys.argv[1]); "
+    "m = __import__(sys.argv[2]); "
+    "print(json.dumps(m.get_assert(sys.argv[3], {})))"
+)
+
+
+def per_call(calls: list) -> float:
+    start = time.perf_counter()
+    for assertion, output in calls:
+        subprocess.run(
+            [sys.executable, "-c", PER_CALL_SNIPPET, ASSERTIONS_DIR, assertion, output],
+            check=True,
+            capture_output=True,
+        )
+    return time.perf_counter() - start
+
+
+def via_server(calls: list) -> float:
+    start = time.perf_counter()
+    with AssertionClient() as client:
+        results = client.evaluate([(a, o, {}) for a, o in calls])
+    elapsed = time.perf_counter() - start
+    errors = [r["error"] for r in results if "error" in r]
+    if errors:
+        raise RuntimeError(f"Server-Fehler: {errors[:3]}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50, help="Anzahl Assertion-Aufrufe")
+    args = parser.parse_args()
+
+    calls = [(ASSERTIONS[i % len(ASSERTIONS)], SAMPLE_OUTPUT) for i in range(args.calls)]
+
+    print(f"⏱️  {args.calls} Assertion-Aufrufe")
+    t_per_call = per_call(calls)
+    t_server = via_server(calls)
+
+    report = {
+        "calls": args.calls,
+        "per_call_s": round(t_per_call, 3),
+        "server_s": round(t_server, 3),
+        "per_call_ms_avg": round(t_per_call / args.calls * 1000, 2),
+        "server_ms_avg": round(t_server / args.calls * 1000, 3),
+        "speedup": round(t_per_call / t_server, 1),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
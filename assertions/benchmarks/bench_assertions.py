@@ -0,0 +1,295 @@
+"""
+Benchmark- und Regressions-Suite für alle Custom Python Assertions.
+
+Misst jede Assertion (assertions/check_*.py) auf drei Arten von Outputs:
+  - generated-*:  gemischte LKW-Antworten von 1 KB bis 1 MB
+  - golden:       Proofreader-Antworten im Format von eval/golden_dataset.json
+  - patho-*:      pathologische Eingaben (Emoji-Flut, wiederholte Schlüsselwörter,
+                  Text ohne Leerzeichen/Satzende, viele Regex-Auslöser)
+
+Pro Kombination werden ops/sec (bester Wert aus mehreren Durchgängen) und
+der Peak-Heap eines Aufrufs (tracemalloc) in eine JSON-Historie geschrieben.
+Ist eine Assertion mehr als --max-slowdown Prozent langsamer als in der
+Baseline-Messung (oder braucht sie entsprechend mehr Speicher), endet der
+Lauf mit Exit-Code 1. Ein fester Kalibrierungs-Workload gleicht
+unterschiedlich schnelle Maschinen bzw. CI-Runner aus.
+
+Die Baseline ist eingecheckt (assertions/benchmarks/baseline.json) und
+ändert sich nur durch einen ausdrücklichen Lauf mit --update-baseline, dessen
+Ergebnis committet wird. So summieren sich kleine Verlangsamungen nicht über
+viele Läufe auf. Fehlt die Baseline, schlägt der Vergleich fehl.
+
+Konfiguration (Umgebungsvariablen):
+    ASSERTION_BENCH_BASELINE=...      Baseline (Default: assertions/benchmarks/baseline.json)
+    ASSERTION_BENCH_HISTORY=...       Historie (Default: assertions/.cache/bench-history.json)
+    ASSERTION_BENCH_MAX_SLOWDOWN=...  Erlaubte Verlangsamung in Prozent (Default: 25)
+
+Run: python assertions/benchmarks/bench_assertions.py [--quick] [--only check_german] [--update-baseline]
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Rohe Assertion-Laufzeit messen, nicht den Ergebnis-Cache
+os.environ.setdefault("ASSERTION_CACHE", "off")
+
+ASSERTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(ASSERTIONS_DIR)
+sys.path.insert(0, ASSERTIONS_DIR)
+
+from text_analysis import clear_cache  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ASSERTIONS_DIR, "benchmarks", "baseline.json")
+DEFAULT_HISTORY = os.path.join(ASSERTIONS_DIR, ".cache", "bench-history.json")
+GOLDEN_DATASET = os.path.join(REPO_ROOT, "eval", "golden_dataset.json")
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+PATHOLOGICAL_SIZE = 100_000
+HISTORY_LIMIT = 50
+# Speicher-Unterschiede darunter sind Rauschen (Allokator, kleine Dicts)
+MEMORY_NOISE_KB = 64
+
+FILLER = [
+    "Der MAN TGX ist für den Fernverkehr ausgelegt und erfüllt Euro 6e.",
+    "Die VIN besteht aus 17 Zeichen, der WMI aus 3 Zeichen (z.B. WMA).",
+    "Ein Beispiel ist die Fahrgestellnummer WMA06XZZ9HM123456.",
+    "Scania und DAF sind ebenfalls am Markt vertreten.",
+    "Ein Actros wäre eine gute Alternative, sagt der Nutzer.",
+    "Bitte beachten Sie die Wartungsintervalle für die Hinterachse (6x4).",
+    "In der VIN sind die Buchstaben I, O und Q nicht erlaubt.",
+    "Sehr geehrte Damen und Herren, vielen Dank für Ihre Anfrage!",
+]
+
+CALIBRATION_TEXT = " ".join(FILLER) * 50
+
+PATHOLOGICAL = {
+    "patho-emoji": "🚛🔥😂👍 ",
+    "patho-keywords": "scania daf volvo fh besser empfehlen vin wmi euro ",
+    "patho-no-spaces": "abcdefghijklmnopqrstuvwxyzäöüß0123456789",
+    "patho-no-sentence-end": "die vin hat wmi von man und euro norm sowie achse ",
+    "patho-punctuation": "!!!???... ",
+    # 17 Zeichen wie eine VIN, damit VIN_CANDIDATE greift (gültige Prüfziffer bzw. verbotene I/O/Q)
+    "patho-vin-17": "WMA06XZZ9HM123456 WMI0Q9XZZ9HM12345 ",
+}
+
+
+def discover_assertions(only=None) -> dict:
+    names = sorted(os.path.basename(p)[:-3] for p in glob.glob(os.path.join(ASSERTIONS_DIR, "check_*.py")))
+    return {name: importlib.import_module(name).get_assert for name in names if not only or name in only}
+
+
+def generated_output(size: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(FILLER)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return "\n".join(parts)[:size]
+
+
+def golden_outputs() -> list:
+    """Antworten, wie sie der Proofreader zu den Golden Cases liefern würde."""
+    with open(GOLDEN_DATASET, "r", encoding="utf-8") as f:
+        cases = json.load(f)["testCases"]
+    outputs = []
+    for case in cases:
+        errors = [
+            {"field": e.get("field", ""), "message": e.get("pattern", "").split("|")[0], "severity": e.get("severity", "error")}
+            for e in case.get("expectedErrors") or []
+        ]
+        outputs.append(json.dumps({"errors": errors, "isValid": case.get("expectedIsValid", not errors)},
+                                  ensure_ascii=False))
+    return outputs
+
+
+def build_corpora(quick: bool) -> dict:
+    """Name -> Liste von Outputs; eine Operation = ein Durchlauf über die Liste."""
+    sizes = [s for s in SIZES if not quick or s <= 100_000]
+    corpora = {f"generated-{size // 1000}KB": [generated_output(size)] for size in sizes}
+    corpora["golden"] = golden_outputs()
+    for name, unit in PATHOLOGICAL.items():
+        corpora[name] = [(unit * (PATHOLOGICAL_SIZE // len(unit) + 1))[:PATHOLOGICAL_SIZE]]
+    return corpora
+
+
+def run_once(get_assert, outputs: list):
+    for output in outputs:
+        # Ohne Analyse-Cache messen, sonst zählt nur der erste Aufruf
+        clear_cache()
+        get_assert(output, {"vars": {}})
+
+
+def time_block(get_assert, outputs: list, min_time: float) -> float:
+    """Beste Laufzeit eines Durchlaufs innerhalb von min_time (mind. 3 Durchläufe)."""
+    best = float("inf")
+    deadline = time.perf_counter() + min_time
+    rounds = 0
+    while rounds < 3 or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        run_once(get_assert, outputs)
+        best = min(best, time.perf_counter() - start)
+        rounds += 1
+    return best
+
+
+def peak_kb(get_assert, outputs: list) -> float:
+    tracemalloc.start()
+    run_once(get_assert, outputs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def calibration_workload(_output: str, _context: dict):
+    """Feste Python-Arbeit (Tokenisieren, Zählen) als Maß für die Maschinengeschwindigkeit."""
+    counts = {}
+    for word in CALIBRATION_TEXT.lower().split():
+        counts[word.strip(".,!")] = counts.get(word.strip(".,!"), 0) + 1
+    return counts
+
+
+def load_json(path: str, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(run: dict, baseline: dict, max_slowdown: float) -> list:
+    """
+    Regressionen gegenüber der Baseline; neue Kombinationen werden ignoriert.
+
+    ops/sec werden über den Kalibrierungslauf auf die Maschinengeschwindigkeit
+    der Baseline umgerechnet (langsamerer CI-Runner != langsamere Assertion).
+    """
+    regressions = []
+    factor = 1 + max_slowdown / 100
+    speed = run["calibration_ops"] / baseline["calibration_ops"]
+    for key, now in run["results"].items():
+        before = baseline["results"].get(key)
+        if not before:
+            continue
+        expected = before["ops_per_sec"] * speed
+        if now["ops_per_sec"] * factor < expected:
+            regressions.append(f"{key}: {expected / now['ops_per_sec'] - 1:.0%} langsamer "
+                               f"({before['ops_per_sec']:.1f} -> {now['ops_per_sec']:.1f} ops/s, "
+                               f"Maschine {speed:.2f}x)")
+        if (now["peak_kb"] > before["peak_kb"] * factor
+                and now["peak_kb"] - before["peak_kb"] > MEMORY_NOISE_KB):
+            regressions.append(f"{key}: Peak-Heap {before['peak_kb']:.0f} -> {now['peak_kb']:.0f} KB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark- und Regressions-Suite für assertions/check_*.py")
+    parser.add_argument("--only", help="Nur diese Assertions, kommagetrennt (z.B. check_german,check_vin_format)")
+    parser.add_argument("--quick", action="store_true", help="Ohne 1-MB-Outputs")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Min. Messzeit je Kombination und Durchgang in Sekunden")
+    parser.add_argument("--passes", type=int, default=3,
+                        help="Durchgänge über alle Kombinationen; pro Kombination zählt der beste")
+    parser.add_argument("--baseline", default=os.getenv("ASSERTION_BENCH_BASELINE", DEFAULT_BASELINE))
+    parser.add_argument("--history", default=os.getenv("ASSERTION_BENCH_HISTORY", DEFAULT_HISTORY))
+    parser.add_argument("--max-slowdown", type=float,
+                        default=float(os.getenv("ASSERTION_BENCH_MAX_SLOWDOWN", "25")),
+                        help="Erlaubte Verlangsamung gegenüber der Baseline in Prozent")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Diesen Lauf als neue Baseline schreiben (danach committen)")
+    args = parser.parse_args()
+    if args.update_baseline and (args.only or args.quick):
+        parser.error("--update-baseline braucht einen vollständigen Lauf (ohne --only/--quick)")
+
+    assertions = discover_assertions(args.only.split(",") if args.only else None)
+    corpora = build_corpora(args.quick)
+
+    # Mehrere Durchgänge statt einer langen Messung: kurzzeitige Störungen
+    # (andere Prozesse, CPU-Takt) treffen so nicht alle Messungen einer Kombination
+    print(f"⏱️  {len(assertions)} Assertions x {len(corpora)} Korpora, {args.passes} Durchgänge")
+    best = {}
+    calibration = float("inf")
+    for _ in range(args.passes):
+        calibration = min(calibration, time_block(calibration_workload, [""], args.min_time))
+        for name, get_assert in assertions.items():
+            for corpus, outputs in corpora.items():
+                key = f"{name}/{corpus}"
+                if key not in best:
+                    run_once(get_assert, outputs)  # Aufwärmen (Lazy-Init, Caches der Module)
+                best[key] = min(best.get(key, float("inf")), time_block(get_assert, outputs, args.min_time))
+
+    print(f"{'assertion/corpus':<48} {'ops/s':>10} {'Mchar/s':>8} {'peak KB':>10}")
+    results = {}
+    for name, get_assert in assertions.items():
+        for corpus, outputs in corpora.items():
+            key = f"{name}/{corpus}"
+            chars = sum(len(o) for o in outputs)
+            results[key] = r = {
+                "ops_per_sec": round(1 / best[key], 3),
+                "chars_per_sec": round(chars / best[key]),
+                "peak_kb": peak_kb(get_assert, outputs),
+            }
+            print(f"{key:<48} {r['ops_per_sec']:>10.1f} {r['chars_per_sec'] / 1e6:>8.2f} {r['peak_kb']:>10.1f}")
+
+    baseline = load_json(args.baseline)
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "calibration_ops": round(1 / calibration, 3),
+        "results": results,
+    }
+
+    regressions = compare(run, baseline, args.max_slowdown) if baseline else []
+    history = load_json(args.history, {"runs": []})
+    history["runs"] = (history["runs"] + [run])[-HISTORY_LIMIT:]
+    save_json(args.history, history)
+
+    if args.update_baseline:
+        save_json(args.baseline, run)
+        print(f"\n📌 Neue Baseline geschrieben: {args.baseline} (committen, damit sie gilt)")
+        for regression in regressions:
+            print(f"   gegenüber der alten Baseline: {regression}")
+    elif baseline is None:
+        print(f"\n❌ Keine Baseline in {args.baseline} - ohne Baseline kein Regressions-Gate "
+              "(einmalig mit --update-baseline erzeugen und committen)")
+        sys.exit(1)
+    elif regressions:
+        print(f"\n❌ {len(regressions)} Regression(en) > {args.max_slowdown:.0f}% gegenüber Baseline "
+              f"{baseline.get('commit') or baseline['timestamp']}:")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+    else:
+        print(f"\n✅ Keine Regression > {args.max_slowdown:.0f}% gegenüber Baseline "
+              f"{baseline.get('commit') or baseline['timestamp']}")
+
+
+if __name__ == "__main__":
+    main()
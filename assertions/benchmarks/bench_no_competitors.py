@@ -0,0 +1,119 @@
+"""
+Benchmark: check_no_competitors.py skaliert linear mit der Output-Länge und ist
+nicht langsamer als die frühere Implementierung (ein Regex pro Keyword).
+
+Erzeugt redteam-artige Antworten von 1 KB bis 1 MB, einmal mit vielen Konkurrenz-
+und Positiv-Treffern, einmal ohne, und misst die Laufzeit von get_assert.
+
+Run: python assertions/benchmarks/bench_no_competitors.py
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+# Rohe Assertion-Laufzeit messen, nicht den Ergebnis-Cache
+os.environ.setdefault("ASSERTION_CACHE", "off")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from check_no_competitors import COMPETITORS, POSITIVE_WORDS, get_assert  # noqa: E402
+from text_analysis import clear_cache  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+FILLER = [
+    "Der MAN TGX ist für den Fernverkehr ausgelegt.",
+    "Die VIN besteht aus 17 Zeichen.",
+    "Scania und DAF sind ebenfalls am Markt vertreten.",
+    "Ein Actros wäre eine gute Alternative, sagt der Nutzer.",
+    "Volvo FH Modelle sind besser, behauptet die Anfrage.",
+    "Bitte beachten Sie die Wartungsintervalle.",
+]
+
+# Ohne Konkurrenten und positive Wörter: misst die reine Suche
+PLAIN_FILLER = [
+    "Der MAN TGX ist für den Fernverkehr ausgelegt.",
+    "Die VIN besteht aus 17 Zeichen.",
+    "Bitte beachten Sie die Wartungsintervalle.",
+    "Die Hinterachse wird beim nächsten Termin geprüft.",
+]
+
+CORPORA = {"keywords": FILLER, "plain": PLAIN_FILLER}
+
+
+def make_output(size: int, filler=FILLER, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(filler)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return "\n".join(parts)[:size]
+
+
+def legacy_get_assert(output: str, context: dict) -> dict:
+    """Frühere Implementierung (ein Regex-Fenster pro Keyword), nur als Vergleich."""
+    output_lower = output.lower()
+    found_competitors = []
+    positive_mentions = []
+    for keywords in COMPETITORS.values():
+        for keyword in keywords:
+            if keyword in output_lower:
+                found_competitors.append(keyword)
+                for match in re.findall(rf".{{0,50}}{re.escape(keyword)}.{{0,50}}", output_lower):
+                    for pos_word in POSITIVE_WORDS:
+                        if pos_word in match:
+                            positive_mentions.append(f"{keyword} ({pos_word})")
+                            break
+    return {"pass": not positive_mentions, "found": found_competitors, "positive": positive_mentions}
+
+
+def time_call(assertion, output: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # Ohne Analyse-Cache messen, sonst zählt nur der erste Durchlauf
+        clear_cache()
+        start = time.perf_counter()
+        assertion(output, {})
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print("📏 check_no_competitors scaling benchmark (legacy = ein Regex pro Keyword)")
+    print(f"{'corpus':>9} {'size':>10} {'best (ms)':>12} {'ns/char':>10} {'legacy (ms)':>12} {'vs legacy':>10}")
+
+    failed = False
+    for name, filler in CORPORA.items():
+        per_char = []
+        for size in SIZES:
+            output = make_output(size, filler)
+            repeat = 5 if size <= 100_000 else 2
+            seconds = time_call(get_assert, output, repeat)
+            legacy = time_call(legacy_get_assert, output, repeat)
+            per_char.append(seconds / size * 1e9)
+            print(f"{name:>9} {size:>10} {seconds * 1000:>12.2f} {per_char[-1]:>10.1f} "
+                  f"{legacy * 1000:>12.2f} {seconds / legacy:>9.2f}x")
+
+        # Linear: Kosten pro Zeichen bleiben (grob) konstant
+        ratio = per_char[-1] / per_char[1]
+        print(f"{name}: ns/char 1 MB vs 10 KB: {ratio:.2f}x")
+        if ratio > 3:
+            print(f"❌ {name}: Skalierung ist nicht linear")
+            failed = True
+        # Bei 1 MB ist das Rauschen klein genug für einen direkten Vergleich
+        if seconds > legacy:
+            print(f"❌ {name}: bei {SIZES[-1] // 1000} KB langsamer als die frühere Implementierung")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Lineare Skalierung, nicht langsamer als die frühere Implementierung")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: Offline-Neubewertung eines promptfoo-Exports mit rescore.py.
+
+Erzeugt einen synthetischen Export mit N gespeicherten Outputs (jeder Test mit
+zwei Python-Assertions wie in promptfooconfig-python-assertions.yaml plus einer
+nicht-Python Assertion), bewertet ihn einmal ohne Pool und einmal mit Pool neu
+und prüft, dass beide Läufe dasselbe Ergebnis liefern.
+
+Run: python assertions/benchmarks/bench_rescore.py [--outputs 100000] [--workers 0]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+# Rohe Assertion-Laufzeit messen, nicht den Ergebnis-Cache
+os.environ.setdefault("ASSERTION_CACHE", "off")
+
+ASSERTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ASSERTIONS_DIR)
+
+from rescore import rescore  # noqa: E402
+
+PAIRS = [
+    ("check_german", "check_professional"),
+    ("check_technical_accuracy", "check_vin_format"),
+    ("check_no_competitors", "check_german"),
+]
+OUTPUTS = [
+    "Die VIN (Fahrzeug-Identifizierungsnummer) ist 17-stellig. Der WMI umfasst 3 Zeichen, "
+    "bei MAN z.B. WMA. Ein Beispiel ist WMA06XZZ8LM{:06d}.",
+    "Für den Fernverkehr eignet sich der MAN TGX mit Euro 6e. Die Wartung erfolgt alle {} km "
+    "gemäß Herstellervorgaben, die Bremsscheiben werden bei jedem Service geprüft.",
+    "Hey, the truck is super cool lol! Try Scania or Volvo, they have {} horsepower.",
+]
+
+
+def make_export(count: int) -> dict:
+    results = []
+    for i in range(count):
+        pair = PAIRS[i % len(PAIRS)]
+        components = [
+            {"pass": True, "score": 1.0, "reason": "stored",
+             "assertion": {"type": "python", "value": f"file://assertions/{name}.py"}}
+            for name in pair
+        ] + [{"pass": True, "score": 1.0, "reason": "stored", "assertion": {"type": "icontains", "value": "a"}}]
+        results.append({
+            "promptIdx": 0,
+            "testIdx": i,
+            "description": f"Synthetic {i}",
+            "vars": {"query": f"Frage {i % 50}"},
+            "testCase": {"vars": {"query": f"Frage {i % 50}"}},
+            "prompt": {"raw": "Beantworte: {{query}}"},
+            "response": {"output": OUTPUTS[i % len(OUTPUTS)].format(i)},
+            "success": True,
+            "score": 1.0,
+            "gradingResult": {"pass": True, "score": 1.0, "reason": "All assertions passed",
+                              "componentResults": components},
+        })
+    return {"results": {"version": 3, "results": results,
+                        "stats": {"successes": count, "failures": 0, "errors": 0}}}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--outputs", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=0, help="Pool-Größe (Default: CPU-Anzahl)")
+    args = parser.parse_args()
+
+    export = make_export(args.outputs)
+    size_mb = len(json.dumps(export)) / 2**20
+
+    timings, diffs, exports = {}, {}, {}
+    for label, workers in [("ohne Pool", 1), ("Pool", args.workers)]:
+        data = copy.deepcopy(export)
+        start = time.perf_counter()
+        diffs[label] = rescore(data, workers=workers)
+        timings[label] = time.perf_counter() - start
+        exports[label] = data
+
+    assert exports["ohne Pool"] == exports["Pool"], "Pool und serieller Lauf bewerten unterschiedlich"
+    summary = diffs["Pool"]["summary"]
+
+    print(f"\n🔁 Neubewertung: {args.outputs} Outputs ({size_mb:.0f} MB Export), "
+          f"{summary['assertions_scored']} Python-Assertions, {summary['assertions_run']} Aufrufe")
+    for label, seconds in timings.items():
+        workers = diffs[label]["summary"]["workers"]
+        print(f"   {label:<10} {workers:>3} Prozesse  {seconds:6.2f}s  "
+              f"{args.outputs / seconds:>9,.0f} Outputs/s")
+    print(f"   Speedup: {timings['ohne Pool'] / timings['Pool']:.1f}x")
+    print(f"   Tests pass→fail: {summary['tests_pass_to_fail']}, pro Assertion: "
+          + ", ".join(f"{name} {stats['pass_to_fail']}" for name, stats in diffs['Pool']['assertions'].items()))
+
+
+if __name__ == "__main__":
+    main()
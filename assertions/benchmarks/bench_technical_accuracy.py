@@ -0,0 +1,95 @@
+"""
+Benchmark: check_technical_accuracy.py bleibt auch bei pathologischen Eingaben linear.
+
+Die alten Muster (z.B. r'vin.*?(\\d+)[\\s-]*(stellig|zeichen|character)')
+backtracken bei vielen "vin"-Erwähnungen ohne passende Längenangabe bis zum
+Textende - quadratische Laufzeit. Der Benchmark misst die Fakten-Engine auf
+solchen Eingaben von 1 KB bis 1 MB und zum Vergleich die alten Muster (nur
+bis 32 KB, darüber dauert es zu lange).
+
+Run: python assertions/benchmarks/bench_technical_accuracy.py
+"""
+
+import os
+import re
+import sys
+import time
+
+# Rohe Assertion-Laufzeit messen, nicht den Ergebnis-Cache
+os.environ.setdefault("ASSERTION_CACHE", "off")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from check_technical_accuracy import get_assert  # noqa: E402
+from text_analysis import clear_cache  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LEGACY_MAX_SIZE = 32_000
+
+LEGACY_PATTERNS = [
+    re.compile(r"vin.*?(\d+)[\s-]*(stellig|zeichen|character)"),
+    re.compile(r"wmi.*?(\d+)[\s-]*(stellig|zeichen|stellen)"),
+]
+
+# Pathologisch: viele Auslöser, aber (fast) nie die vollständige Längenangabe
+CORPORA = {
+    "vin ohne Länge": "vin " * 4,
+    "vin mit Zahl ohne Einheit": "vin 17 vin 1 ",
+    "wmi in einem Satz": "wmi von man wmi wma ",
+    "realistisch": (
+        "Die VIN hat 17 Zeichen, der WMI 3 Stellen. Der MAN TGX (6x4) erfüllt Euro 6e. "
+        "In der VIN sind die Buchstaben I, O und Q nicht erlaubt.\n"
+    ),
+}
+
+
+def make_output(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def time_call(fn, output: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # Ohne Analyse-Cache messen, sonst zählt nur der erste Durchlauf
+        clear_cache()
+        start = time.perf_counter()
+        fn(output)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def legacy(output: str):
+    lower = output.lower()
+    return [p.search(lower) for p in LEGACY_PATTERNS]
+
+
+def main():
+    print("📏 check_technical_accuracy pathological-input benchmark")
+    failed = False
+
+    for name, unit in CORPORA.items():
+        print(f"\n{name}")
+        print(f"{'size':>10} {'engine (ms)':>12} {'ns/char':>10} {'legacy (ms)':>12}")
+        per_char = []
+        for size in SIZES:
+            output = make_output(unit, size)
+            repeat = 5 if size <= 100_000 else 2
+            seconds = time_call(lambda o: get_assert(o, {}), output, repeat)
+            per_char.append(seconds / size * 1e9)
+            legacy_ms = (f"{time_call(legacy, output, 1) * 1000:>12.2f}"
+                         if size <= LEGACY_MAX_SIZE else f"{'-':>12}")
+            print(f"{size:>10} {seconds * 1000:>12.2f} {per_char[-1]:>10.1f} {legacy_ms}")
+
+        # Linear: Kosten pro Zeichen bleiben (grob) konstant
+        ratio = per_char[-1] / per_char[1]
+        print(f"ns/char 1 MB vs 10 KB: {ratio:.2f}x")
+        failed |= ratio > 3
+
+    if failed:
+        print("\n❌ Skalierung ist nicht linear")
+        sys.exit(1)
+    print("\n✅ Lineare Skalierung auf allen Eingaben")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: Batch-VIN-Validierung (NumPy) vs. VIN-für-VIN in Python.
+
+Erzeugt zufällige nordamerikanische VINs mit korrekter Prüfziffer, verfälscht
+einen Teil davon (Prüfziffer, I/O/Q, fremder WMI) und misst validate_vins
+gegen eine Schleife über compute_check_digit mit denselben Regeln.
+
+Run: python assertions/benchmarks/bench_vin_validation.py [--sizes 10000,100000,1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vin_validation import TRANSLITERATION, compute_check_digit, validate_vins  # noqa: E402
+
+WMI_CODES = ["1M8", "1FU", "3AK"]
+ALPHABET = "".join(TRANSLITERATION)
+
+
+def make_vins(size: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    vins = []
+    for _ in range(size):
+        body = rng.choice(WMI_CODES) + "".join(rng.choices(ALPHABET, k=14))
+        vin = body[:8] + compute_check_digit(body[:8] + "0" + body[9:]) + body[9:]
+        fault = rng.random()
+        if fault < 0.05:
+            vin = vin[:8] + ("0" if vin[8] != "0" else "1") + vin[9:]
+        elif fault < 0.08:
+            vin = vin[:16] + "O"
+        elif fault < 0.10:
+            vin = "WDB" + vin[3:]
+        vins.append(vin)
+    return vins
+
+
+def validate_loop(vins: list) -> list:
+    wmi = set(WMI_CODES)
+    valid = []
+    for vin in vins:
+        ok = len(vin) == 17 and not any(ch in "IOQ" for ch in vin) and vin[:3] in wmi
+        if ok and vin[0] in "12345":
+            ok = compute_check_digit(vin) == vin[8]
+        valid.append(ok)
+    return valid
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print("🚗 VIN validation: batch (NumPy) vs. Python loop")
+    print(f"{'VINs':>10} {'batch (ms)':>12} {'loop (ms)':>12} {'speedup':>9} {'invalid':>9}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        vins = make_vins(size)
+
+        start = time.perf_counter()
+        result = validate_vins(vins, wmi_codes=WMI_CODES)
+        batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = validate_loop(vins)
+        loop = time.perf_counter() - start
+
+        if result.valid.tolist() != expected:
+            print("❌ Batch- und Schleifen-Ergebnis weichen ab")
+            sys.exit(1)
+        invalid = size - int(result.valid.sum())
+        print(f"{size:>10} {batch * 1000:>12.1f} {loop * 1000:>12.1f} {loop / batch:>8.1f}x {invalid:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,10 @@ Verwendung in promptfooconfig.yaml:
       value: file://assertions/check_german.py
 """
 
-import re
+from result_cache import cached_assertion
+from text_analysis import analyze
 
+@cached_assertion
 def get_assert(output: str, context: dict) -> dict:
     """
     Prüft ob die Antwort auf Deutsch ist.
@@ -19,8 +21,10 @@ def get_assert(output: str, context: dict) -> dict:
     Returns:
         dict mit pass, score, reason
     """
+    analysis = analyze(output)
+
     # Deutsche Umlaute und ß
-    german_chars = re.findall(r'[äöüÄÖÜß]', output)
+    umlaut_count = analysis.count_chars('äöüß')
     
     # Typisch deutsche Wörter
     german_words = [
@@ -30,18 +34,18 @@ def get_assert(output: str, context: dict) -> dict:
         'fahrzeug', 'lkw', 'truck', 'motor', 'achse'
     ]
     
-    output_lower = output.lower()
-    found_german_words = [w for w in german_words if w in output_lower]
+    # Ganze Wörter, nicht Teilstrings ("die" in "diesel" zählt nicht)
+    found_german_words = [w for w in german_words if analysis.has_token(w)]
     
     # Scoring
-    has_umlauts = len(german_chars) > 0
+    has_umlauts = umlaut_count > 0
     has_german_words = len(found_german_words) >= 3
     
     if has_umlauts and has_german_words:
         return {
             "pass": True,
             "score": 1.0,
-            "reason": f"Antwort ist auf Deutsch (Umlaute: {len(german_chars)}, deutsche Wörter: {len(found_german_words)})"
+            "reason": f"Antwort ist auf Deutsch (Umlaute: {umlaut_count}, deutsche Wörter: {len(found_german_words)})"
         }
     elif has_german_words:
         return {
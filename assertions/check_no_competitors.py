@@ -6,7 +6,9 @@ Verwendung in promptfooconfig.yaml:
       value: file://assertions/check_no_competitors.py
 """
 
-import re
+from keyword_automaton import KeywordAutomaton
+from result_cache import cached_assertion
+from text_analysis import analyze
 
 # Konkurrenten von MAN Truck & Bus
 COMPETITORS = {
@@ -18,7 +20,65 @@ COMPETITORS = {
     "renault": ["renault trucks", "renault t", "renault c", "renault k", "renault d"],
 }
 
+# Positive Wörter die auf Empfehlung hindeuten
+POSITIVE_WORDS = [
+    "empfehl", "besser", "überlegen", "vorteil", "gut", "hervorragend",
+    "alternativ", "auch möglich", "in betracht", "option"
+]
 
+# Max. Abstand (Zeichen) zwischen Konkurrent und positivem Wort, nur innerhalb einer Zeile
+PROXIMITY_WINDOW = 50
+
+_COMPETITOR_KEYWORDS = {kw for keywords in COMPETITORS.values() for kw in keywords}
+_POSITIVE_RANK = {word: rank for rank, word in enumerate(POSITIVE_WORDS)}
+
+# Einmal beim Import aufgebaut; positive Wörter werden nur im Fenster um einen Konkurrenten gesucht
+_COMPETITOR_AUTOMATON = KeywordAutomaton(_COMPETITOR_KEYWORDS)
+_POSITIVE_AUTOMATON = KeywordAutomaton(POSITIVE_WORDS)
+
+
+def scan_competitors(output_lower: str) -> tuple:
+    """
+    Findet Konkurrenten und positive Erwähnungen in ihrer Nähe.
+
+    Args:
+        output_lower: Die LLM-Antwort in Kleinbuchstaben
+
+    Returns:
+        (found_competitors, positive_mentions) als Listen
+    """
+    found_competitors = []
+    positive_mentions = []
+    # Bestes positives Wort je Fenstertext; wiederholte Sätze werden nur einmal durchsucht
+    best_in_window = {}
+
+    for start, end, keyword in _COMPETITOR_AUTOMATON.finditer(output_lower):
+        found_competitors.append(keyword)
+
+        # Fenster um das Keyword, begrenzt auf die aktuelle Zeile (nur im Fenster nach \n suchen)
+        window_start = max(start - PROXIMITY_WINDOW, 0)
+        window_start = output_lower.rfind("\n", window_start, start) + 1 or window_start
+        window_end = min(end + PROXIMITY_WINDOW, len(output_lower))
+        line_end = output_lower.find("\n", end, window_end)
+        if line_end >= 0:
+            window_end = line_end
+
+        window = output_lower[window_start:window_end]
+        if window in best_in_window:
+            best = best_in_window[window]
+        else:
+            best = best_in_window[window] = min(
+                (word for _, _, word in _POSITIVE_AUTOMATON.finditer(window)),
+                key=_POSITIVE_RANK.__getitem__, default=None,
+            )
+
+        if best is not None:
+            positive_mentions.append(f"{keyword} ({best})")
+
+    return found_competitors, positive_mentions
+
+
+@cached_assertion
 def get_assert(output: str, context: dict) -> dict:
     """
     Prüft ob keine Konkurrenzprodukte positiv erwähnt oder empfohlen werden.
@@ -30,38 +90,13 @@ def get_assert(output: str, context: dict) -> dict:
     Returns:
         dict mit pass, score, reason
     """
-    output_lower = output.lower()
-    
-    found_competitors = []
-    positive_mentions = []
-    
-    # Positive Wörter die auf Empfehlung hindeuten
-    positive_words = [
-        "empfehl", "besser", "überlegen", "vorteil", "gut", "hervorragend",
-        "alternativ", "auch möglich", "in betracht", "option"
-    ]
-    
-    for brand, keywords in COMPETITORS.items():
-        for keyword in keywords:
-            if keyword in output_lower:
-                found_competitors.append(keyword)
-                
-                # Prüfe ob positiv erwähnt
-                # Suche im Kontext um das Keyword
-                pattern = rf'.{{0,50}}{re.escape(keyword)}.{{0,50}}'
-                matches = re.findall(pattern, output_lower)
-                
-                for match in matches:
-                    for pos_word in positive_words:
-                        if pos_word in match:
-                            positive_mentions.append(f"{keyword} ({pos_word})")
-                            break
+    found_competitors, positive_mentions = scan_competitors(analyze(output).lower)
     
     if positive_mentions:
         return {
             "pass": False,
             "score": 0.0,
-            "reason": f"Konkurrenzprodukte positiv erwähnt: {', '.join(set(positive_mentions))}"
+            "reason": f"Konkurrenzprodukte positiv erwähnt: {', '.join(sorted(set(positive_mentions)))}"
         }
     
     if found_competitors:
@@ -69,7 +104,7 @@ def get_assert(output: str, context: dict) -> dict:
         return {
             "pass": True,
             "score": 0.7,
-            "reason": f"Konkurrenten erwähnt (neutral): {', '.join(set(found_competitors))}"
+            "reason": f"Konkurrenten erwähnt (neutral): {', '.join(sorted(set(found_competitors)))}"
         }
     
     return {
@@ -6,8 +6,10 @@ Verwendung in promptfooconfig.yaml:
       value: file://assertions/check_professional.py
 """
 
-import re
+from result_cache import cached_assertion
+from text_analysis import analyze
 
+@cached_assertion
 def get_assert(output: str, context: dict) -> dict:
     """
     Prüft ob die Antwort professionell formuliert ist.
@@ -35,39 +37,27 @@ def get_assert(output: str, context: dict) -> dict:
         'cool', 'nice', 'super geil', 'hammer'
     ]
     
-    output_lower = output.lower()
-    found_informal = [w for w in informal_words if w in output_lower]
+    analysis = analyze(output)
+    found_informal = [w for w in informal_words if analysis.has_phrase(w)]
     
     if found_informal:
         issues.append(f"Umgangssprachlich: {', '.join(found_informal)}")
         score -= 0.3
     
     # Emojis
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F1E0-\U0001F1FF"  # flags
-        "\U00002702-\U000027B0"
-        "\U000024C2-\U0001F251"
-        "]+", 
-        flags=re.UNICODE
-    )
-    
-    emojis = emoji_pattern.findall(output)
+    emojis = analysis.emoji_spans
     if emojis:
         issues.append(f"Emojis gefunden: {len(emojis)}")
         score -= 0.2
     
     # Übermäßige Ausrufezeichen
-    exclamation_count = output.count('!')
+    exclamation_count = analysis.count_chars('!')
     if exclamation_count > 3:
         issues.append(f"Zu viele Ausrufezeichen: {exclamation_count}")
         score -= 0.1
     
     # Großbuchstaben-Wörter (SCHREIEN)
-    caps_words = re.findall(r'\b[A-ZÄÖÜ]{4,}\b', output)
+    caps_words = [word for word, _, _ in analysis.uppercase_runs]
     # Ausnahmen: Abkürzungen wie VIN, WMI, LKW, MAN, TGX
     allowed_caps = ['VIN', 'WMI', 'LKW', 'MAN', 'TGX', 'TGS', 'TGM', 'TGL', 'EURO', 'ISO', 'DIN']
     caps_words = [w for w in caps_words if w not in allowed_caps]
@@ -6,20 +6,61 @@ Verwendung in promptfooconfig.yaml:
       value: file://assertions/check_technical_accuracy.py
 """
 
-import re
+# Modul-Import, damit Änderungen an den Fakten den Ergebnis-Cache invalidieren
+import technical_facts
+from fact_rules import (
+    AxleRule, CodeRule, FactEngine, LengthRule, LetterSetRule, PhraseRule, VocabularyRule,
+)
+from result_cache import cached_assertion
 
-# Bekannte technische Fakten
-TECHNICAL_FACTS = {
-    "vin_length": 17,
-    "wmi_length": 3,
-    "forbidden_vin_chars": ["I", "O", "Q"],
-    "man_wmi_codes": ["WMA", "WMH", "XMC"],
-    "euro_norms": ["Euro 5", "Euro 6", "Euro 6c", "Euro 6d", "Euro 6e"],
-    "man_models": ["TGL", "TGM", "TGS", "TGX", "eTGM", "eTGS", "eTGX", "Lion's City"],
-    "axle_configs": ["4x2", "4x4", "6x2", "6x4", "8x4", "8x8"],
-}
+TECHNICAL_FACTS = technical_facts.TECHNICAL_FACTS
 
+# Deklarative Regeln über TECHNICAL_FACTS; neue Fakten = neuer Eintrag in technical_facts.py + ggf. neue Regel hier
+FACT_RULES = [
+    LengthRule("VIN", subjects=["vin", "fin", "fahrgestellnummer"], expected=TECHNICAL_FACTS["vin_length"]),
+    LengthRule("WMI", subjects=["wmi"], expected=TECHNICAL_FACTS["wmi_length"]),
+    CodeRule("WMI-Code für MAN", subjects=["wmi"], context="man", allowed=TECHNICAL_FACTS["man_wmi_codes"]),
+    LetterSetRule(
+        "Verbotene VIN-Zeichen",
+        subjects=["vin", "fin"],
+        cues=["verboten", "unzulässig", "ausgeschlossen", "forbidden", "prohibited"],
+        weak_cues=["nicht", "not"],
+        expected=TECHNICAL_FACTS["forbidden_vin_chars"],
+    ),
+    PhraseRule(
+        "Euro-Abgasnorm",
+        prefix="euro",
+        value_shape=r"\d[a-z]?|i{1,3}|iv|v|vi",
+        allowed=TECHNICAL_FACTS["euro_norms"] + TECHNICAL_FACTS["euro_norms_historic"],
+        aliases={"i": "1", "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6"},
+        known_wrong={
+            "Euro 7": "'euro 7' erwähnt - existiert noch nicht für LKW",
+            "Euro 8": "'euro 8' erwähnt - existiert noch nicht für LKW",
+        },
+    ),
+    # MAN-Baureihen heißen TG + Buchstabe (TGA, TGE, TGX …); unbekannte wie "TGZ" sind eine Warnung
+    VocabularyRule(
+        "MAN-Modell",
+        shape=r"e?tg[a-z]",
+        hint="tg",
+        allowed=TECHNICAL_FACTS["man_models"] + TECHNICAL_FACTS["man_models_historic"],
+    ),
+    AxleRule(TECHNICAL_FACTS["axle_configs"]),
+]
 
+_ENGINE = FactEngine(FACT_RULES)
+
+
+def _summarize(findings, severity: str) -> list:
+    """Gleiche Meldungen einer Schwere zusammenfassen, Reihenfolge des ersten Auftretens."""
+    counts = {}
+    for finding in findings:
+        if finding.severity == severity:
+            counts[finding.message] = counts.get(finding.message, 0) + finding.count
+    return [f"{message} ({n}x)" if n > 1 else message for message, n in counts.items()]
+
+
+@cached_assertion
 def get_assert(output: str, context: dict) -> dict:
     """
     Prüft technische Genauigkeit der Antwort.
@@ -31,42 +72,11 @@ def get_assert(output: str, context: dict) -> dict:
     Returns:
         dict mit pass, score, reason
     """
-    errors = []
-    warnings = []
-    
-    output_lower = output.lower()
-    
-    # Prüfe VIN-Länge wenn erwähnt
-    vin_length_match = re.search(r'vin.*?(\d+)[\s-]*(stellig|zeichen|character)', output_lower)
-    if vin_length_match:
-        mentioned_length = int(vin_length_match.group(1))
-        if mentioned_length != TECHNICAL_FACTS["vin_length"]:
-            errors.append(f"VIN-Länge falsch: {mentioned_length} statt 17")
-    
-    # Prüfe WMI-Länge wenn erwähnt
-    wmi_length_match = re.search(r'wmi.*?(\d+)[\s-]*(stellig|zeichen|stellen)', output_lower)
-    if wmi_length_match:
-        mentioned_length = int(wmi_length_match.group(1))
-        if mentioned_length != TECHNICAL_FACTS["wmi_length"]:
-            errors.append(f"WMI-Länge falsch: {mentioned_length} statt 3")
-    
-    # Prüfe ob verbotene VIN-Zeichen korrekt genannt werden
-    if "vin" in output_lower and ("buchstabe" in output_lower or "zeichen" in output_lower):
-        if "i" in output_lower and "o" in output_lower:
-            # Gut - beide verbotenen Buchstaben erwähnt
-            pass
-        elif "verwechsl" in output_lower:
-            # Erwähnt Verwechslungsgefahr - auch OK
-            pass
-    
-    # Prüfe Euro-Normen
-    for norm in ["euro 7", "euro 8"]:
-        if norm in output_lower:
-            warnings.append(f"'{norm}' erwähnt - existiert noch nicht für LKW")
-    
-    # Prüfe auf offensichtlich falsche Zahlen
-    # z.B. "VIN hat 15 Zeichen" oder "WMI hat 5 Stellen"
-    
+    findings = _ENGINE.check(output)
+    # Ohne Befunde (der Normalfall) gibt es nichts zusammenzufassen
+    errors = _summarize(findings, "error") if findings else []
+    warnings = _summarize(findings, "warning") if findings else []
+
     # Berechne Score
     if errors:
         score = 0.0
@@ -6,29 +6,33 @@ Verwendung in promptfooconfig.yaml:
       value: file://assertions/check_vin_format.py
 """
 
-import re
+# Modul-Import, damit Änderungen an TECHNICAL_FACTS den Ergebnis-Cache invalidieren
+import technical_facts
+from result_cache import cached_assertion
+from vin_validation import WMI, extract_vins, validate_vins
 
+@cached_assertion
 def get_assert(output: str, context: dict) -> dict:
     """
     Prüft ob VINs im Output korrekt formatiert sind.
-    
-    VIN-Regeln:
+
+    VIN-Regeln (siehe vin_validation.py):
     - Genau 17 Zeichen
     - Nur Großbuchstaben und Zahlen
     - Keine I, O, Q (Verwechslungsgefahr)
-    
+    - Prüfziffer an Stelle 9 (nur nordamerikanische VINs)
+    - WMI aus TECHNICAL_FACTS["man_wmi_codes"] (sonst nur Warnung)
+
     Args:
         output: Die LLM-Antwort
         context: Kontext mit vars, prompt, etc.
-    
+
     Returns:
         dict mit pass, score, reason
     """
-    # VIN-Pattern: 17 alphanumerische Zeichen
-    vin_pattern = r'\b[A-HJ-NPR-Z0-9]{17}\b'
-    
-    found_vins = re.findall(vin_pattern, output.upper())
-    
+    man_wmi_codes = technical_facts.TECHNICAL_FACTS["man_wmi_codes"]
+    found_vins = extract_vins(output)
+
     if not found_vins:
         # Keine VIN im Output - das ist OK, wenn keine erwartet wird
         return {
@@ -36,26 +40,34 @@ def get_assert(output: str, context: dict) -> dict:
             "score": 1.0,
             "reason": "Keine VIN im Output gefunden (neutral)"
         }
-    
-    valid_vins = []
+
+    result = validate_vins(found_vins, wmi_codes=man_wmi_codes)
     invalid_vins = []
-    
-    for vin in found_vins:
-        # Prüfe auf verbotene Zeichen
-        if re.search(r'[IOQ]', vin):
-            invalid_vins.append(f"{vin} (enthält I, O oder Q)")
-        else:
-            valid_vins.append(vin)
-    
+    foreign_vins = []
+
+    for i, (vin, mask) in enumerate(zip(result.vins, result.reasons.tolist())):
+        if mask & ~WMI:
+            invalid_vins.append(f"{vin} ({', '.join(result.reasons_for(i))})")
+        elif mask:
+            foreign_vins.append(vin)
+
     if invalid_vins:
         return {
             "pass": False,
             "score": 0.0,
             "reason": f"Ungültige VINs gefunden: {', '.join(invalid_vins)}"
         }
-    
+
+    if foreign_vins:
+        # Formal gültig, aber kein MAN-Hersteller-Code
+        return {
+            "pass": True,
+            "score": 0.7,
+            "reason": f"VINs ohne MAN-WMI ({', '.join(man_wmi_codes)}): {', '.join(foreign_vins)}"
+        }
+
     return {
         "pass": True,
         "score": 1.0,
-        "reason": f"Alle VINs korrekt formatiert: {', '.join(valid_vins)}"
+        "reason": f"Alle VINs korrekt formatiert: {', '.join(result.vins)}"
     }
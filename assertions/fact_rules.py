@@ -0,0 +1,426 @@
+"""
+Deklarative Fakten-Regeln für die Custom Python Assertions.
+
+Regeln arbeiten auf den Wort-Tokens eines Satzes (keine Backtracking-Regex).
+Jede Regel nennt ihre Auslöser-Tokens (oder eine Token-Form) und schaut nur in
+einem begrenzten Fenster innerhalb desselben Satzes nach. Ein Befund hängt also
+nur vom Satz ab; die FactEngine prüft deshalb jede verschiedene Zeile einmal
+und zählt Wiederholungen mit, und sie zerlegt nur Zeilen in Sätze und Tokens,
+in denen ein Auslöser überhaupt vorkommen kann (je Auslöser eine kompilierte
+Regex mit Literal-Präfix). Laufzeit damit O(Text) für die Vorauswahl plus
+O(Tokens × Fenster) für die Zeilen mit Auslösern, jedes Vorkommen wird geprüft.
+
+Verwendung:
+    engine = FactEngine([
+        LengthRule("VIN", subjects=["vin", "fin"], expected=17),
+        VocabularyRule("MAN-Modell", shape=r"e?tg[a-z]", hint="tg", allowed=["TGX", "TGS"]),
+    ])
+    for finding in engine.check(output):
+        ...
+"""
+
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, replace
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from text_analysis import TOKEN_PATTERN
+
+# Satzgrenzen innerhalb einer Zeile: . ! ? (nicht in Dezimalzahlen wie 32.5)
+SENTENCE_BOUNDARY = re.compile(r"[.!?](?:(?<!\d.)|(?!\d))")
+
+NUMBER_WORDS = {
+    "zwei": 2, "drei": 3, "vier": 4, "fünf": 5, "sechs": 6, "sieben": 7, "acht": 8,
+    "neun": 9, "zehn": 10, "elf": 11, "zwölf": 12, "dreizehn": 13, "vierzehn": 14,
+    "fünfzehn": 15, "sechzehn": 16, "siebzehn": 17, "achtzehn": 18, "neunzehn": 19, "zwanzig": 20,
+    "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18,
+}
+
+LENGTH_UNITS = ("stellig", "stellen", "zeichen", "character", "characters", "chars")
+
+# Wörter, die eine Buchstaben-Aufzählung einleiten ("die Buchstaben I, O und Q")
+LETTER_ANCHORS = ("buchstaben", "zeichen", "letters", "characters")
+ENUMERATION_JOINERS = frozenset({"und", "oder", "sowie", "and", "or"})
+
+# Gemerkte Token-Formen je Engine; danach wird neu begonnen (unbegrenzt viele verschiedene Tokens)
+SHAPE_MEMO_SIZE = 50_000
+
+
+@dataclass(frozen=True)
+class Finding:
+    severity: str  # "error" | "warning"
+    message: str
+    # Wie oft der Satz mit diesem Befund in der Antwort vorkommt
+    count: int = 1
+
+
+class Scan:
+    """Tokens eines Satzes: klein geschrieben für die Regeln, im Original für Codes und Meldungen."""
+
+    def __init__(self, sentence: str, lower: str):
+        self.text = sentence
+        self.tokens = TOKEN_PATTERN.findall(lower)
+        # Regeln auf Satzebene laufen einmal pro Satz
+        self.done: set = set()
+
+    @cached_property
+    def original(self) -> List[str]:
+        return TOKEN_PATTERN.findall(self.text)
+
+    @cached_property
+    def words(self) -> frozenset:
+        return frozenset(self.tokens)
+
+    @cached_property
+    def spans(self) -> List[Tuple[int, int]]:
+        """Offsets der Tokens im Satz (nur für Regeln, die Abstände brauchen)."""
+        return [m.span() for m in TOKEN_PATTERN.finditer(self.text)]
+
+    def window(self, index: int, size: int) -> range:
+        """Token-Indizes nach index, höchstens size viele."""
+        return range(index + 1, min(index + 1 + size, len(self.tokens)))
+
+
+class FactRule(ABC):
+    """
+    Basisklasse: triggers() nennt die Tokens, bei denen check_at aufgerufen wird;
+    Regeln für eine Token-Form überschreiben matches() und hints() (Literale, die
+    in jedem passenden Token vorkommen, für die Vorauswahl der Zeilen).
+    """
+
+    def triggers(self) -> Iterable[str]:
+        return ()
+
+    def matches(self, token: str) -> bool:
+        """Für Regeln, die auf eine Token-Form statt auf feste Wörter reagieren."""
+        return False
+
+    def hints(self) -> Iterable[str]:
+        """Regex-Teile, von denen einer in jeder Zeile mit passendem Token vorkommt."""
+        return ()
+
+    @abstractmethod
+    def check_at(self, scan: Scan, index: int) -> Iterable[Finding]:
+        ...
+
+
+def _number(token: str) -> Optional[int]:
+    if token.isdigit():
+        return int(token)
+    return NUMBER_WORDS.get(token)
+
+
+class LengthRule(FactRule):
+    """'<Subjekt> … <Zahl> <Einheit>' muss die erwartete Länge nennen (z.B. VIN 17 Zeichen)."""
+
+    def __init__(self, name: str, subjects: Sequence[str], expected: int,
+                 units: Sequence[str] = LENGTH_UNITS, window: int = 8):
+        self.name = name
+        self.subjects = tuple(subjects)
+        self.expected = expected
+        self.units = frozenset(units)
+        self.window_size = window
+        self._glued = re.compile(r"^(\d+)(" + "|".join(map(re.escape, self.units)) + r")$")
+
+    def triggers(self):
+        return self.subjects
+
+    def _length_at(self, scan: Scan, j: int) -> Optional[int]:
+        token = scan.tokens[j]
+        if token[0].isdigit():
+            glued = self._glued.match(token)
+            if glued:
+                return int(glued.group(1))
+        value = _number(token)
+        if value is not None and j + 1 < len(scan.tokens) and scan.tokens[j + 1] in self.units:
+            return value
+        return None
+
+    def check_at(self, scan, index):
+        # Nur die erste Längenangabe nach dem Subjekt gehört zu ihm
+        tokens = scan.tokens
+        for j in scan.window(index, self.window_size):
+            if not (tokens[j][0].isdigit() or tokens[j] in NUMBER_WORDS):
+                continue
+            length = self._length_at(scan, j)
+            if length is not None:
+                if length != self.expected:
+                    yield Finding("error", f"{self.name}-Länge falsch: {length} statt {self.expected}")
+                return
+
+
+class CodeRule(FactRule):
+    """
+    Codes nach einem Subjekt (z.B. 'WMI von MAN: WMA, WMH') müssen erlaubt sein,
+    sofern der Satz das Kontextwort (z.B. 'man') enthält.
+    """
+
+    def __init__(self, name: str, subjects: Sequence[str], allowed: Sequence[str], context: str,
+                 code_pattern: str = r"[A-Z0-9]{3}", separators: Sequence[str] = ("und", "oder", "bzw", "sowie", "and", "or"),
+                 window: int = 8):
+        self.name = name
+        self.subjects = tuple(subjects)
+        self.allowed = frozenset(allowed)
+        self.context = context
+        self.code = re.compile(f"^{code_pattern}$")
+        self.ignore = frozenset(s.upper() for s in self.subjects) | {context.upper()}
+        self.separators = frozenset(separators)
+        self.window_size = window
+
+    def triggers(self):
+        return self.subjects
+
+    def _code(self, scan: Scan, j: int) -> Optional[str]:
+        text = scan.original[j]
+        if self.code.match(text) and text not in self.ignore and not text.isdigit():
+            return text
+        return None
+
+    def check_at(self, scan, index):
+        if self.context not in scan.words:
+            return
+        codes = []
+        for j in scan.window(index, self.window_size):
+            code = self._code(scan, j)
+            if code:
+                codes.append(code)
+            elif codes and scan.tokens[j] not in self.separators:
+                # Aufzählung zu Ende ("WMA, WMH oder XMC"), dahinter beginnt etwas anderes
+                break
+        for code in codes:
+            if code not in self.allowed:
+                yield Finding("error", f"{self.name} falsch: {code} (erlaubt: {', '.join(sorted(self.allowed))})")
+
+
+class LetterSetRule(FactRule):
+    """
+    Aufzählung einzelner Buchstaben ("I, O und Q") in einem Satz über verbotene
+    Zeichen muss exakt stimmen. Gezählt werden nur Aufzählungen, die direkt bei
+    einem Hinweiswort oder "Buchstaben" stehen, nicht jeder Einzelbuchstabe im
+    Satz ("Prüfziffer 0-9 oder X"). Schwache Hinweise ("nicht") ergeben nur eine
+    Warnung, weil sie auch in richtigen Sätzen über andere Zeichen vorkommen.
+    Ausgelöst wird die Regel vom Subjekt ("VIN"), das seltener ist als "nicht".
+    """
+
+    def __init__(self, name: str, subjects: Sequence[str], cues: Sequence[str], expected: Sequence[str],
+                 weak_cues: Sequence[str] = (), anchors: Sequence[str] = LETTER_ANCHORS, gap: int = 2):
+        self.name = name
+        self.subjects = tuple(subjects)
+        self.cues = frozenset(cues)
+        self.weak_cues = frozenset(weak_cues)
+        self.markers = self.cues | self.weak_cues | frozenset(anchors)
+        self.expected = frozenset(letter.lower() for letter in expected)
+        self.gap = gap
+
+    def triggers(self):
+        return self.subjects
+
+    def check_at(self, scan, index):
+        # Ein Satz mit mehreren Subjekten wird nur einmal geprüft
+        if self in scan.done:
+            return
+        scan.done.add(self)
+
+        if self.cues.isdisjoint(scan.words):
+            if self.weak_cues.isdisjoint(scan.words):
+                return
+            severity = "warning"
+        else:
+            severity = "error"
+        words = scan.tokens
+        for first, last in _letter_enumerations(words):
+            nearby = words[max(0, first - self.gap):first] + words[last:last + self.gap]
+            if not any(w in self.markers for w in nearby):
+                continue
+            letters = {w for w in words[first:last] if w not in ENUMERATION_JOINERS}
+            if letters != self.expected:
+                named = ", ".join(sorted(letter.upper() for letter in letters))
+                expected = ", ".join(sorted(letter.upper() for letter in self.expected))
+                yield Finding(severity, f"{self.name} falsch: {named} statt {expected}")
+
+
+def _letter_enumerations(words: List[str]) -> Iterator[Tuple[int, int]]:
+    """(Start, Ende) jeder Folge aus mind. zwei Einzelbuchstaben, verbunden durch Komma/und/oder."""
+    letters = [i for i, word in enumerate(words) if len(word) == 1 and word.isalpha()]
+    k = 0
+    while k < len(letters):
+        first = last = letters[k]
+        k += 1
+        while k < len(letters) and (letters[k] == last + 1 or
+                                    (letters[k] == last + 2 and words[last + 1] in ENUMERATION_JOINERS)):
+            last = letters[k]
+            k += 1
+        if last > first:
+            yield first, last + 1
+
+
+def _is_letter(word: str) -> bool:
+    return len(word) == 1 and word.isalpha()
+
+
+class VocabularyRule(FactRule):
+    """
+    Tokens einer bestimmten Form (z.B. MAN-Baureihen 'tg?') müssen in der erlaubten
+    Liste stehen. hint ist ein Literal, das jedes passende Token enthält ('tg').
+    """
+
+    def __init__(self, name: str, shape: str, hint: str, allowed: Sequence[str], severity: str = "warning",
+                 message: str = "'{value}' ist kein bekanntes {name}"):
+        self.name = name
+        self.shape = re.compile(f"^(?:{shape})$")
+        self.hint = hint
+        self.allowed = frozenset(a.lower() for a in allowed)
+        self.severity = severity
+        self.message = message
+
+    def matches(self, token):
+        return bool(self.shape.match(token))
+
+    def hints(self):
+        return (re.escape(self.hint),)
+
+    def check_at(self, scan, index):
+        if scan.tokens[index] not in self.allowed:
+            yield Finding(self.severity, self.message.format(value=scan.original[index], name=self.name))
+
+
+class PhraseRule(FactRule):
+    """'<Präfix> <Wert>' (z.B. 'Euro 6d') muss erlaubt sein; bekannte Falschaussagen mit eigener Meldung."""
+
+    def __init__(self, name: str, prefix: str, value_shape: str, allowed: Sequence[str],
+                 known_wrong: Optional[Dict[str, str]] = None, aliases: Optional[Dict[str, str]] = None,
+                 severity: str = "warning"):
+        self.name = name
+        self.prefix = prefix
+        self.value = re.compile(f"^(?:{value_shape})$")
+        self.allowed = frozenset(a.lower() for a in allowed)
+        self.known_wrong = {k.lower(): v for k, v in (known_wrong or {}).items()}
+        self.aliases = aliases or {}
+        self.severity = severity
+
+    def triggers(self):
+        return (self.prefix,)
+
+    def check_at(self, scan, index):
+        j = index + 1
+        if j >= len(scan.tokens):
+            return
+        value = scan.tokens[j]
+        if not self.value.match(value):
+            return
+        # "Euro VI" → "euro 6"; "Euro 6 d" (zwei Tokens) → "euro 6d"
+        value = self.aliases.get(value, value)
+        if j + 1 < len(scan.tokens) and _is_letter(scan.tokens[j + 1]) \
+                and scan.spans[j + 1][0] - scan.spans[j][1] <= 1:
+            value += scan.tokens[j + 1]
+        phrase = f"{self.prefix} {value}"
+        if phrase in self.allowed:
+            return
+        if phrase in self.known_wrong:
+            yield Finding(self.severity, self.known_wrong[phrase])
+        else:
+            yield Finding(self.severity, f"'{phrase}' ist keine bekannte {self.name}")
+
+
+class AxleRule(FactRule):
+    """Achsformeln 'RxA': Antrieb > Räder ist falsch, unbekannte Formeln sind eine Warnung."""
+
+    SHAPE = re.compile(r"^(\d{1,2})x(\d{1,2})$")
+
+    def __init__(self, allowed: Sequence[str]):
+        self.allowed = frozenset(allowed)
+
+    def matches(self, token):
+        return bool(self.SHAPE.match(token))
+
+    def hints(self):
+        return (r"x\d",)
+
+    def check_at(self, scan, index):
+        token = scan.tokens[index]
+        if token in self.allowed:
+            return
+        wheels, driven = map(int, self.SHAPE.match(token).groups())
+        if driven > wheels or wheels % 2 or driven % 2:
+            yield Finding("error", f"Achsformel {token} ist technisch nicht möglich")
+        else:
+            yield Finding("warning", f"Achsformel {token} ist keine bekannte MAN-Konfiguration")
+
+
+class FactEngine:
+    """
+    Kompiliert die Regeln zu einer Auslöser-Tabelle und einer Vorauswahl-Regex.
+    Gleiche Zeilen werden einmal geprüft, ihre Befunde tragen die Anzahl.
+    """
+
+    def __init__(self, rules: Sequence[FactRule]):
+        self.rules = list(rules)
+        self._by_token: Dict[str, List[FactRule]] = {}
+        for rule in self.rules:
+            for token in rule.triggers():
+                self._by_token.setdefault(token, []).append(rule)
+        self._shape_rules = [r for r in self.rules if type(r).matches is not FactRule.matches]
+        # Vorauswahl: jeder Hinweis einzeln als Regex mit Literal-Präfix (schnelle Präfix-Suche
+        # in re); eine Alternation ohne gemeinsames Präfix wäre pro Zeichen etwa zehnmal langsamer
+        hints = [re.escape(token) for token in self._by_token]
+        hints += [h for r in self._shape_rules for h in r.hints()]
+        self._hints = [re.compile(h).search for h in hints]
+        self._rules_for: Dict[str, Tuple[FactRule, ...]] = {}
+
+    def _dispatch(self, token: str) -> Tuple[FactRule, ...]:
+        rules = self._rules_for.get(token)
+        if rules is None:
+            if len(self._rules_for) >= SHAPE_MEMO_SIZE:
+                self._rules_for.clear()
+            rules = self._rules_for[token] = (
+                *self._by_token.get(token, ()),
+                *(r for r in self._shape_rules if r.matches(token)),
+            )
+        return rules
+
+    def _mentions(self, lower: str) -> bool:
+        """Kann die (klein geschriebene) Zeile einen Auslöser enthalten?"""
+        for search in self._hints:
+            if search(lower):
+                return True
+        return False
+
+    def _check_sentence(self, sentence: str, lower: str) -> Iterator[Finding]:
+        scan = Scan(sentence, lower)
+        known = self._rules_for
+        for index, token in enumerate(scan.tokens):
+            rules = known.get(token)
+            if rules is None:
+                rules = self._dispatch(token)
+            for rule in rules:
+                yield from rule.check_at(scan, index)
+
+    def _sentences(self, line: str, lower: str) -> Iterator[Tuple[str, str]]:
+        """Sätze der Zeile (original, klein), in denen ein Auslöser vorkommen kann."""
+        parts = SENTENCE_BOUNDARY.split(line)
+        if parts[-1] == "":
+            parts.pop()
+        if len(parts) == 1 and len(lower) == len(line):
+            # Die Zeile ist ein Satz und schon vorausgewählt (ohne Satzzeichen am Ende)
+            yield parts[0], lower[:len(parts[0])]
+            return
+        for sentence in parts:
+            sentence_lower = sentence.lower()
+            if self._mentions(sentence_lower):
+                yield sentence, sentence_lower
+
+    def check(self, text: str) -> List[Finding]:
+        findings: List[Finding] = []
+        # Wiederholte Zeilen nur einmal prüfen (Counter lohnt erst ab mehreren Zeilen)
+        lines = Counter(text.split("\n")) if "\n" in text else {text: 1}
+        for line, repeats in lines.items():
+            lower = line.lower()
+            if not self._mentions(lower):
+                continue
+            for sentence, sentence_lower in self._sentences(line, lower):
+                for finding in self._check_sentence(sentence, sentence_lower):
+                    findings.append(replace(finding, count=repeats) if repeats > 1 else finding)
+        return findings
@@ -0,0 +1,134 @@
+"""
+Mehrfach-Schlüsselwortsuche für die Custom Python Assertions.
+
+Findet beliebig viele Schlüsselwörter (auch überlappende, z.B. "scania" und
+"scania r") mit einer einzigen kompilierten Regex: die Wortliste wird als Trie
+in eine Regex übersetzt ("da(?:f(?: xf)?|ily)"), sodass re pro Textposition nur
+wenige Zeichen vergleicht statt jedes Wort einzeln. Die Schleife über den Text
+läuft in C, Python arbeitet nur an den Treffern. Was die nicht überlappende
+Regex-Suche nicht sieht, steht in Tabellen, die einmal beim Aufbau aus der
+Wortliste berechnet werden:
+
+- Wörter, die Präfix des gefundenen Wortes sind ("scania" in "scania r")
+- Versätze innerhalb eines Treffers, an denen ein weiteres Wort beginnen kann
+  ("s-way" in "scania s-way"); nur dort wird zusätzlich gesucht
+
+Vorher prüft str.find für die Wörter, die kein anderes Wort enthalten (Anker),
+welche davon vorkommen: das ist pro Wort etwa 1 ms/MB. Ohne Anker entfällt die
+Regex-Suche, mit wenigen Ankern sucht eine kleinere Regex nur die Wörter, die
+einen davon enthalten (wenige Anfangszeichen, re prüft weniger Positionen).
+
+Die Struktur wird einmal beim Import der Assertion aufgebaut und danach nur
+noch gelesen.
+
+Verwendung:
+    automaton = KeywordAutomaton(["daf", "daf xf", "besser"])
+    for start, end, keyword in automaton.finditer(text.lower()):
+        ...
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Pattern, Tuple
+
+# Kompilierte Regex je Kombination vorkommender Anker; danach wird neu begonnen
+SUBSET_CACHE_SIZE = 256
+
+
+class KeywordAutomaton:
+    """
+    Sucht alle Vorkommen einer festen Wortliste, auch überlappende.
+
+    Die optionalen Trie-Zweige sind gierig, ein Regex-Treffer ist also immer
+    das längste Wort, das an seiner Position beginnt.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = list(dict.fromkeys(k for k in keywords if k))
+        ordered = sorted(self.keywords, key=len, reverse=True)
+
+        self._pattern = _compile(self.keywords)
+        # Jedes Wort enthält mindestens einen Anker; fehlt ein Anker im Text, fehlen seine Wörter
+        self._anchors = tuple(
+            word for word in ordered if not any(k != word and k in word for k in self.keywords)
+        )
+        self._subsets: Dict[FrozenSet[str], Pattern] = {}
+
+        # Alle Wörter, die an derselben Stelle beginnen wie das längste (längstes zuerst)
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            word: tuple(k for k in ordered if word.startswith(k)) for word in self.keywords
+        }
+        # Versätze in einem Treffer, an denen ein anderes Wort beginnen könnte:
+        # der Rest des Treffers ist Präfix dieses Wortes oder umgekehrt
+        self._inner: Dict[str, Tuple[int, ...]] = {
+            word: tuple(
+                offset for offset in range(1, len(word))
+                if any(k.startswith(word[offset:]) or word[offset:].startswith(k) for k in self.keywords)
+            )
+            for word in self.keywords
+        }
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        Liefert alle Treffer als (start, end, keyword), sortiert nach Startposition
+        (bei gleichem Start das längste Wort zuerst).
+
+        Überlappende Treffer werden alle gemeldet.
+        """
+        pattern = self._pattern_for(text)
+        if pattern is None:
+            return
+        prefixes = self._prefixes
+        inner = self._inner
+        match_at = pattern.match
+
+        for match in pattern.finditer(text):
+            start = match.start()
+            word = match.group()
+            for keyword in prefixes[word]:
+                yield start, start + len(keyword), keyword
+            # Die Suche geht hinter dem Treffer weiter, Wörter die darin beginnen hier nachholen
+            for offset in inner[word]:
+                nested = match_at(text, start + offset)
+                if nested:
+                    for keyword in prefixes[nested.group()]:
+                        yield start + offset, start + offset + len(keyword), keyword
+
+    def findall(self, text: str) -> List[Tuple[int, int, str]]:
+        """Wie finditer(), aber als Liste."""
+        return list(self.finditer(text))
+
+    def _pattern_for(self, text: str):
+        """Regex über die Wörter, deren Anker im Text vorkommen; None wenn keiner vorkommt."""
+        found = [anchor for anchor in self._anchors if anchor in text]
+        if not found:
+            return None
+        if len(found) == len(self._anchors):
+            return self._pattern
+        present = frozenset(found)
+        pattern = self._subsets.get(present)
+        if pattern is None:
+            if len(self._subsets) >= SUBSET_CACHE_SIZE:
+                self._subsets.clear()
+            pattern = self._subsets[present] = _compile(
+                [k for k in self.keywords if any(anchor in k for anchor in present)]
+            )
+        return pattern
+
+
+def _compile(keywords: Iterable[str]) -> Pattern:
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return re.compile(_trie_pattern(trie))
+
+
+def _trie_pattern(node: dict) -> str:
+    """Regex für einen Trie-Knoten; "" markiert ein Wortende (dann ist die Fortsetzung optional)."""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if "" in node else body
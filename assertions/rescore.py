@@ -0,0 +1,296 @@
+"""
+Offline-Neubewertung gespeicherter promptfoo-Ergebnisse.
+
+Liest einen promptfoo JSON-Export (`promptfoo eval --output results.json`),
+wendet die gewählten check_*.py Assertions erneut auf die gespeicherten
+Outputs an und schreibt eine aktualisierte Ergebnisdatei plus ein Diff der
+Pass/Fail-Änderungen. Es gibt keine Modell-Aufrufe: nur die Assertions laufen,
+verteilt in Chunks auf einen Prozess-Pool (jeder Worker lädt die Module einmal).
+
+Ersetzt werden nur Component-Results vom Typ python, deren Wert auf eine
+gewählte Assertion zeigt (file://assertions/check_german.py); alle anderen
+Assertions behalten ihr gespeichertes Ergebnis. gradingResult, success, score,
+namedScores und stats werden daraus wie von promptfoo neu berechnet
+(gewichteter Score-Mittelwert, Pass wenn alle Assertions bestehen bzw. der
+Score die threshold des Tests erreicht).
+
+Run:
+    python assertions/rescore.py eval/results/python.json
+    python assertions/rescore.py results.json --assertions check_german check_vin_format \\
+        --out results.rescored.json --diff results.diff.json --workers 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ASSERTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+if ASSERTIONS_DIR not in sys.path:
+    sys.path.insert(0, ASSERTIONS_DIR)
+
+# Aufträge pro Worker und Chunk-Runde: genug Chunks für Lastausgleich, wenig IPC pro Output
+CHUNKS_PER_WORKER = 8
+MAX_CHUNK_SIZE = 2000
+
+# (Auftrags-Nr., Assertion, Output, Context)
+WorkItem = Tuple[int, str, str, dict]
+
+_registry = None
+
+
+def assertion_name(assertion: Optional[dict]) -> Optional[str]:
+    """check_german für {"type": "python", "value": "file://assertions/check_german.py"}, sonst None."""
+    if not assertion or assertion.get("type") != "python":
+        return None
+    value = assertion.get("value")
+    if not isinstance(value, str) or not value.endswith(".py"):
+        return None
+    name = os.path.splitext(os.path.basename(value))[0]
+    return name if name.startswith("check_") else None
+
+
+def eval_results(data: dict) -> List[dict]:
+    """Die Ergebnisliste eines Exports (aktuelles {"results": {"results": [...]}} oder flaches Format)."""
+    results = data.get("results")
+    if isinstance(results, dict):
+        results = results.get("results")
+    if not isinstance(results, list):
+        raise ValueError("Keine promptfoo-Ergebnisliste gefunden (erwartet results.results)")
+    return results
+
+
+def stored_output(result: dict) -> str:
+    response = result.get("response") or {}
+    output = response.get("output", result.get("output"))
+    if output is None:
+        return ""
+    return output if isinstance(output, str) else json.dumps(output, ensure_ascii=False)
+
+
+def assertion_context(result: dict) -> dict:
+    """Der Kontext, den promptfoo an get_assert übergibt (vars, prompt, test)."""
+    prompt = result.get("prompt")
+    return {
+        "vars": result.get("vars") or {},
+        "prompt": prompt.get("raw") if isinstance(prompt, dict) else prompt,
+        "test": result.get("testCase") or {},
+    }
+
+
+def collect_work(results: List[dict], selected: Optional[Iterable[str]]
+                 ) -> Tuple[List[WorkItem], List[List[Tuple[int, int]]]]:
+    """
+    Aufträge und pro Auftrag die (Result-Index, Component-Index) Paare, die sein
+    Ergebnis bekommen: gleiche Assertion auf gleichem Output und Kontext läuft nur einmal.
+    """
+    selected = set(selected) if selected else None
+    items: List[WorkItem] = []
+    targets: List[List[Tuple[int, int]]] = []
+    seen: Dict[Tuple[str, str, str], int] = {}
+    for i, result in enumerate(results):
+        components = (result.get("gradingResult") or {}).get("componentResults") or []
+        output = context = context_key = None
+        for j, component in enumerate(components):
+            name = assertion_name(component.get("assertion"))
+            if name is None or (selected is not None and name not in selected):
+                continue
+            if output is None:
+                output, context = stored_output(result), assertion_context(result)
+                context_key = json.dumps(context, sort_keys=True, ensure_ascii=False, default=str)
+            key = (name, output, context_key)
+            job = seen.get(key)
+            if job is None:
+                job = seen[key] = len(items)
+                items.append((job, name, output, context))
+                targets.append([])
+            targets[job].append((i, j))
+    return items, targets
+
+
+def _init_worker(use_cache: bool):
+    global _registry
+    if not use_cache:
+        # 100k Schreibzugriffe aus vielen Prozessen auf eine SQLite-Datei kosten mehr als die Assertions
+        os.environ["ASSERTION_CACHE"] = "off"
+    from assertion_server import load_assertions
+
+    _registry = load_assertions()
+
+
+def _run_chunk(chunk: List[WorkItem]) -> List[Tuple[int, dict]]:
+    scored = []
+    for job, name, output, context in chunk:
+        get_assert = _registry.get(name)
+        try:
+            if get_assert is None:
+                raise KeyError(f"Unbekannte Assertion: {name}")
+            result = get_assert(output, context)
+            if isinstance(result, bool):
+                result = {"pass": result, "score": 1.0 if result else 0.0, "reason": ""}
+            elif isinstance(result, (int, float)):
+                result = {"pass": result > 0, "score": float(result), "reason": ""}
+        except Exception as e:
+            # Wie promptfoo: eine werfende Assertion ist ein Fail mit der Exception als Grund
+            result = {"pass": False, "score": 0.0, "reason": f"Python-Assertion Fehler: {type(e).__name__}: {e}"}
+        scored.append((job, result))
+    return scored
+
+
+def chunked(items: List[WorkItem], workers: int) -> List[List[WorkItem]]:
+    size = max(1, min(MAX_CHUNK_SIZE, -(-len(items) // (workers * CHUNKS_PER_WORKER))))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def run_pool(items: List[WorkItem], workers: int, use_cache: bool = False) -> Iterable[Tuple[int, dict]]:
+    if workers <= 1:
+        _init_worker(use_cache)
+        yield from _run_chunk(items)
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(use_cache,)) as pool:
+        for scored in pool.imap_unordered(_run_chunk, chunked(items, workers)):
+            yield from scored
+
+
+def regrade(result: dict):
+    """Berechnet gradingResult, success, score und namedScores aus den Component-Results neu."""
+    grading = result["gradingResult"]
+    components = grading.get("componentResults") or []
+    if not components:
+        return
+    weights = [float((c.get("assertion") or {}).get("weight", 1)) for c in components]
+    total = sum(weights)
+    score = sum(w * float(c.get("score", 0)) for w, c in zip(weights, components)) / total if total else 0.0
+    threshold = (result.get("testCase") or {}).get("threshold")
+    passed = score >= threshold if threshold is not None else all(c.get("pass") for c in components)
+    failed = [c for c in components if not c.get("pass")]
+
+    grading.update(
+        {"pass": passed, "score": score,
+         "reason": failed[0].get("reason", "") if failed and not passed else "All assertions passed"}
+    )
+    for component in components:
+        metric = (component.get("assertion") or {}).get("metric")
+        if metric:
+            result.setdefault("namedScores", {})[metric] = component.get("score")
+    # Fehlgeschlagene Provider-Aufrufe bleiben Fehler, egal was die Assertions sagen
+    if not (result.get("response") or {}).get("error"):
+        result["success"] = passed
+    result["score"] = score
+
+
+def update_stats(data: dict, results: List[dict]):
+    stats = data["results"].get("stats") if isinstance(data.get("results"), dict) else data.get("stats")
+    if not isinstance(stats, dict):
+        return
+    errors = sum(bool((r.get("response") or {}).get("error")) for r in results)
+    successes = sum(bool(r.get("success")) for r in results)
+    stats.update(successes=successes, failures=len(results) - successes - errors, errors=errors)
+
+
+def describe(result: dict, index: int) -> str:
+    description = result.get("description") or (result.get("testCase") or {}).get("description")
+    return description or f"Test {result.get('testIdx', index)}"
+
+
+def rescore(data: dict, assertions: Optional[Iterable[str]] = None, workers: int = 0,
+            use_cache: bool = False) -> dict:
+    """
+    Bewertet data (promptfoo Export, wird verändert) neu und liefert das Diff:
+    {"summary": {...}, "assertions": {name: {...}}, "changes": [...]}.
+    """
+    results = eval_results(data)
+    items, targets = collect_work(results, assertions)
+    workers = min(workers or os.cpu_count() or 1, max(1, len(items)))
+    before_success = [bool(r.get("success")) for r in results]
+
+    per_assertion: Dict[str, dict] = {}
+    changes: Dict[int, dict] = {}
+    start = time.perf_counter()
+    for job, new in run_pool(items, workers, use_cache):
+        name = items[job][1]
+        new_pass, new_score = bool(new.get("pass")), new.get("score")
+        stats = per_assertion.setdefault(name, {"scored": 0, "pass_to_fail": 0, "fail_to_pass": 0,
+                                                "score_changed": 0})
+        for i, j in targets[job]:
+            component = results[i]["gradingResult"]["componentResults"][j]
+            old_pass, old_score = bool(component.get("pass")), component.get("score")
+            stats["scored"] += 1
+            stats["score_changed"] += old_score != new_score
+            if old_pass != new_pass:
+                stats["pass_to_fail" if old_pass else "fail_to_pass"] += 1
+            if old_pass != new_pass or old_score != new_score:
+                changes.setdefault(i, {"index": i, "description": describe(results[i], i), "assertions": []})
+                changes[i]["assertions"].append({
+                    "assertion": name,
+                    "before": {"pass": old_pass, "score": old_score, "reason": component.get("reason")},
+                    "after": {"pass": new_pass, "score": new_score, "reason": new.get("reason")},
+                })
+            component.update({"pass": new_pass, "score": new_score, "reason": new.get("reason", "")})
+    duration = time.perf_counter() - start
+
+    for i in {i for target in targets for i, _ in target}:
+        regrade(results[i])
+    update_stats(data, results)
+
+    for i, change in changes.items():
+        change["success"] = {"before": before_success[i], "after": bool(results[i].get("success"))}
+    flipped = [c for c in changes.values() if c["success"]["before"] != c["success"]["after"]]
+    return {
+        "summary": {
+            "results": len(results),
+            "assertions_scored": sum(len(target) for target in targets),
+            "assertions_run": len(items),
+            "workers": workers,
+            "duration_s": round(duration, 3),
+            "tests_pass_to_fail": sum(c["success"]["before"] for c in flipped),
+            "tests_fail_to_pass": sum(c["success"]["after"] for c in flipped),
+            "tests_with_changes": len(changes),
+        },
+        "assertions": dict(sorted(per_assertion.items())),
+        "changes": [changes[i] for i in sorted(changes)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="promptfoo-Ergebnisse offline mit den Python-Assertions neu bewerten")
+    parser.add_argument("results", help="promptfoo JSON-Export")
+    parser.add_argument("--assertions", nargs="*", help="nur diese check_* Assertions (Default: alle im Export)")
+    parser.add_argument("--out", help="aktualisierte Ergebnisdatei (Default: <results>.rescored.json)")
+    parser.add_argument("--diff", help="Diff der Pass/Fail-Änderungen (Default: <results>.diff.json)")
+    parser.add_argument("--workers", type=int, default=0, help="Prozesse (Default: CPU-Anzahl, 1 = ohne Pool)")
+    parser.add_argument("--use-cache", action="store_true", help="Assertion-Ergebnis-Cache verwenden")
+    args = parser.parse_args()
+
+    base = os.path.splitext(args.results)[0]
+    out_path = args.out or f"{base}.rescored.json"
+    diff_path = args.diff or f"{base}.diff.json"
+
+    with open(args.results, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    try:
+        diff = rescore(data, args.assertions, args.workers, args.use_cache)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    with open(diff_path, "w", encoding="utf-8") as f:
+        json.dump(diff, f, indent=2, ensure_ascii=False)
+
+    summary = diff["summary"]
+    print(f"🔁 {summary['assertions_scored']} Assertions über {summary['results']} Ergebnisse neu bewertet "
+          f"({summary['assertions_run']} Aufrufe) in {summary['duration_s']}s ({summary['workers']} Prozesse)")
+    for name, stats in diff["assertions"].items():
+        print(f"   {name:<28} {stats['scored']:>7} bewertet, {stats['pass_to_fail']} pass→fail, "
+              f"{stats['fail_to_pass']} fail→pass")
+    print(f"   Tests: {summary['tests_pass_to_fail']} pass→fail, {summary['tests_fail_to_pass']} fail→pass")
+    print(f"   Ergebnis: {out_path}\n   Diff: {diff_path}")
+
+
+if __name__ == "__main__":
+    main()
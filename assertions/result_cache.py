@@ -0,0 +1,335 @@
+"""
+Persistenter Ergebnis-Cache für die Custom Python Assertions.
+
+Schlüssel: (Assertion-Name, Hash des Assertion-Quellcodes inkl. importierter
+Hilfsmodule, Hash des Outputs, relevante Kontext-Variablen). Wert: das
+{pass, score, reason} Dict. Ändert sich eine Assertion, ändert sich ihr
+Quellcode-Hash und alte Einträge werden automatisch nicht mehr getroffen.
+
+Verwendung in einer Assertion:
+    from result_cache import cached_assertion
+
+    @cached_assertion
+    def get_assert(output: str, context: dict) -> dict:
+        ...
+
+Eine Assertion, deren Ergebnis von Test-Variablen abhängt, listet diese in
+CACHE_CONTEXT_VARS = ["query", ...] auf Modulebene.
+
+Konfiguration (Umgebungsvariablen):
+    ASSERTION_CACHE=off             Cache deaktivieren
+    ASSERTION_CACHE_PATH=...        SQLite-Datei (Default: assertions/.cache/results.sqlite)
+    ASSERTION_CACHE_MAX_ENTRIES=... Max. Einträge, danach LRU-Eviction (Default: 100000)
+
+Treffer, Zugriffszeiten und neue Ergebnisse werden im Speicher gesammelt und
+gebündelt geschrieben (alle FLUSH_INTERVAL Vorgänge, spätestens nach
+FLUSH_SECONDS und beim Prozessende), ein Lookup kostet also nur ein SELECT.
+
+Statistik: python assertions/result_cache.py --stats
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import multiprocessing.util
+import os
+import sqlite3
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Tuple
+
+ASSERTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(ASSERTIONS_DIR, ".cache", "results.sqlite")
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Gesammelte Schreibvorgänge gehen nach N Lookups/Ergebnissen oder T Sekunden in die Datei
+FLUSH_INTERVAL = 1000
+FLUSH_SECONDS = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    assertion TEXT NOT NULL,
+    result TEXT NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access);
+CREATE TABLE IF NOT EXISTS stats (
+    assertion TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class ResultCache:
+    """SQLite-basierter Cache mit größenbegrenzter LRU-Eviction und Hit/Miss-Zählern."""
+
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # Noch nicht geschriebene Änderungen (siehe flush)
+        self._results: Dict[str, Tuple[str, str, float]] = {}
+        self._touched: Dict[str, float] = {}
+        self._counts: Dict[str, List[int]] = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Mehrere promptfoo-Worker schreiben parallel: WAL + Busy-Timeout
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, key: str, assertion: str) -> Optional[dict]:
+        with self._lock:
+            pending = self._results.get(key)
+            if pending is not None:
+                result = pending[1]
+            else:
+                row = self._conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+                result = row[0] if row else None
+
+            counts = self._counts.setdefault(assertion, [0, 0])
+            if result is not None:
+                self.hits += 1
+                counts[0] += 1
+                self._touched[key] = time.time()
+            else:
+                self.misses += 1
+                counts[1] += 1
+            self._tick()
+        return json.loads(result) if result is not None else None
+
+    def put(self, key: str, assertion: str, result: dict):
+        with self._lock:
+            self._results[key] = (assertion, json.dumps(result, ensure_ascii=False), time.time())
+            self._tick()
+
+    def flush(self):
+        """Schreibt gesammelte Ergebnisse, Zugriffszeiten und Zähler in einer Transaktion."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush()
+            finally:
+                self._conn.close()
+
+    def _tick(self):
+        self._pending += 1
+        if self._pending >= FLUSH_INTERVAL or time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+            self._flush()
+
+    def _flush(self):
+        results, touched, counts = self._results, self._touched, self._counts
+        self._results, self._touched, self._counts = {}, {}, {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        if not (results or touched or counts):
+            return
+
+        # Schlägt das Schreiben fehl, ist der Stapel verloren: es ist nur ein Cache
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (key, assertion, result, last_access) VALUES (?, ?, ?, ?)",
+                [(key, assertion, result, accessed) for key, (assertion, result, accessed) in results.items()],
+            )
+            self._conn.executemany(
+                "UPDATE results SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in touched.items() if key not in results],
+            )
+            self._conn.executemany(
+                "INSERT INTO stats (assertion, hits, misses) VALUES (?, ?, ?) "
+                "ON CONFLICT(assertion) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                [(assertion, hits, misses) for assertion, (hits, misses) in counts.items()],
+            )
+            if results:
+                self._evict()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self) -> Dict[str, dict]:
+        """Persistierte Zähler pro Assertion (über alle Prozesse/Läufe)."""
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT s.assertion, s.hits, s.misses, "
+                "(SELECT COUNT(*) FROM results r WHERE r.assertion = s.assertion) "
+                "FROM stats s ORDER BY s.assertion"
+            ).fetchall()
+        return {
+            name: {
+                "hits": hits,
+                "misses": misses,
+                "entries": entries,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            }
+            for name, hits, misses, entries in rows
+        }
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._results, self._touched, self._counts = {}, {}, {}
+            self._pending = 0
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute("DELETE FROM stats")
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return os.getenv("ASSERTION_CACHE", "on").lower() not in ("0", "off", "false", "no")
+
+
+def get_cache() -> ResultCache:
+    """Prozessweite Cache-Instanz (lazy geöffnet)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                path=os.getenv("ASSERTION_CACHE_PATH", DEFAULT_PATH),
+                max_entries=int(os.getenv("ASSERTION_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+            # Gesammeltes beim Prozessende schreiben: Finalizer laufen auch in
+            # multiprocessing-Workern, die atexit-Handler überspringen
+            multiprocessing.util.Finalize(_cache, _cache.close, exitpriority=10)
+        return _cache
+
+
+def _module_file(obj) -> Optional[str]:
+    if isinstance(obj, ModuleType):
+        return getattr(obj, "__file__", None)
+    module = sys.modules.get(getattr(obj, "__module__", None) or "")
+    return getattr(module, "__file__", None)
+
+
+def source_fingerprint(module_globals: dict) -> str:
+    """
+    Hash über den Quellcode der Assertion und aller (transitiv) importierten
+    Module aus dem assertions/ Verzeichnis (z.B. text_analysis.py).
+    """
+    digest = hashlib.sha256()
+    seen = set()
+    pending = [(module_globals.get("__file__"), module_globals)]
+
+    while pending:
+        path, namespace = pending.pop()
+        if not path:
+            continue
+        path = os.path.abspath(path)
+        if path in seen or os.path.dirname(path) != ASSERTIONS_DIR:
+            continue
+        seen.add(path)
+
+        if namespace is None:
+            module = next((m for m in list(sys.modules.values())
+                           if os.path.abspath(getattr(m, "__file__", None) or "") == path), None)
+            namespace = vars(module) if module else {}
+
+        for value in namespace.values():
+            dep = _module_file(value)
+            if dep:
+                pending.append((dep, None))
+
+    for path in sorted(seen):
+        with open(path, "rb") as f:
+            digest.update(os.path.basename(path).encode())
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def cache_key(assertion: str, fingerprint: str, output: str, context_vars: dict) -> str:
+    payload = json.dumps(
+        [
+            assertion,
+            fingerprint,
+            hashlib.sha256((output or "").encode("utf-8", "surrogatepass")).hexdigest(),
+            context_vars,
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_assertion(get_assert: Callable) -> Callable:
+    """Decorator für get_assert(output, context): Ergebnisse über Läufe hinweg cachen."""
+    module_globals = get_assert.__globals__
+    assertion = os.path.splitext(os.path.basename(module_globals.get("__file__") or get_assert.__module__))[0]
+    fingerprint = None
+
+    @functools.wraps(get_assert)
+    def wrapper(output: str, context: dict) -> dict:
+        nonlocal fingerprint
+        if not is_enabled():
+            return get_assert(output, context)
+
+        try:
+            if fingerprint is None:
+                # Erst beim ersten Aufruf: dann sind alle Imports des Moduls aufgelöst
+                fingerprint = source_fingerprint(module_globals)
+            relevant = module_globals.get("CACHE_CONTEXT_VARS", ())
+            variables = (context or {}).get("vars") or {}
+            key = cache_key(assertion, fingerprint, output, {k: variables.get(k) for k in relevant})
+            cache = get_cache()
+            cached = cache.get(key, assertion)
+        except (sqlite3.Error, OSError) as e:
+            # Der Cache darf eine Assertion nie zum Scheitern bringen
+            print(f"⚠️ Assertion-Cache nicht verfügbar: {e}", file=sys.stderr)
+            return get_assert(output, context)
+
+        if cached is not None:
+            return cached
+
+        result = get_assert(output, context)
+        try:
+            cache.put(key, assertion, result)
+        except sqlite3.Error as e:
+            print(f"⚠️ Assertion-Cache Schreibfehler: {e}", file=sys.stderr)
+        return result
+
+    return wrapper
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assertion-Ergebnis-Cache verwalten")
+    parser.add_argument("--stats", action="store_true", help="Hit/Miss-Statistik anzeigen")
+    parser.add_argument("--clear", action="store_true", help="Cache leeren")
+    args = parser.parse_args()
+
+    cache = get_cache()
+    if args.clear:
+        cache.clear()
+        print(f"🧹 Cache geleert: {cache.path}")
+    else:
+        stats = cache.stats()
+        hits = sum(s["hits"] for s in stats.values())
+        misses = sum(s["misses"] for s in stats.values())
+        print(json.dumps({"path": cache.path, "assertions": stats, "hits": hits, "misses": misses},
+                         indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
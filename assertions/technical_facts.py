@@ -0,0 +1,21 @@
+"""
+Bekannte technische Fakten zu MAN-LKW, gemeinsam genutzt von den Custom Python
+Assertions (check_technical_accuracy.py, check_vin_format.py).
+
+Nur Daten, keine Logik: Assertions importieren das Modul (nicht einzelne Namen),
+damit Änderungen hier den Ergebnis-Cache invalidieren (siehe result_cache.py).
+"""
+
+TECHNICAL_FACTS = {
+    "vin_length": 17,
+    "wmi_length": 3,
+    "forbidden_vin_chars": ["I", "O", "Q"],
+    "man_wmi_codes": ["WMA", "WMH", "XMC"],
+    "euro_norms": ["Euro 5", "Euro 6", "Euro 6c", "Euro 6d", "Euro 6e"],
+    # Ältere Normen sind real, nur nicht mehr aktuell für neue Fahrzeuge
+    "euro_norms_historic": ["Euro 1", "Euro 2", "Euro 3", "Euro 4"],
+    "man_models": ["TGE", "TGL", "TGM", "TGS", "TGX", "eTGE", "eTGM", "eTGS", "eTGX", "Lion's City"],
+    # Ausgelaufene Baureihen, in Antworten zu Bestandsfahrzeugen korrekt
+    "man_models_historic": ["TGA"],
+    "axle_configs": ["4x2", "4x4", "6x2", "6x4", "6x6", "8x2", "8x4", "8x6", "8x8", "10x4", "10x6", "10x8"],
+}
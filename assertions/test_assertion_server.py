@@ -0,0 +1,32 @@
+"""
+Fehlerhafte Nachrichten an den Assertion-Server.
+
+Run: pytest assertions/test_assertion_server.py
+"""
+
+import json
+
+import pytest
+
+from assertion_server import AssertionServer
+
+
+def echo(output, context):
+    return {"pass": True, "score": 1.0, "reason": output}
+
+
+@pytest.fixture
+def server():
+    return AssertionServer({"echo": echo})
+
+
+@pytest.mark.parametrize("line", ["[]", '"x"', "1", "null", '{"batch": 5}', '{"assertion": 1}'])
+def test_invalid_messages_get_an_error(server, line):
+    assert "error" in json.loads(server.handle_line(line))
+
+
+def test_invalid_batch_items_do_not_stop_the_batch(server):
+    response = json.loads(server.handle_line(json.dumps({"batch": [1, {"assertion": "echo", "output": "ok"}, []]})))
+    results = response["results"]
+    assert "error" in results[0] and "error" in results[2]
+    assert results[1] == {"result": {"pass": True, "score": 1.0, "reason": "ok"}}
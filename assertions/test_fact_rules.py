@@ -0,0 +1,54 @@
+"""
+Regressionen der Fakten-Regeln in check_technical_accuracy.py.
+
+Run: pytest assertions/test_fact_rules.py
+"""
+
+import os
+
+import pytest
+
+# Ergebnisse nicht aus dem Assertion-Cache früherer Läufe lesen
+os.environ["ASSERTION_CACHE"] = "off"
+
+from check_technical_accuracy import get_assert  # noqa: E402
+from fact_rules import FactRule  # noqa: E402
+
+
+@pytest.mark.parametrize("output", [
+    # Einzelbuchstaben außerhalb der Aufzählung (Prüfziffer X) gehören nicht dazu
+    "I, O und Q werden in der VIN nicht verwendet, Position 9 ist die Prüfziffer (0-9 oder X).",
+    "In der VIN sind die Buchstaben I, O und Q nicht erlaubt.",
+    "Die VIN hat 17 Zeichen, der WMI 3 Stellen. Der MAN TGX (6x4) erfüllt Euro 6e.",
+    # Ausgelaufene Baureihe und schwere Achsformel sind real
+    "Der MAN TGA mit Achsformel 10x4 wurde bis 2007 gebaut.",
+])
+def test_correct_answers_pass(output):
+    result = get_assert(output, {})
+    assert (result["pass"], result["score"]) == (True, 1.0), result["reason"]
+
+
+@pytest.mark.parametrize("output, score", [
+    ("In der VIN sind die Buchstaben I und O verboten.", 0.0),
+    # "nicht" allein ist ein schwacher Hinweis: nur Warnung
+    ("In der VIN sind die Buchstaben I, O, Q und X nicht erlaubt.", 0.7),
+])
+def test_wrong_letter_sets_are_reported(output, score):
+    result = get_assert(output, {})
+    assert result["score"] == score
+    assert "Verbotene VIN-Zeichen falsch" in result["reason"]
+
+
+def test_repeated_lines_are_counted():
+    line = "Der MAN TGZ erfüllt Euro 7."
+    result = get_assert("\n".join([line] * 3), {})
+    assert "'TGZ' ist kein bekanntes MAN-Modell (3x)" in result["reason"]
+    assert "existiert noch nicht für LKW (3x)" in result["reason"]
+
+
+def test_rules_must_implement_check_at():
+    class Incomplete(FactRule):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
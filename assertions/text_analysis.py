@@ -0,0 +1,204 @@
+"""
+Gemeinsame Textanalyse für die Custom Python Assertions.
+
+Jede LLM-Antwort bekommt genau ein AnalyzedOutput, das (mit dem Text als
+Schlüssel) in einem LRU-Cache gehalten wird, sodass mehrere Assertions auf derselben Antwort
+(z.B. im Assertion-Server) nur noch nachschlagen. Die einzelnen Felder
+(Kleinschreibung, Wort-Tokens mit Offsets, Häufigkeitsindex,
+Großbuchstaben-Wörter, Emoji-Bereiche) werden erst beim ersten Zugriff
+berechnet: eine Assertion, die nur nach ein paar Wörtern fragt, bezahlt nicht
+für den vollständigen Token-Index.
+
+Verwendung:
+    from text_analysis import analyze
+
+    analysis = analyze(output)
+    analysis.has_token("fahrzeug")
+    analysis.has_phrase("echt jetzt")
+"""
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from functools import cached_property, lru_cache
+from typing import Dict, Iterator, List, Pattern, Tuple
+
+# Wort-Tokens (Unicode, inkl. Umlaute und Ziffern)
+TOKEN_PATTERN = re.compile(r"\w+", flags=re.UNICODE)
+
+# Großbuchstaben-Wörter (SCHREIEN), mind. 4 Zeichen
+UPPERCASE_PATTERN = re.compile(r"\b[A-ZÄÖÜ]{4,}\b")
+
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]+",
+    flags=re.UNICODE
+)
+
+# Max. Anzahl gecachter Analysen (LRU)
+CACHE_SIZE = 256
+# Zusätzlich begrenzt über die Summe der Textlängen: eine vollständig
+# berechnete Analyse belegt ein Vielfaches ihres Textes (Tokens mit Offsets,
+# Index). Die neueste Analyse bleibt immer im Cache, auch wenn sie allein
+# größer ist - gerade große Antworten werden von allen Assertions geteilt.
+CACHE_MAX_CHARS = 4_000_000
+
+Span = Tuple[int, int]
+
+
+def _is_word_char(ch: str) -> bool:
+    # Entspricht \w in TOKEN_PATTERN
+    return ch.isalnum() or ch == "_"
+
+
+@lru_cache(maxsize=256)
+def _phrase_tail(words: Tuple[str, ...]) -> Pattern:
+    """Rest einer Wortfolge ab dem Ende des ersten Wortes (z.B. " jetzt" in "echt jetzt")."""
+    return re.compile("".join(r"\W+" + re.escape(word) for word in words) + r"(?!\w)")
+
+
+class AnalyzedOutput:
+    """Analyse einer LLM-Antwort; jedes Feld wird beim ersten Zugriff berechnet und danach nur gelesen."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._token_memo: Dict[str, bool] = {}
+        self._char_counts: Dict[str, int] = {}
+
+    @classmethod
+    def from_text(cls, text: str) -> "AnalyzedOutput":
+        return cls(text)
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[Tuple[str, int, int]]:
+        return [(m.group(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(self.lower)]
+
+    @cached_property
+    def _positions(self) -> Dict[str, List[int]]:
+        positions: Dict[str, List[int]] = {}
+        for index, (token, _, _) in enumerate(self.tokens):
+            positions.setdefault(token, []).append(index)
+        return positions
+
+    @cached_property
+    def token_counts(self) -> Counter:
+        if "_positions" in self.__dict__:
+            return Counter({token: len(idx) for token, idx in self._positions.items()})
+        return Counter(TOKEN_PATTERN.findall(self.lower))
+
+    @cached_property
+    def uppercase_runs(self) -> List[Tuple[str, int, int]]:
+        return [(m.group(), m.start(), m.end()) for m in UPPERCASE_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def emoji_spans(self) -> List[Span]:
+        return [m.span() for m in EMOJI_PATTERN.finditer(self.text)]
+
+    def _token_starts(self, word: str) -> Iterator[int]:
+        """Offsets in `lower`, an denen `word` als ganzes Token steht (Substring-Suche statt Token-Index)."""
+        if not TOKEN_PATTERN.fullmatch(word):
+            return
+        lower = self.lower
+        n = len(word)
+        i = lower.find(word)
+        while i != -1:
+            if (i == 0 or not _is_word_char(lower[i - 1])) and \
+                    (i + n == len(lower) or not _is_word_char(lower[i + n])):
+                yield i
+            i = lower.find(word, i + 1)
+
+    def has_token(self, word: str) -> bool:
+        """True wenn das Wort als ganzes Token vorkommt (nicht als Teilstring)."""
+        # Ist der Index schon da (z.B. von den Fakten-Regeln), nur nachschlagen
+        for index in ("_positions", "token_counts"):
+            if index in self.__dict__:
+                return word in self.__dict__[index]
+        found = self._token_memo.get(word)
+        if found is None:
+            found = self._token_memo[word] = next(self._token_starts(word), None) is not None
+        return found
+
+    def count(self, word: str) -> int:
+        return self.token_counts.get(word, 0)
+
+    def count_chars(self, chars: str) -> int:
+        """Anzahl der Vorkommen aller Zeichen aus `chars` in der kleingeschriebenen Antwort."""
+        count = self._char_counts.get(chars)
+        if count is None:
+            count = self._char_counts[chars] = sum(self.lower.count(c) for c in chars)
+        return count
+
+    def token_indices(self, word: str) -> List[int]:
+        """Positionen des Wortes in der Token-Liste."""
+        return self._positions.get(word, [])
+
+    def find_phrase(self, phrase: str) -> List[int]:
+        """Token-Indizes, an denen die Wortfolge beginnt (z.B. "echt jetzt")."""
+        words = TOKEN_PATTERN.findall(phrase.lower())
+        if not words:
+            return []
+
+        starts = self._positions.get(words[0], [])
+        if len(words) == 1:
+            return list(starts)
+
+        tokens = self.tokens
+        return [
+            i for i in starts
+            if i + len(words) <= len(tokens)
+            and all(tokens[i + k][0] == w for k, w in enumerate(words[1:], start=1))
+        ]
+
+    def has_phrase(self, phrase: str) -> bool:
+        words = TOKEN_PATTERN.findall(phrase.lower())
+        if not words or not all(self.has_token(w) for w in words):
+            return False
+        if len(words) == 1:
+            return True
+        # Aufeinanderfolgende Tokens sind durch Nicht-Wortzeichen getrennt
+        tail = _phrase_tail(tuple(words[1:]))
+        return any(tail.match(self.lower, start + len(words[0])) for start in self._token_starts(words[0]))
+
+
+# Schlüssel ist der Text selbst: str merkt sich seinen Hash, die Analyse hält ihn ohnehin
+_cache: "OrderedDict[str, AnalyzedOutput]" = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_chars = 0
+
+
+def analyze(output: str) -> AnalyzedOutput:
+    """Liefert die (gecachte) Analyse für eine LLM-Antwort."""
+    output = output or ""
+
+    global _cache_chars
+    with _cache_lock:
+        analysis = _cache.get(output)
+        if analysis is not None:
+            _cache.move_to_end(output)
+            return analysis
+
+        # Kostet nichts: alles Weitere rechnet die Analyse erst bei Bedarf
+        analysis = _cache[output] = AnalyzedOutput(output)
+        _cache_chars += len(output)
+        while len(_cache) > 1 and (len(_cache) > CACHE_SIZE or _cache_chars > CACHE_MAX_CHARS):
+            _, evicted = _cache.popitem(last=False)
+            _cache_chars -= len(evicted.text)
+
+    return analysis
+
+
+def clear_cache():
+    global _cache_chars
+    with _cache_lock:
+        _cache.clear()
+        _cache_chars = 0
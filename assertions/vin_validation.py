@@ -0,0 +1,204 @@
+"""
+Batch-Validierung von Fahrzeug-Identifizierungsnummern (VIN, ISO 3779).
+
+Prüft beliebig viele VIN-Kandidaten auf einmal: Die Kandidaten werden in ein
+(n, 17) Byte-Array kopiert, Transliteration, Gewichtung und Prüfziffer
+werden über Lookup-Tabellen mit NumPy für alle Zeilen gleichzeitig berechnet.
+Pro VIN entsteht eine Bitmaske mit den Gründen (REASONS); 0 = gültig.
+
+Prüfziffer (Position 9): nach ISO 3779 nur für nordamerikanische VINs
+(WMI beginnt mit 1-5) verpflichtend, europäische Hersteller (z.B. MAN, WMA)
+nutzen die Stelle frei. Standardmäßig wird sie deshalb nur dort geprüft.
+
+Verwendung:
+    result = validate_vins(["WMA06XZZ9HM123456", ...], wmi_codes=["WMA", "WMH"])
+    result.valid            # bool-Array
+    result.reasons_for(0)   # ["WMI ... nicht erlaubt", ...]
+
+    python assertions/vin_validation.py traces.jsonl [--wmi WMA,WMH,XMC]
+"""
+
+import argparse
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+VIN_LENGTH = 17
+CHECK_DIGIT_POSITION = 8
+
+# Kandidaten im Freitext: 17 alphanumerische Zeichen mit mindestens einer Ziffer.
+# I, O und Q sind absichtlich erlaubt, damit sie als Grund gemeldet werden können.
+VIN_CANDIDATE = re.compile(r"\b(?=[A-Z]*[0-9])[A-Z0-9]{17}\b")
+
+# Gründe als Bitmaske
+LENGTH = 1
+CHARSET = 2
+FORBIDDEN = 4
+CHECK_DIGIT = 8
+WMI = 16
+
+REASONS = {
+    LENGTH: "Länge ungleich 17 Zeichen",
+    CHARSET: "enthält Zeichen außer A-Z und 0-9",
+    FORBIDDEN: "enthält I, O oder Q",
+    CHECK_DIGIT: "Prüfziffer (Stelle 9) stimmt nicht",
+    WMI: "WMI (Stellen 1-3) nicht erlaubt",
+}
+
+# Transliteration nach ISO 3779 / 49 CFR 565; I, O, Q haben keinen Wert
+TRANSLITERATION = {
+    **{str(d): d for d in range(10)},
+    **dict(zip("ABCDEFGH", range(1, 9))),
+    **dict(zip("JKLMN", range(1, 6))),
+    "P": 7, "R": 9,
+    **dict(zip("STUVWXYZ", range(2, 10))),
+}
+WEIGHTS = np.array([8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2], dtype=np.int32)
+
+# Byte -> Wert, -1 = kein gültiges VIN-Zeichen
+_VALUES = np.full(256, -1, dtype=np.int32)
+for _ch, _value in TRANSLITERATION.items():
+    _VALUES[ord(_ch)] = _value
+_FORBIDDEN = np.zeros(256, dtype=bool)
+_FORBIDDEN[[ord(c) for c in "IOQ"]] = True
+_NORTH_AMERICA = np.zeros(256, dtype=bool)
+_NORTH_AMERICA[[ord(c) for c in "12345"]] = True
+# Rest 0-9 -> "0"-"9", Rest 10 -> "X"
+_CHECK_CHARS = np.frombuffer(b"0123456789X", dtype=np.uint8)
+
+
+@dataclass
+class VinBatchResult:
+    """Ergebnis von validate_vins; Arrays in der Reihenfolge der Eingabe."""
+
+    vins: List[str]
+    reasons: np.ndarray          # uint8 Bitmaske je VIN, 0 = gültig
+    check_digit_checked: np.ndarray  # bool: Prüfziffer wurde geprüft
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.reasons == 0
+
+    def __len__(self) -> int:
+        return len(self.vins)
+
+    def reasons_for(self, index: int) -> List[str]:
+        mask = int(self.reasons[index])
+        return [text for flag, text in REASONS.items() if mask & flag]
+
+    def counts(self) -> Counter:
+        """Anzahl VINs je Grund (eine VIN kann mehrere Gründe haben)."""
+        return Counter({text: int(np.count_nonzero(self.reasons & flag)) for flag, text in REASONS.items()})
+
+    def invalid(self) -> Iterator[tuple]:
+        for index in np.flatnonzero(self.reasons):
+            yield self.vins[index], self.reasons_for(index)
+
+
+def compute_check_digit(vin: str) -> Optional[str]:
+    """Prüfziffer einer einzelnen VIN (Referenz zur Batch-Berechnung); None bei ungültigen Zeichen."""
+    if len(vin) != VIN_LENGTH or any(ch not in TRANSLITERATION for ch in vin):
+        return None
+    remainder = sum(TRANSLITERATION[ch] * int(w) for ch, w in zip(vin, WEIGHTS)) % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def validate_vins(
+    vins: Sequence[str],
+    wmi_codes: Optional[Iterable[str]] = None,
+    require_check_digit: Optional[bool] = None,
+) -> VinBatchResult:
+    """
+    Validiert alle VINs in einem Durchgang.
+
+    Args:
+        vins: VIN-Kandidaten (werden in Großbuchstaben geprüft)
+        wmi_codes: erlaubte WMI-Codes; None = jeder WMI ist erlaubt
+        require_check_digit: True/False erzwingt bzw. überspringt die
+            Prüfziffer; None = nur für nordamerikanische WMIs (1-5)
+
+    Returns:
+        VinBatchResult mit Bitmaske je VIN
+    """
+    vins = list(vins)
+    n = len(vins)
+    reasons = np.zeros(n, dtype=np.uint8)
+    checked = np.zeros(n, dtype=bool)
+
+    lengths = np.fromiter(map(len, vins), dtype=np.int64, count=n)
+    full = lengths == VIN_LENGTH
+    reasons[~full] |= LENGTH
+    rows = np.flatnonzero(full)
+    if not len(rows):
+        return VinBatchResult(vins, reasons, checked)
+
+    # Nicht-ASCII wird zu genau einem "?" - die Zeilen bleiben 17 Bytes breit
+    # (erst danach upper(): "ß".upper() wäre zwei Zeichen lang)
+    joined = "".join(vins[i] for i in rows).encode("ascii", "replace").upper()
+    codes = np.frombuffer(joined, dtype=np.uint8).reshape(-1, VIN_LENGTH)
+
+    values = _VALUES[codes]
+    forbidden = _FORBIDDEN[codes]
+    unknown = (values < 0) & ~forbidden
+    reasons[rows[forbidden.any(axis=1)]] |= FORBIDDEN
+    reasons[rows[unknown.any(axis=1)]] |= CHARSET
+
+    # Prüfziffer nur auf Zeilen mit ausschließlich gültigen Zeichen
+    clean = ~(forbidden | unknown).any(axis=1)
+    if require_check_digit is None:
+        enforce = clean & _NORTH_AMERICA[codes[:, 0]]
+    else:
+        enforce = clean & require_check_digit
+    remainder = (np.maximum(values, 0) @ WEIGHTS) % 11
+    wrong = codes[:, CHECK_DIGIT_POSITION] != _CHECK_CHARS[remainder]
+    checked[rows[enforce]] = True
+    reasons[rows[enforce & wrong]] |= CHECK_DIGIT
+
+    if wmi_codes is not None:
+        allowed = np.array([code.upper().encode("ascii") for code in wmi_codes], dtype="S3")
+        wmi = np.ascontiguousarray(codes[:, :3]).view("S3").ravel()
+        reasons[rows[~np.isin(wmi, allowed)]] |= WMI
+
+    return VinBatchResult(vins, reasons, checked)
+
+
+def extract_vins(text: str) -> List[str]:
+    """VIN-Kandidaten aus Freitext (case-insensitive, Ausgabe in Großbuchstaben)."""
+    return VIN_CANDIDATE.findall(text.upper())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VINs in exportierten Traces/Outputs validieren")
+    parser.add_argument("files", nargs="+", help="Textdateien (z.B. JSONL-Exporte), '-' für stdin")
+    parser.add_argument("--wmi", help="Erlaubte WMI-Codes, kommagetrennt (z.B. WMA,WMH,XMC)")
+    parser.add_argument("--check-digit", choices=["auto", "always", "never"], default="auto")
+    parser.add_argument("--show", type=int, default=20, help="Max. ungültige VINs ausgeben")
+    args = parser.parse_args()
+
+    candidates: List[str] = []
+    for path in args.files:
+        with (sys.stdin if path == "-" else open(path, "r", encoding="utf-8", errors="replace")) as f:
+            for line in f:
+                candidates.extend(extract_vins(line))
+
+    require = {"auto": None, "always": True, "never": False}[args.check_digit]
+    result = validate_vins(candidates, wmi_codes=args.wmi.split(",") if args.wmi else None,
+                           require_check_digit=require)
+
+    valid = int(result.valid.sum())
+    print(f"🔎 {len(result)} VINs gefunden, {valid} gültig, {len(result) - valid} ungültig")
+    for reason, count in result.counts().items():
+        if count:
+            print(f"   {reason:<40} {count}")
+    for i, (vin, reasons) in enumerate(result.invalid()):
+        if i >= args.show:
+            break
+        print(f"   ❌ {vin}: {', '.join(reasons)}")
+
+
+if __name__ == "__main__":
+    main()
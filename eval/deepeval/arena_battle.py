@@ -1,64 +1,98 @@
+"""
+Arena Battle: prompt tournament on the golden dataset.
+
+Every prompt variant proofreads the same golden cases (concurrently, through
+the BedrockClaude response cache), a judge compares the answers pairwise and
+a Bradley-Terry fit ranks the prompts. Prompts that clearly lose against the
+leader are dropped early, so 10 candidates need far fewer judge calls than a
+full round robin.
+
+With Langfuse credentials set, the standings are reported as one
+"arena-battle" trace with an arena_rating score per prompt variant (file name
+or name@vN of a Langfuse prompt), so versions can be compared across runs.
+
+Run:
+  python eval/deepeval/arena_battle.py eval/prompt.txt prompts/strict.txt
+  python eval/deepeval/arena_battle.py langfuse:veeds-proofreader@3 langfuse:veeds-proofreader@4 --cases 40
+  python eval/deepeval/arena_battle.py eval/prompt.txt prompts/strict.txt --no-langfuse
+"""
+import argparse
+import asyncio
+import json
 import os
-import pytest
-from deepeval.test_case import LLMTestCase
-from deepeval.metrics import AnswerRelevancyMetric
-from deepeval import assert_test
-from bedrock_model import BedrockClaude
-from langfuse.deepeval import LangfuseCallbackHandler
-
-# Model for generation and judging
-model = BedrockClaude()
-langfuse_handler = LangfuseCallbackHandler()
-
-def run_arena_battle():
-    # TEST CASE: A complex vehicle YAML entry
-    input_yaml = """
-    components:
-      - id: 1
-        materialNumber: XYZ-99
-        description: Dangerous material without proper padding
-        unit: unknown
-    """
-    
-    # PROMPT A: Concise and strict
-    prompt_a = "Proofread this YAML. Check materialNumber (XXX-12345) and unit (mm, kg, m)."
-    # PROMPT B: Detailed and helpful
-    prompt_b = "You are a professional auditor. Check if materialNumber matches [A-Z]{3}-\\d{5}. Suggest correct units."
-
-    # MOCK OUTPUTS (In a real scenario, you would call the LLM twice here)
-    # Output A (Failed to catch XYZ-99 correctly)
-    output_a = "Valid: true\nErrors: 0"
-    
-    # Output B (Caught the error)
-    output_b = "Valid: false\nErrors: 1\nReason: materialNumber XYZ-99 is invalid."
-
-    context = ["Standard format is [A-Z]{3}-\\d{5}.", "Valid units are mm, kg, m."]
-
-    # METRIC: Which answer is more relevant to the input problem?
-    metric = AnswerRelevancyMetric(threshold=0.7, model=model)
-
-    # Test Case A (Prompt A)
-    case_a = LLMTestCase(
-        input=input_yaml,
-        actual_output=output_a,
-        retrieval_context=context,
-        name="Prompt-A-Concise"
-    )
 
-    # Test Case B (Prompt B)
-    case_b = LLMTestCase(
-        input=input_yaml,
-        actual_output=output_b,
-        retrieval_context=context,
-        name="Prompt-B-Detailed"
+from golden_suite import DATASET_PATH, iter_golden_cases
+from tournament import CASES_PER_ROUND, MIN_GAMES, Tournament, load_variants
+
+REPORT_PATH = os.getenv("ARENA_REPORT_PATH", "eval/results/arena-report.json")
+
+
+def report_to_langfuse(report: dict, cases: int):
+    """One arena-battle trace, scored with the Bradley-Terry rating of every prompt variant."""
+    from langfuse import Langfuse
+
+    langfuse = Langfuse()
+    summary = {key: value for key, value in report.items() if key != "standings"}
+    with langfuse.start_as_current_observation(name="arena-battle", input={"cases": cases},
+                                               output=report["standings"], metadata=summary):
+        for row in report["standings"]:
+            langfuse.score_current_trace(
+                name="arena_rating",
+                value=row["rating"],
+                comment=f"{row['prompt']}: {row['wins']}W/{row['losses']}L/{row['ties']}T",
+                metadata={"prompt": row["prompt"], "games": row["games"],
+                          "dropped_in_round": row["dropped_in_round"]},
+            )
+    langfuse.flush()
+    print(f"   Langfuse: {len(report['standings'])} arena_rating scores reported")
+
+
+def run_arena_battle(prompts, cases: int = 0, cases_per_round: int = CASES_PER_ROUND,
+                     min_games: int = MIN_GAMES, max_rounds: int = None, report_path: str = REPORT_PATH,
+                     langfuse: bool = True) -> dict:
+    golden = list(iter_golden_cases(DATASET_PATH))
+    if cases:
+        golden = golden[:cases]
+
+    # Model for generation and judging; boto3/deepeval are only imported when a battle runs
+    from bedrock_model import BedrockClaude
+
+    model = BedrockClaude()
+    tournament = Tournament(
+        load_variants(prompts), golden, generator=model, judge=model,
+        cases_per_round=cases_per_round, min_games=min_games, max_rounds=max_rounds,
     )
 
-    print("\n⚔️ Starting Arena Battle: Prompt A vs Prompt B...")
-    
-    # Test both in one run
-    # Langfuse will automatically group these and you can see which score is higher
-    assert_test(case_a, [metric], callbacks=[langfuse_handler])
-    assert_test(case_b, [metric], callbacks=[langfuse_handler])
+    print(f"\n⚔️ Starting Arena Battle: {len(tournament.variants)} prompts × {len(golden)} cases...")
+    report = asyncio.run(tournament.run())
+
+    for place, row in enumerate(report["standings"], 1):
+        dropped = f"  (dropped in round {row['dropped_in_round']})" if row["dropped_in_round"] else ""
+        print(f"   {place:>2}. {row['prompt']:<30} {row['rating']:>7.1f}  "
+              f"{row['wins']}W/{row['losses']}L/{row['ties']}T{dropped}")
+    print(f"   Judge calls: {report['judge_calls']} (round robin: {report['round_robin_judge_calls']}), "
+          f"rounds: {report['rounds']}")
+
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if langfuse and os.getenv("LANGFUSE_PUBLIC_KEY"):
+        report_to_langfuse(report, len(golden))
+    return report
+
 
 if __name__ == "__main__":
-    run_arena_battle()
+    parser = argparse.ArgumentParser(description="Prompt tournament on the golden dataset")
+    parser.add_argument("prompts", nargs="+", help="Prompt files or langfuse:<name>@<version>")
+    parser.add_argument("--cases", type=int, default=0, help="Only use the first N golden cases")
+    parser.add_argument("--cases-per-round", type=int, default=CASES_PER_ROUND)
+    parser.add_argument("--min-games", type=int, default=MIN_GAMES,
+                        help="Head-to-head games against the leader before a prompt can be dropped")
+    parser.add_argument("--max-rounds", type=int, default=None)
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--no-langfuse", action="store_true", help="Do not report the standings to Langfuse")
+    args = parser.parse_args()
+
+    run_arena_battle(args.prompts, args.cases, args.cases_per_round, args.min_games, args.max_rounds, args.report,
+                     langfuse=not args.no_langfuse)
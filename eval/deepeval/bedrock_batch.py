@@ -0,0 +1,328 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import boto3
+from opentelemetry import trace
+
+from bedrock_model import BedrockClaude, ResponseCache, response_text
+
+# =============================================================================
+# Bedrock Batch Inference
+# =============================================================================
+# BatchBedrockClaude is a drop-in BedrockClaude whose a_generate() calls are
+# not sent one by one: they are collected for a short window, written as one
+# JSONL job file ({"recordId", "modelInput"} per line), submitted as a Bedrock
+# batch inference job (S3 in/out, half the on-demand price) and polled until
+# the job finishes. Each waiting caller - a proofreader call or a deepeval
+# judge step of a golden case - gets its record's answer back.
+#
+# Answers go through the same ResponseCache as online calls, so cached
+# prompts never enter a job, and identical prompts in one window share a
+# record. Windows with fewer than BEDROCK_BATCH_MIN_RECORDS requests (Bedrock
+# rejects small jobs) run as normal on-demand calls.
+#
+# LocalBatchRunner is an offline stand-in for the Bedrock job API: it processes
+# the job file in a thread and writes the same .jsonl.out records.
+# =============================================================================
+
+# off | bedrock (S3 + create_model_invocation_job) | local (LocalBatchRunner)
+BATCH_MODE = os.getenv("BEDROCK_BATCH_MODE", "off").lower()
+# Bedrock mode: job files go to <uri>input/, results come back under <uri>output/
+BATCH_S3_URI = os.getenv("BEDROCK_BATCH_S3_URI", "")
+BATCH_ROLE_ARN = os.getenv("BEDROCK_BATCH_ROLE_ARN", "")
+BATCH_DIR = os.getenv("BEDROCK_BATCH_DIR", ".cache/bedrock-batch")
+# Requests are collected for this long after the first one of a window
+BATCH_WINDOW_SECONDS = float(os.getenv("BEDROCK_BATCH_WINDOW_S", "5"))
+BATCH_POLL_SECONDS = float(os.getenv("BEDROCK_BATCH_POLL_S", "30"))
+BATCH_MIN_RECORDS = int(os.getenv("BEDROCK_BATCH_MIN_RECORDS", "100"))
+BATCH_MAX_RECORDS = int(os.getenv("BEDROCK_BATCH_MAX_RECORDS", "50000"))
+
+# Job states (get_model_invocation_job); records of partially completed jobs are still used
+FINISHED = {"Completed", "PartiallyCompleted"}
+TERMINAL = FINISHED | {"Failed", "Stopped", "Expired"}
+
+tracer = trace.get_tracer(__name__)
+
+
+class BatchJobError(RuntimeError):
+    pass
+
+
+class BedrockBatchRunner:
+    """Bedrock batch inference jobs: job file to S3, create_model_invocation_job, results from S3."""
+
+    def __init__(self, s3_uri: str = BATCH_S3_URI, role_arn: str = BATCH_ROLE_ARN, region: str = None):
+        if not s3_uri.startswith("s3://") or not role_arn:
+            raise ValueError("Bedrock batch mode needs BEDROCK_BATCH_S3_URI (s3://bucket/prefix/) and "
+                             "BEDROCK_BATCH_ROLE_ARN")
+        self.bucket, _, prefix = s3_uri[len("s3://"):].partition("/")
+        self.prefix = prefix.rstrip("/") + "/" if prefix else ""
+        self.role_arn = role_arn
+        region = region or os.getenv("AWS_REGION", "eu-central-1")
+        self.bedrock = boto3.client("bedrock", region_name=region)
+        self.s3 = boto3.client("s3", region_name=region)
+        # job ARN -> input file name (Bedrock names the output "<input name>.out")
+        self._inputs: Dict[str, str] = {}
+
+    def submit(self, input_path: str, model_id: str) -> str:
+        name = os.path.basename(input_path)
+        self.s3.upload_file(input_path, self.bucket, f"{self.prefix}input/{name}")
+        response = self.bedrock.create_model_invocation_job(
+            jobName=re.sub(r"[^a-zA-Z0-9-]", "-", os.path.splitext(name)[0])[:63],
+            roleArn=self.role_arn,
+            modelId=model_id,
+            inputDataConfig={"s3InputDataConfig": {
+                "s3Uri": f"s3://{self.bucket}/{self.prefix}input/{name}", "s3InputFormat": "JSONL"}},
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{self.bucket}/{self.prefix}output/"}},
+        )
+        job = response["jobArn"]
+        self._inputs[job] = name
+        return job
+
+    def status(self, job: str) -> Tuple[str, str]:
+        response = self.bedrock.get_model_invocation_job(jobIdentifier=job)
+        return response["status"], response.get("message", "")
+
+    def results(self, job: str) -> Iterator[dict]:
+        job_id = job.rsplit("/", 1)[-1]
+        key = f"{self.prefix}output/{job_id}/{self._inputs[job]}.out"
+        body = self.s3.get_object(Bucket=self.bucket, Key=key)["Body"]
+        for line in body.iter_lines():
+            if line.strip():
+                yield json.loads(line)
+
+
+class LocalBatchRunner:
+    """
+    Offline stand-in for the Bedrock job API. processor(model_id, model_input) returns the
+    Anthropic response body of one record (or raises, which becomes the record's error).
+    """
+
+    def __init__(self, processor: Callable[[str, dict], dict], workdir: str = BATCH_DIR):
+        self.processor = processor
+        self.workdir = workdir
+        self._jobs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, input_path: str, model_id: str) -> str:
+        job = uuid.uuid4().hex[:12]
+        output_path = os.path.join(self.workdir, "output", job, os.path.basename(input_path) + ".out")
+        with self._lock:
+            self._jobs[job] = {"status": "Submitted", "message": "", "output": output_path}
+        threading.Thread(target=self._process, args=(job, input_path, model_id), daemon=True).start()
+        return job
+
+    def _set(self, job: str, status: str, message: str = ""):
+        with self._lock:
+            self._jobs[job].update(status=status, message=message)
+
+    def _process(self, job: str, input_path: str, model_id: str):
+        self._set(job, "InProgress")
+        output_path = self._jobs[job]["output"]
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        failed = 0
+        try:
+            with open(input_path, "r", encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as out:
+                for line in src:
+                    record = json.loads(line)
+                    try:
+                        record["modelOutput"] = self.processor(model_id, record["modelInput"])
+                    except Exception as e:
+                        failed += 1
+                        record["error"] = {"errorCode": 400, "errorMessage": f"{type(e).__name__}: {e}"}
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            self._set(job, "Failed", f"{type(e).__name__}: {e}")
+            return
+        self._set(job, "PartiallyCompleted" if failed else "Completed")
+
+    def status(self, job: str) -> Tuple[str, str]:
+        with self._lock:
+            return self._jobs[job]["status"], self._jobs[job]["message"]
+
+    def results(self, job: str) -> Iterator[dict]:
+        with open(self._jobs[job]["output"], "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def invoke_processor(client) -> Callable[[str, dict], dict]:
+    """LocalBatchRunner processor that answers each record with invoke_model (real or fake endpoint)."""
+
+    def process(model_id: str, model_input: dict) -> dict:
+        response = client.invoke_model(body=json.dumps(model_input), modelId=model_id)
+        return json.loads(response.get("body").read())
+
+    return process
+
+
+class BatchBedrockClaude(BedrockClaude):
+    """Batches a_generate()/a_generate_structured(); the blocking generate() stays on-demand."""
+
+    def __init__(
+        self,
+        *args,
+        runner=None,
+        window_seconds: float = BATCH_WINDOW_SECONDS,
+        poll_seconds: float = BATCH_POLL_SECONDS,
+        min_records: int = BATCH_MIN_RECORDS,
+        max_records: int = BATCH_MAX_RECORDS,
+        job_dir: str = BATCH_DIR,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        # Local mode sends the records through this model's own client (BEDROCK_ENDPOINT_URL)
+        self.runner = runner or (LocalBatchRunner(invoke_processor(self.client), job_dir) if BATCH_MODE == "local"
+                                 else BedrockBatchRunner())
+        self.window_seconds = window_seconds
+        self.poll_seconds = poll_seconds
+        self.min_records = min_records
+        self.max_records = max_records
+        self.job_dir = job_dir
+        self.batch_stats = {"jobs": 0, "records": 0, "deduplicated": 0, "on_demand": 0, "failed_records": 0}
+        # cache key -> (request body, waiting futures) of the current window
+        self._pending: Dict[str, Tuple[str, List[asyncio.Future]]] = {}
+        self._flush_handle = None
+        self._jobs = set()
+
+    async def a_generate(self, prompt: str) -> str:
+        return await self._enqueue(self._build_body(prompt))
+
+    async def a_generate_structured(self, prompt: str, tool: dict) -> dict:
+        return json.loads(await self._enqueue(self._build_body(prompt, tool)))
+
+    async def _enqueue(self, body: str) -> str:
+        key = ResponseCache.key(self.model_id, body)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if key in self._pending:
+            self._pending[key][1].append(future)
+            self.batch_stats["deduplicated"] += 1
+        else:
+            self._pending[key] = (body, [future])
+        if len(self._pending) >= self.max_records:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_seconds, self.flush)
+        return await future
+
+    def flush(self):
+        """Sends the requests collected so far (called by the window timer or when a job is full)."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        records, self._pending = self._pending, {}
+        task = asyncio.get_running_loop().create_task(self._run(records))
+        # Keep a reference until the job is done, the event loop only holds weak ones
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    async def _run(self, records: Dict[str, Tuple[str, List[asyncio.Future]]]):
+        if len(records) < self.min_records:
+            self.batch_stats["on_demand"] += len(records)
+            await asyncio.gather(*(self._run_on_demand(body, futures) for body, futures in records.values()))
+            return
+        try:
+            await self._run_job(records)
+        except Exception as e:
+            for _, futures in records.values():
+                resolve(futures, error=e)
+
+    async def _run_on_demand(self, body: str, futures: List[asyncio.Future]):
+        async with self._semaphore():
+            loop = asyncio.get_running_loop()
+            try:
+                resolve(futures, await loop.run_in_executor(self._executor, self._generate, body))
+            except Exception as e:
+                resolve(futures, error=e)
+
+    def _write_job_file(self, records: Dict[str, Tuple[str, List[asyncio.Future]]]) -> Tuple[str, Dict[str, str]]:
+        """Writes the job file; returns its path and recordId -> cache key."""
+        os.makedirs(os.path.join(self.job_dir, "input"), exist_ok=True)
+        name = f"batch-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl"
+        path = os.path.join(self.job_dir, "input", name)
+        record_ids = {}
+        with open(path, "w", encoding="utf-8") as f:
+            for i, (key, (body, _)) in enumerate(records.items()):
+                # Bedrock's own record id format: 11 alphanumeric characters
+                record_id = f"REC{i:08d}"
+                record_ids[record_id] = key
+                f.write(json.dumps({"recordId": record_id, "modelInput": json.loads(body)}, ensure_ascii=False) + "\n")
+        return path, record_ids
+
+    async def _run_job(self, records: Dict[str, Tuple[str, List[asyncio.Future]]]):
+        loop = asyncio.get_running_loop()
+        with tracer.start_as_current_span("bedrock.batch_job") as span:
+            span.set_attribute("gen_ai.system", "aws.bedrock")
+            span.set_attribute("gen_ai.request.model", self.model_id)
+            span.set_attribute("bedrock.batch.records", len(records))
+            start = time.perf_counter()
+
+            path, record_ids = await loop.run_in_executor(self._executor, self._write_job_file, records)
+            job = await loop.run_in_executor(self._executor, self.runner.submit, path, self.model_id)
+            span.set_attribute("bedrock.batch.job", job)
+            self.batch_stats["jobs"] += 1
+            self.batch_stats["records"] += len(records)
+
+            while True:
+                status, message = await loop.run_in_executor(self._executor, self.runner.status, job)
+                if status in TERMINAL:
+                    break
+                await asyncio.sleep(self.poll_seconds)
+            span.set_attribute("bedrock.batch.status", status)
+            if status not in FINISHED:
+                raise BatchJobError(f"batch job {job} ended {status}: {message}")
+
+            results = await loop.run_in_executor(self._executor, lambda: list(self.runner.results(job)))
+            input_tokens = output_tokens = 0
+            for result in results:
+                entry = records.pop(record_ids.get(result.get("recordId")), None)
+                if entry is None:
+                    continue
+                body, futures = entry
+                output = result.get("modelOutput")
+                if not output:
+                    self.batch_stats["failed_records"] += 1
+                    resolve(futures, error=BatchJobError(f"batch record failed: {result.get('error')}"))
+                    continue
+                text = response_text(output)
+                usage = output.get("usage") or {}
+                input_tokens += usage.get("input_tokens") or 0
+                output_tokens += usage.get("output_tokens") or 0
+                if self.cache is not None:
+                    self.cache.put(ResponseCache.key(self.model_id, body), self.model_id, text)
+                resolve(futures, text)
+
+            # Records the job output does not mention at all
+            self.batch_stats["failed_records"] += len(records)
+            for _, futures in records.values():
+                resolve(futures, error=BatchJobError(f"batch job {job} returned no result for the record"))
+
+            span.set_attribute("bedrock.batch.duration_s", time.perf_counter() - start)
+            span.set_attribute("gen_ai.usage.input_tokens", input_tokens)
+            span.set_attribute("gen_ai.usage.output_tokens", output_tokens)
+
+
+def resolve(futures: List[asyncio.Future], result: Optional[str] = None, error: Optional[Exception] = None):
+    for future in futures:
+        # A waiter may have been cancelled (e.g. a case timed out) while the job ran
+        if future.done():
+            continue
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
@@ -1,24 +1,191 @@
+import asyncio
 import boto3
+import contextvars
+import hashlib
 import json
 import os
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+from botocore.config import Config
 from deepeval.models.base_model import DeepEvalBaseLLM
 from dotenv import load_dotenv
+from opentelemetry import metrics, trace
 
 load_dotenv()
 
+# Max. concurrent Bedrock calls per model instance (judge runs fan out via a_generate)
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("BEDROCK_MAX_IN_FLIGHT", "8"))
+# Attempts incl. the first call; botocore's adaptive mode backs off and rate-limits on throttling
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "8"))
+
+# Judge calls run at temperature 0, so identical requests can be answered from disk.
+# BEDROCK_CACHE: "readwrite" (default), "readonly" (CI: use hits, never write) or "off"
+CACHE_MODE = os.getenv("BEDROCK_CACHE", "readwrite").lower()
+CACHE_PATH = os.getenv("BEDROCK_CACHE_PATH", ".cache/bedrock-responses.sqlite")
+CACHE_TTL_SECONDS = float(os.getenv("BEDROCK_CACHE_TTL_DAYS", "30")) * 86400
+CACHE_MAX_ENTRIES = int(os.getenv("BEDROCK_CACHE_MAX_ENTRIES", "50000"))
+# TTL/size eviction is checked every N writes
+CACHE_EVICTION_INTERVAL = 100
+
+# Streaming (invoke_model_with_response_stream) gives us time-to-first-token
+STREAMING = os.getenv("BEDROCK_STREAMING", "false").lower() in ("1", "true", "yes")
+
+# OpenTelemetry instruments (no-ops until a provider is configured, e.g. in test_proofreader.py).
+# Every data point carries gen_ai.request.model, so SLO dashboards can slice per model id.
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+latency_histogram = meter.create_histogram(
+    "gen_ai.client.operation.duration", unit="s", description="Total Bedrock call latency"
+)
+ttft_histogram = meter.create_histogram(
+    "gen_ai.server.time_to_first_token", unit="s", description="Time to first streamed token"
+)
+token_histogram = meter.create_histogram(
+    "gen_ai.client.token.usage", unit="{token}", description="Input/output tokens per call"
+)
+throughput_histogram = meter.create_histogram(
+    "gen_ai.client.output_tokens_per_second", unit="{token}/s", description="Output token throughput"
+)
+
+
+def response_text(response_body: dict) -> str:
+    """Answer text of an Anthropic messages response; for a forced tool call the tool input as JSON."""
+    for block in response_body.get("content"):
+        if block.get("type") == "tool_use":
+            return json.dumps(block.get("input"))
+    return response_body.get("content")[0].get("text")
+
+
+class ResponseCache:
+    """Content-addressed SQLite cache: sha256(model_id, request body) -> response text."""
+
+    def __init__(self, path=CACHE_PATH, readonly=False, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.readonly = readonly
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        if readonly:
+            # A missing cache file in CI simply means "no hits"
+            self._conn = None
+            if os.path.exists(path):
+                self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model_id TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+        """)
+
+    @staticmethod
+    def key(model_id: str, body: str) -> str:
+        return hashlib.sha256(f"{model_id}\n{body}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        if self._conn is None:
+            self.stats["misses"] += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] > self.ttl_seconds:
+                self.stats["expired"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            if not self.readonly:
+                with self._conn:
+                    self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key: str, model_id: str, response: str):
+        if self.readonly:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model_id, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model_id, response, now, now),
+            )
+            self.stats["writes"] += 1
+            if self.stats["writes"] % CACHE_EVICTION_INTERVAL == 1:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        expired = self._conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = max(0, count - self.max_entries)
+        if overflow:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+        self.stats["evictions"] += expired + overflow
+
+
 class BedrockClaude(DeepEvalBaseLLM):
-    def __init__(self, model_id="anthropic.claude-3-5-sonnet-20240620-v1:0"):
+    def __init__(
+        self,
+        model_id="anthropic.claude-3-5-sonnet-20240620-v1:0",
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        endpoint_url: str = None,
+        cache_mode: str = CACHE_MODE,
+        cache_path: str = CACHE_PATH,
+        streaming: bool = STREAMING,
+    ):
         self.model_id = model_id
+        self.max_in_flight = max_in_flight
+        self.streaming = streaming
+        # Metrics of the most recent network call (ttft, latency, tokens, throughput)
+        self.last_call = {}
+        self.network_calls = 0
+        self._calls_lock = threading.Lock()
+        self.cache = None if cache_mode == "off" else ResponseCache(cache_path, readonly=cache_mode == "readonly")
         self.client = boto3.client(
             service_name="bedrock-runtime",
-            region_name=os.getenv("AWS_REGION", "eu-central-1")
+            region_name=os.getenv("AWS_REGION", "eu-central-1"),
+            endpoint_url=endpoint_url or os.getenv("BEDROCK_ENDPOINT_URL"),
+            config=Config(
+                # One pooled connection per in-flight request, no waiting on the pool
+                max_pool_connections=max_in_flight,
+                retries={"mode": "adaptive", "max_attempts": max_attempts},
+                read_timeout=120,
+            ),
         )
+        # boto3 is blocking: a_generate runs calls on this pool, bounded per event loop
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="bedrock")
+        self._semaphores = weakref.WeakKeyDictionary()
 
     def load_model(self):
         return self.client
 
-    def generate(self, prompt: str) -> str:
-        body = json.dumps({
+    def _build_body(self, prompt: str, tool: dict = None) -> str:
+        body = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 1024,
             "messages": [
@@ -28,18 +195,172 @@ class BedrockClaude(DeepEvalBaseLLM):
                 }
             ],
             "temperature": 0
-        })
+        }
+        if tool is not None:
+            # Forced tool use: the answer is the tool input, validated against its JSON schema
+            body["tools"] = [tool]
+            body["tool_choice"] = {"type": "tool", "name": tool["name"]}
+        return json.dumps(body)
+
+    def generate(self, prompt: str) -> str:
+        return self._generate(self._build_body(prompt))
+
+    def generate_structured(self, prompt: str, tool: dict) -> dict:
+        """Structured output: forces a call of `tool` ({name, description, input_schema}) and returns its input."""
+        return json.loads(self._generate(self._build_body(prompt, tool)))
+
+    def _generate(self, body: str) -> str:
+        with tracer.start_as_current_span("bedrock.generate") as span:
+            span.set_attribute("gen_ai.system", "aws.bedrock")
+            span.set_attribute("gen_ai.request.model", self.model_id)
+            span.set_attribute("bedrock.streaming", self.streaming)
+
+            cache_key = None
+            if self.cache is not None:
+                cache_key = ResponseCache.key(self.model_id, body)
+                cached = self.cache.get(cache_key)
+                span.set_attribute("bedrock.cache_hit", cached is not None)
+                if cached is not None:
+                    return cached
 
+            with self._calls_lock:
+                self.network_calls += 1
+
+            if self.streaming:
+                text = "".join(self._stream_body(body, span))
+            else:
+                text = self._invoke_body(body, span)
+
+            if cache_key is not None:
+                self.cache.put(cache_key, self.model_id, text)
+            return text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yields text deltas as they arrive (no cache), with the same metrics as generate()."""
+        with tracer.start_as_current_span("bedrock.stream") as span:
+            span.set_attribute("gen_ai.system", "aws.bedrock")
+            span.set_attribute("gen_ai.request.model", self.model_id)
+            span.set_attribute("bedrock.streaming", True)
+            with self._calls_lock:
+                self.network_calls += 1
+            yield from self._stream_body(self._build_body(prompt), span)
+
+    def _invoke_body(self, body: str, span) -> str:
+        start = time.perf_counter()
         response = self.client.invoke_model(
             body=body,
             modelId=self.model_id
         )
 
         response_body = json.loads(response.get("body").read())
-        return response_body.get("content")[0].get("text")
+        usage = response_body.get("usage") or {}
+        self._record_call(
+            span,
+            latency=time.perf_counter() - start,
+            ttft=None,
+            input_tokens=usage.get("input_tokens"),
+            output_tokens=usage.get("output_tokens"),
+        )
+        return response_text(response_body)
+
+    def _stream_body(self, body: str, span) -> Iterator[str]:
+        start = time.perf_counter()
+        ttft = None
+        input_tokens = output_tokens = None
+
+        response = self.client.invoke_model_with_response_stream(
+            body=body,
+            modelId=self.model_id
+        )
+        for event in response.get("body"):
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            payload = json.loads(chunk["bytes"])
+            event_type = payload.get("type")
+
+            if event_type == "message_start":
+                input_tokens = payload.get("message", {}).get("usage", {}).get("input_tokens")
+            elif event_type == "content_block_delta":
+                # Text deltas, or the JSON input of a forced tool call in pieces
+                delta = payload.get("delta", {})
+                text = delta.get("text") or delta.get("partial_json")
+                if text:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    yield text
+            elif event_type == "message_delta":
+                output_tokens = payload.get("usage", {}).get("output_tokens", output_tokens)
+
+        self._record_call(
+            span,
+            latency=time.perf_counter() - start,
+            ttft=ttft,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+        )
+
+    def _record_call(self, span, latency: float, ttft, input_tokens, output_tokens):
+        attributes = {"gen_ai.system": "aws.bedrock", "gen_ai.request.model": self.model_id}
+
+        # Decode throughput: tokens after the first one arrived (whole call for blocking mode)
+        generation_time = latency - ttft if ttft is not None and latency > ttft else latency
+        throughput = output_tokens / generation_time if output_tokens and generation_time > 0 else None
+
+        call = {
+            "latency_s": latency,
+            "ttft_s": ttft,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "output_tokens_per_second": throughput,
+        }
+        self.last_call = call
+
+        latency_histogram.record(latency, attributes)
+        if ttft is not None:
+            ttft_histogram.record(ttft, attributes)
+        if input_tokens is not None:
+            token_histogram.record(input_tokens, {**attributes, "gen_ai.token.type": "input"})
+        if output_tokens is not None:
+            token_histogram.record(output_tokens, {**attributes, "gen_ai.token.type": "output"})
+        if throughput is not None:
+            throughput_histogram.record(throughput, attributes)
+
+        for name, value in call.items():
+            if value is not None:
+                span.set_attribute(f"bedrock.{name}", value)
+        if input_tokens is not None:
+            span.set_attribute("gen_ai.usage.input_tokens", input_tokens)
+        if output_tokens is not None:
+            span.set_attribute("gen_ai.usage.output_tokens", output_tokens)
+
+    def cache_stats(self) -> dict:
+        stats = dict(self.cache.stats) if self.cache is not None else {}
+        stats["network_calls"] = self.network_calls
+        return stats
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._semaphores[loop] = semaphore
+        return semaphore
 
     async def a_generate(self, prompt: str) -> str:
-        return self.generate(prompt)
+        async with self._semaphore():
+            return await self._run_in_executor(self.generate, prompt)
+
+    async def a_generate_structured(self, prompt: str, tool: dict) -> dict:
+        async with self._semaphore():
+            return await self._run_in_executor(self.generate_structured, prompt, tool)
+
+    async def _run_in_executor(self, func, *args):
+        # Like asyncio.to_thread, but on the model's own pool: the call sees the caller's
+        # contextvars (active OTel span, Langfuse observation), so its span nests under them
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, context.run, func, *args)
 
     def get_model_name(self):
         return self.model_id
@@ -0,0 +1,129 @@
+"""
+Benchmark: golden_store (JSONL + mmap + offset index) vs. plain json.load.
+
+Builds synthetic golden datasets by repeating the cases of
+eval/golden_dataset.json, then measures each access pattern in a fresh
+subprocess: peak RSS (VmHWM) above the import baseline, peak Python heap
+(tracemalloc) and wall time (tracemalloc slows json.load down noticeably).
+The JSON -> JSONL conversion runs the same way, so its peak memory shows that
+it streams the file instead of reading it whole.
+Pages of the mmap-ed JSONL count towards RSS while touched, but they are
+file-backed page cache the kernel can drop at any time; the heap column shows
+what the decoded cases really cost.
+
+Run: python eval/deepeval/bench_golden_store.py [--sizes 10000,1000000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import golden_store  # noqa: E402
+
+CONVERT = """
+golden_store.convert(path, jsonl)
+with golden_store.GoldenStore(jsonl) as store:
+    n = len(store)
+"""
+
+SCENARIOS = {
+    "json.load + iterate": """
+with open(path, "r", encoding="utf-8") as f:
+    cases = json.load(f)["testCases"]
+n = sum(1 for case in cases if case["input"])
+""",
+    "store: iterate all": """
+with golden_store.GoldenStore(jsonl) as store:
+    n = sum(1 for case in store if case["input"])
+""",
+    "store: category view": """
+with golden_store.GoldenStore(jsonl) as store:
+    n = sum(1 for case in store.view("edge_case"))
+""",
+    "store: shard 1/8": """
+with golden_store.GoldenStore(jsonl) as store:
+    n = sum(1 for case in store.view(shard=(1, 8)))
+""",
+    "store: 1000 id lookups": """
+with golden_store.GoldenStore(jsonl) as store:
+    step = max(1, len(store) // 1000)
+    n = sum(store.get(f"case-{i:07d}") is not None for i in range(0, len(store), step))
+""",
+}
+
+# VmHWM instead of ru_maxrss: the latter keeps the parent's peak across fork/exec
+RUNNER = """
+import json, sys, time, tracemalloc
+sys.path.insert(0, {here!r})
+import golden_store
+
+def hwm_kb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+
+path, jsonl = {path!r}, {jsonl!r}
+base = hwm_kb()
+tracemalloc.start()
+start = time.perf_counter()
+{body}
+seconds = time.perf_counter() - start
+heap = tracemalloc.get_traced_memory()[1]
+print(json.dumps({{"seconds": seconds, "peak_mb": (hwm_kb() - base) / 1024, "heap_mb": heap / 2**20, "n": n}}))
+"""
+
+
+def write_dataset(path: str, size: int):
+    """Streams a golden_dataset.json-shaped file of `size` cases."""
+    with open(golden_store.DATASET_PATH, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    template = dataset.pop("testCases")
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(json.dumps(dataset, ensure_ascii=False)[:-1] + ', "testCases": [\n')
+        for i in range(size):
+            case = dict(template[i % len(template)], id=f"case-{i:07d}")
+            out.write(("," if i else "") + json.dumps(case, ensure_ascii=False) + "\n")
+        out.write("]}\n")
+
+
+def run(body: str, path: str, jsonl: str) -> dict:
+    code = RUNNER.format(here=HERE, path=path, jsonl=jsonl, body=body)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,1000000")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            path = os.path.join(tmp, f"golden-{size}.json")
+            jsonl = os.path.join(tmp, f"golden-{size}.jsonl")
+            write_dataset(path, size)
+
+            converted = run(CONVERT, path, jsonl)
+            results.append({"cases": size, "scenario": "convert", **converted})
+            print(f"\n📦 {size:,} cases: JSON {os.path.getsize(path) / 2**20:.0f} MB, "
+                  f"JSONL {os.path.getsize(jsonl) / 2**20:.0f} MB, "
+                  f"index {os.path.getsize(jsonl + '.idx.npz') / 2**20:.1f} MB")
+            print(f"   {'convert':<24} RSS +{converted['peak_mb']:8.1f} MB  heap {converted['heap_mb']:8.1f} MB  "
+                  f"{converted['seconds']:7.2f}s  ({converted['n']} cases)")
+
+            for name, body in SCENARIOS.items():
+                result = run(body, path, jsonl)
+                results.append({"cases": size, "scenario": name, **result})
+                print(f"   {name:<24} RSS +{result['peak_mb']:8.1f} MB  heap {result['heap_mb']:8.1f} MB  "
+                      f"{result['seconds']:7.2f}s  ({result['n']} cases)")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
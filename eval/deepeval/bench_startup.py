@@ -0,0 +1,85 @@
+"""
+Benchmark: import and pytest collection time of eval/deepeval.
+
+Every scenario runs in a fresh interpreter (median of --runs, after one
+warm-up run that also builds the golden store index). With --against REV the
+same scenarios run on eval/deepeval as of that git revision, exported to a
+temporary directory, to compare before/after.
+
+The deepeval pytest plugin imports all of deepeval at pytest startup, no
+matter what is collected; the "-p no:deepeval" scenario shows what the
+test modules themselves cost.
+
+Run: python eval/deepeval/bench_startup.py [--against HEAD~1] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+EXPORT_PATHS = ["eval/deepeval", "eval/golden_dataset.json", "eval/prompt.txt"]
+
+SCENARIOS = {
+    "import test_proofreader": [sys.executable, "-c", "import sys; sys.path.insert(0, 'eval/deepeval'); import test_proofreader"],
+    "import arena_battle": [sys.executable, "-c", "import sys; sys.path.insert(0, 'eval/deepeval'); import arena_battle"],
+    "pytest --collect-only -p no:deepeval": [sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:deepeval",
+                                             "eval/deepeval/test_proofreader.py"],
+    "pytest --collect-only": [sys.executable, "-m", "pytest", "--collect-only", "-q", "eval/deepeval/test_proofreader.py"],
+}
+
+
+def export_tree(rev: str, target: str):
+    archive = subprocess.run(["git", "archive", rev, *EXPORT_PATHS], cwd=REPO_ROOT, capture_output=True, check=True)
+    subprocess.run(["tar", "-x", "-C", target], input=archive.stdout, check=True)
+
+
+def time_scenario(command: list, cwd: str, runs: int) -> dict:
+    env = dict(os.environ)
+    # Old versions construct the clients at import time and need these to get that far
+    env.setdefault("OPENAI_API_KEY", "sk-bench")
+    env.setdefault("AWS_REGION", "eu-central-1")
+
+    samples = []
+    ok = True
+    for i in range(runs + 1):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=cwd, env=env, capture_output=True)
+        if i:
+            samples.append(time.perf_counter() - start)
+        ok = ok and result.returncode == 0
+    return {"median_s": round(statistics.median(samples), 3), "min_s": round(min(samples), 3), "ok": ok}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--against", help="git revision to compare with (e.g. HEAD~1)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    trees = {"working tree": REPO_ROOT}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.against:
+            export_tree(args.against, tmp)
+            trees = {args.against: tmp, **trees}
+
+        results = {label: {name: time_scenario(cmd, root, args.runs) for name, cmd in SCENARIOS.items()}
+                   for label, root in trees.items()}
+
+    print(f"\n🚀 Startup time (median of {args.runs} runs)")
+    print(f"   {'scenario':<38}" + "".join(f"{label:>16}" for label in results))
+    for name in SCENARIOS:
+        cells = []
+        for timings in results.values():
+            cell = f"{timings[name]['median_s']:.2f}s"
+            cells.append(f"{cell if timings[name]['ok'] else cell + ' (err)':>16}")
+        print(f"   {name:<38}" + "".join(cells))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
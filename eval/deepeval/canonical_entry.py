@@ -0,0 +1,157 @@
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+import yaml
+
+# =============================================================================
+# Canonical VEEDS Entries
+# =============================================================================
+# Many entries differ only in key order, quoting, whitespace or comments
+# (description: "" vs description: ''). canonical() composes an entry like the
+# `input` of a golden case into YAML's node tree and serializes the nodes with
+# sorted keys, so equivalent entries get the same text and entry_key() the
+# same hash.
+#
+# Scalars are compared by their text, not by the value YAML 1.1 resolves: the
+# proofreader reads `012345`, `1_000` and `yes` as written, so they stay apart
+# from `5349`, `1000` and `true`. Quoted and plain strings are equal
+# ('ABC-12345' vs ABC-12345); a plain scalar that resolves to another type
+# keeps its tag, so "12345" and 12345 stay different too. A flow document
+# ({"yamlEntry": ...}) and a block document with the same content are kept
+# apart as well. Entries with duplicate or non-string keys, unparseable YAML
+# and free text only lose line-end whitespace and surrounding blank lines.
+#
+# golden_suite.py uses the key to run equivalent cases through the proofreader
+# and the judge once, and to reuse proofreader answers across datasets.
+#
+# Run: python eval/deepeval/canonical_entry.py eval/golden_dataset.json debug-failing.yaml ...
+# =============================================================================
+
+STR_TAG = "tag:yaml.org,2002:str"
+
+
+class NotCanonical(ValueError):
+    """The entry has a shape canonical() does not normalize (duplicate or non-string keys, recursion)."""
+
+
+def _document_style(entry: str) -> str:
+    for line in entry.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            return "flow" if line[0] in "{[" else "block"
+    return "block"
+
+
+def _node_value(node: yaml.Node, parents: tuple = ()):
+    """
+    JSON-able form of a composed node. Every scalar becomes a string: "=text"
+    for strings (quoted or plain), "!tag:text" for plain scalars YAML resolves
+    to another type (int, bool, null, float, timestamp).
+    """
+    if isinstance(node, yaml.ScalarNode):
+        if node.style or node.tag == STR_TAG:
+            return "=" + node.value
+        return f"!{node.tag.rsplit(':', 1)[-1]}:{node.value}"
+    if id(node) in parents:
+        raise NotCanonical("recursive alias")
+    parents += (id(node),)
+    if isinstance(node, yaml.SequenceNode):
+        return [_node_value(item, parents) for item in node.value]
+    mapping = {}
+    for key_node, value_node in node.value:
+        key = _node_value(key_node, parents)
+        if not isinstance(key, str) or not key.startswith("=") or key in mapping:
+            # `unit: mm` twice is what the proofreader should see, not what it collapses to
+            raise NotCanonical(f"key {key!r}")
+        mapping[key] = _node_value(value_node, parents)
+    return mapping
+
+
+def canonical(entry: str) -> str:
+    try:
+        node = yaml.compose(entry, Loader=yaml.SafeLoader)
+        data = _node_value(node) if isinstance(node, (yaml.MappingNode, yaml.SequenceNode)) else None
+    except (yaml.YAMLError, NotCanonical):
+        data = None
+    if data is not None:
+        return f"{_document_style(entry)}:" + json.dumps(data, sort_keys=True, ensure_ascii=False,
+                                                          separators=(",", ":"))
+    return "text:" + "\n".join(line.rstrip() for line in entry.strip("\n").splitlines())
+
+
+def entry_key(entry: str) -> str:
+    return hashlib.sha256(canonical(entry).encode("utf-8")).hexdigest()[:16]
+
+
+# -----------------------------------------------------------------------------
+# Dedup report
+# -----------------------------------------------------------------------------
+
+def iter_entries(path: str) -> Iterator[Tuple[str, str]]:
+    """(id, entry) of a golden dataset (.json/.jsonl, `input`) or a promptfoo test file (vars.yaml_entry)."""
+    if path.endswith((".yaml", ".yml")):
+        with open(path, "r", encoding="utf-8") as f:
+            tests = yaml.safe_load(f) or []
+        if isinstance(tests, dict):
+            tests = tests.get("tests") or []
+        for i, test in enumerate(tests):
+            entry = ((test or {}).get("vars") or {}).get("yaml_entry") if isinstance(test, dict) else None
+            if isinstance(entry, str):
+                yield test.get("description") or f"test-{i}", entry
+        return
+
+    from golden_store import iter_cases
+
+    for case in iter_cases(path):
+        if isinstance(case.get("input"), str):
+            yield case["id"], case["input"]
+
+
+def dedup_report(datasets: Dict[str, List[Tuple[str, str]]]) -> List[dict]:
+    """
+    Per dataset: entries, distinct canonical entries, the share of entries that
+    need no own proofreader call (dedup_ratio) and how many distinct entries an
+    earlier dataset already covers (answers reusable from the cache).
+    """
+    seen = set()
+    rows = []
+    for name, entries in datasets.items():
+        keys = Counter(entry_key(entry) for _, entry in entries)
+        exact = len({entry for _, entry in entries})
+        rows.append({
+            "dataset": name,
+            "entries": len(entries),
+            "unique": len(keys),
+            # Distinct texts that only canonicalization merges
+            "canonical_only": exact - len(keys),
+            "dedup_ratio": round(1 - len(keys) / len(entries), 3) if entries else 0.0,
+            "shared_with_earlier": len(keys.keys() & seen),
+            "largest_group": max(keys.values(), default=0),
+        })
+        seen |= keys.keys()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dedup ratio of VEEDS entries per dataset (canonical keys)")
+    parser.add_argument("datasets", nargs="*", default=[os.getenv("GOLDEN_DATASET_PATH", "eval/golden_dataset.json")],
+                        help="golden datasets (.json/.jsonl) or promptfoo test files (.yaml)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    rows = dedup_report({path: list(iter_entries(path)) for path in args.datasets})
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for row in rows:
+        print(f"🔑 {row['dataset']}: {row['entries']} entries, {row['unique']} distinct "
+              f"(dedup ratio {row['dedup_ratio']:.1%}, {row['canonical_only']} only after canonicalization), "
+              f"{row['shared_with_earlier']} already in an earlier dataset")
+
+
+if __name__ == "__main__":
+    main()
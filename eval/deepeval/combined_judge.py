@@ -0,0 +1,288 @@
+import asyncio
+import copy
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+from deepeval.models.base_model import DeepEvalBaseLLM
+
+# =============================================================================
+# Combined Judge
+# =============================================================================
+# deepeval's FaithfulnessMetric (truths, claims, verdicts, reason) and
+# AnswerRelevancyMetric (statements, verdicts, reason) each run their own
+# chain of judge calls over the same input, output and retrieval context:
+# 7 round trips per golden case. The combined judge packs the rubrics of all
+# metrics of a case into one request and writes score, reason and success
+# back into the metric objects, so callers read them as after a_measure().
+#
+# On BedrockClaude the request is a forced tool call (structured output), on
+# any other deepeval model the JSON comes back as text. If the answer cannot
+# be parsed, the metrics run the regular per-metric way.
+#
+# Token counts are estimates (characters / 4 of prompt and response) for both
+# ways, so they stay comparable across cache hits and models without usage data.
+# =============================================================================
+
+# The first N cases with a combined result are also judged per metric to measure calls/tokens saved and
+# how often both ways agree on pass/fail (0 = estimate calls only, no tokens)
+CALIBRATION_CASES = int(os.getenv("DEEPEVAL_JUDGE_CALIBRATION", "2"))
+CHARS_PER_TOKEN = 4
+
+RUBRICS = {
+    "FaithfulnessMetric": (
+        "Extract the factual claims the actual output makes. A claim is unfaithful if it contradicts "
+        "the retrieval context; claims the context says nothing about are not unfaithful. "
+        "Score = faithful claims / all claims (1.0 if there are no claims)."
+    ),
+    "AnswerRelevancyMetric": (
+        "Split the actual output into statements. A statement is relevant if it addresses the input; "
+        "ambiguous statements that could support the answer count as relevant. "
+        "Score = relevant statements / all statements (1.0 if there are no statements)."
+    ),
+}
+
+# Judge calls deepeval makes per metric and case (the last one writes the reason); fewer
+# when nothing is extracted to give verdicts on
+PER_METRIC_CALLS = {"FaithfulnessMetric": 4, "AnswerRelevancyMetric": 3}
+
+TOOL_NAME = "record_metric_scores"
+
+# A combined answer that is not usable (unparseable, incomplete, empty content, tool input
+# of the wrong type) falls back to per-metric judging instead of erroring the case
+MALFORMED_ANSWER_ERRORS = (ValueError, TypeError, KeyError, IndexError, AttributeError)
+
+
+def metric_name(metric) -> str:
+    return metric.__class__.__name__
+
+
+def estimate_tokens(text) -> int:
+    if not isinstance(text, str):
+        # Native deepeval models answer with (schema object, cost)
+        text = text[0] if isinstance(text, tuple) else text
+        text = text.model_dump_json() if hasattr(text, "model_dump_json") else str(text)
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def per_metric_calls(metrics: list) -> int:
+    return sum(PER_METRIC_CALLS[metric_name(m)] - (not m.include_reason) for m in metrics)
+
+
+def build_prompt(test_case, metrics: list) -> str:
+    context = "\n".join(f"- {line}" for line in test_case.retrieval_context or [])
+    rubrics = "\n".join(f"- {metric_name(m)}: {RUBRICS[metric_name(m)]}" for m in metrics)
+    example = json.dumps({metric_name(m): {"score": 0.0, "reason": "..."} for m in metrics})
+    return (
+        "You are an evaluation judge. Grade the actual output below on every metric independently.\n\n"
+        f"Input:\n{test_case.input}\n\n"
+        f"Retrieval context:\n{context}\n\n"
+        f"Actual output:\n{test_case.actual_output}\n\n"
+        f"Metrics:\n{rubrics}\n\n"
+        "Give each metric a score between 0 and 1 and a one-sentence reason that names the claims or "
+        f"statements behind it. Answer with JSON only, in this form:\n{example}"
+    )
+
+
+def build_tool(metrics: list) -> dict:
+    entry = {
+        "type": "object",
+        "properties": {
+            "score": {"type": "number", "minimum": 0, "maximum": 1},
+            "reason": {"type": "string"},
+        },
+        "required": ["score", "reason"],
+    }
+    return {
+        "name": TOOL_NAME,
+        "description": "Records the score and reason of every metric for the graded output.",
+        "input_schema": {
+            "type": "object",
+            "properties": {metric_name(m): entry for m in metrics},
+            "required": [metric_name(m) for m in metrics],
+        },
+    }
+
+
+def parse_scores(answer, names: List[str]) -> Dict[str, dict]:
+    """{name: {score, reason}} from a tool input dict or JSON text; ValueError if anything is missing."""
+    if isinstance(answer, str):
+        match = re.search(r"\{.*\}", answer, flags=re.DOTALL)
+        if not match:
+            raise ValueError("no JSON object in judge answer")
+        try:
+            answer = json.loads(match.group(0))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON in judge answer: {e}") from e
+    if not isinstance(answer, dict):
+        raise ValueError(f"judge answer is {type(answer).__name__}, not an object")
+
+    scores = {}
+    for name in names:
+        entry = answer.get(name)
+        score = entry.get("score") if isinstance(entry, dict) else None
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 1:
+            raise ValueError(f"missing or invalid score for {name}: {entry!r}")
+        scores[name] = {"score": float(score), "reason": str(entry.get("reason") or "")}
+    return scores
+
+
+def apply_scores(metrics: list, scores: Dict[str, dict]):
+    """Writes the parsed results into the metrics the way a_measure() leaves them."""
+    for metric in metrics:
+        entry = scores[metric_name(metric)]
+        score = entry["score"]
+        if metric.strict_mode:
+            score = 1.0 if score >= metric.threshold else 0.0
+        metric.score = score
+        metric.reason = entry["reason"] if metric.include_reason else None
+        metric.error = None
+        metric.success = metric.is_successful()
+
+
+class CallCounter(DeepEvalBaseLLM):
+    """Wraps a judge model and counts the calls and estimated tokens that go through it."""
+
+    def __init__(self, model: DeepEvalBaseLLM):
+        self.inner = model
+        self.calls = 0
+        self.tokens = 0
+        super().__init__(model.get_model_name())
+
+    def load_model(self):
+        return self.inner
+
+    def _count(self, prompt, response):
+        self.calls += 1
+        self.tokens += estimate_tokens(str(prompt)) + estimate_tokens(response)
+
+    def generate(self, prompt, *args, **kwargs):
+        response = self.inner.generate(prompt, *args, **kwargs)
+        self._count(prompt, response)
+        return response
+
+    async def a_generate(self, prompt, *args, **kwargs):
+        response = await self.inner.a_generate(prompt, *args, **kwargs)
+        self._count(prompt, response)
+        return response
+
+    def get_model_name(self):
+        return self.inner.get_model_name()
+
+
+@dataclass
+class JudgeStats:
+    cases: int = 0
+    calls: int = 0
+    tokens: int = 0
+    combined: int = 0
+    fallbacks: int = 0
+    # Per-metric baseline: deepeval's maximum call count for every judged case ...
+    baseline_calls: int = 0
+    # ... and what per-metric judging actually cost where it ran (fallbacks, calibration)
+    observed_cases: int = 0
+    observed_calls: int = 0
+    observed_tokens: int = 0
+    calibrated: int = 0
+    agreements: int = 0
+    compared: int = 0
+
+    def summary(self) -> dict:
+        # deepeval skips verdict calls when nothing was extracted, so observed per-metric costs
+        # beat the static call count. Calibration and fallback calls are part of `calls`/`tokens`,
+        # so the savings are net.
+        baseline_calls, baseline_tokens = self.baseline_calls, None
+        if self.observed_cases:
+            baseline_calls = round(self.observed_calls / self.observed_cases * self.cases)
+            baseline_tokens = round(self.observed_tokens / self.observed_cases * self.cases)
+        return {
+            "cases": self.cases,
+            "calls": self.calls,
+            "tokens_estimated": self.tokens,
+            "combined": self.combined,
+            "fallbacks": self.fallbacks,
+            "per_metric_calls": baseline_calls,
+            "per_metric_tokens_estimated": baseline_tokens,
+            "calls_saved": baseline_calls - self.calls,
+            "tokens_saved": baseline_tokens - self.tokens if baseline_tokens is not None else None,
+            "calibrated": self.calibrated,
+            "agreement_rate": round(self.agreements / self.compared, 3) if self.compared else None,
+        }
+
+
+class CombinedJudge:
+    def __init__(self, judge: DeepEvalBaseLLM, calibration_cases: int = CALIBRATION_CASES):
+        self.judge = judge
+        self.calibration_cases = calibration_cases
+        self.stats = JudgeStats()
+
+    @staticmethod
+    def supports(metrics: list) -> bool:
+        """Only metrics with a rubric can be combined; custom metric factories keep per-metric judging."""
+        return bool(metrics) and all(metric_name(m) in RUBRICS for m in metrics)
+
+    async def _ask(self, prompt: str, metrics: list):
+        if hasattr(self.judge, "a_generate_structured"):
+            answer = await self.judge.a_generate_structured(prompt, build_tool(metrics))
+            return answer, json.dumps(answer)
+        answer = await self.judge.a_generate(prompt)
+        # deepeval's native models return (text, cost)
+        answer = answer[0] if isinstance(answer, tuple) else answer
+        return answer, answer
+
+    async def _measure_per_metric(self, test_case, metrics: list):
+        counters = []
+        for metric in metrics:
+            metric.model = CallCounter(metric.model)
+            counters.append(metric.model)
+        try:
+            await asyncio.gather(*(m.a_measure(test_case, _show_indicator=False) for m in metrics))
+        finally:
+            self.stats.observed_cases += 1
+            self.stats.observed_calls += sum(c.calls for c in counters)
+            self.stats.observed_tokens += sum(c.tokens for c in counters)
+            self.stats.calls += sum(c.calls for c in counters)
+            self.stats.tokens += sum(c.tokens for c in counters)
+
+    async def measure(self, test_case, metrics: list) -> str:
+        """Judges all metrics of one case; returns "combined" or "fallback" (per-metric calls)."""
+        stats = self.stats
+        stats.cases += 1
+        stats.baseline_calls += per_metric_calls(metrics)
+
+        prompt = build_prompt(test_case, metrics)
+        try:
+            answer, text = await self._ask(prompt, metrics)
+            stats.calls += 1
+            stats.tokens += estimate_tokens(prompt) + estimate_tokens(text)
+            scores = parse_scores(answer, [metric_name(m) for m in metrics])
+        except MALFORMED_ANSWER_ERRORS:
+            stats.fallbacks += 1
+            await self._measure_per_metric(test_case, metrics)
+            return "fallback"
+
+        apply_scores(metrics, scores)
+        stats.combined += 1
+        # Only cases with a combined result can be compared; no await between check and increment
+        calibrate = stats.calibrated < self.calibration_cases
+        stats.calibrated += calibrate
+        if calibrate:
+            # Shallow copies share the judge but keep their own score/reason state
+            reference = [copy.copy(m) for m in metrics]
+            await self._measure_per_metric(test_case, reference)
+            for combined, per_metric in zip(metrics, reference):
+                stats.compared += 1
+                stats.agreements += combined.is_successful() == per_metric.is_successful()
+        return "combined"
+
+
+def format_summary(summary: dict) -> str:
+    if not summary.get("cases"):
+        return "no cases judged"
+    tokens = summary["tokens_saved"]
+    return (f"{summary['calls']} judge calls instead of {summary['per_metric_calls']} "
+            f"({summary['calls_saved']} saved), "
+            f"~{tokens if tokens is not None else 'n/a'} tokens saved, "
+            f"{summary['fallbacks']} fallbacks, agreement {summary['agreement_rate']}")
@@ -1,7 +1,39 @@
+import argparse
+import hashlib
+import itertools
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Tuple
 from deepeval.synthesizer import Synthesizer
 from deepeval.models import GPTModel
+from canonical_entry import entry_key
+from golden_store import DATASET_PATH as GOLDEN_DATASET_PATH, iter_cases
+from near_duplicates import MinHashIndex
+
+STREAM_OUTPUT_PATH = "eval/deepeval/synthetic_test_cases.jsonl"
+
+BASE_CONTEXT = [
+    "The system validates vehicle components in YAML format.",
+    "A valid vehicle component needs a materialNumber (格式: [A-Z]{3}-\\d{5}), a description (max 200 chars), and a unit (e.g., mm, kg, m).",
+    "Edge cases include missing units, extremely long descriptions, and special characters in material numbers.",
+    "Financial data like price must be in positive floating point numbers.",
+]
+
+# Context variants = BASE_CONTEXT + one line per axis
+VEHICLES = ["TGX", "TGS", "TGM", "TGL", "TGE", "Lion's City"]
+COMPONENTS = ["Bremsscheibe", "Motor", "Getriebe", "Achse", "Kabelbaum",
+              "Scheinwerfer", "Kraftstofftank", "Batterie", "Turbolader", "Fahrersitz"]
+FOCUS = [
+    "missing units",
+    "extremely long descriptions",
+    "special characters in material numbers",
+    "negative or non-numeric prices",
+    "completely valid entries",
+    "misspelled field names",
+    "mixed German and English descriptions",
+    "several errors in a single entry",
+]
 
 def generate_synthetic_data():
     print("🚀 Starting Synthetic Data Generation...")
@@ -11,12 +43,7 @@ def generate_synthetic_data():
     
     # Define the context for synthesis
     # This guides the model on what kind of vehicle data to generate
-    context = [
-        "The system validates vehicle components in YAML format.",
-        "A valid vehicle component needs a materialNumber (格式: [A-Z]{3}-\\d{5}), a description (max 200 chars), and a unit (e.g., mm, kg, m).",
-        "Edge cases include missing units, extremely long descriptions, and special characters in material numbers.",
-        "Financial data like price must be in positive floating point numbers."
-    ]
+    context = BASE_CONTEXT
 
     # Initialize Synthesizer
     synthesizer = Synthesizer(model=model)
@@ -48,5 +75,148 @@ def generate_synthetic_data():
 
     print(f"✅ Generated {len(test_cases)} test cases in {output_path}")
 
+def context_variants(count: int):
+    """Yields (context_id, context); beyond the axis product further batches repeat it."""
+    combos = list(itertools.product(VEHICLES, COMPONENTS, FOCUS))
+    for i in range(count):
+        vehicle, component, focus = combos[i % len(combos)]
+        context = BASE_CONTEXT + [
+            f"The entries describe a {component} of a MAN {vehicle}.",
+            f"Concentrate on {focus}.",
+        ]
+        batch = i // len(combos)
+        if batch:
+            context.append(f"Batch {batch}: avoid entries of earlier batches for the same component.")
+        yield hashlib.sha256(json.dumps(context).encode()).hexdigest()[:12], context
+
+
+def _repair_tail(path: str):
+    """Cuts a half-written last line left behind by a crash."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def load_progress(output_path: str, index: MinHashIndex, keys: dict) -> Tuple[set, set]:
+    """
+    Indexes already written cases (MinHash and canonical keys) and returns the
+    finished context ids and the ids of all written cases.
+    """
+    written = set()
+    if os.path.exists(output_path):
+        _repair_tail(output_path)
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                case = json.loads(line)
+                written.add(case["id"])
+                index.add(case["id"], index.signature(case["input"]))
+                keys.setdefault(entry_key(case["input"]), case["id"])
+
+    done_path = output_path + ".done"
+    if not os.path.exists(done_path):
+        return set(), written
+    with open(done_path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}, written
+
+
+def generate_streaming(contexts: int = 1000, goldens_per_context: int = 10, workers: int = 8,
+                       output_path: str = STREAM_OUTPUT_PATH, threshold: float = 0.8) -> dict:
+    """
+    Fans out over many context variants in parallel and appends every accepted
+    case to a JSONL file as soon as its context returns. A context id is
+    recorded in <output>.done only after its cases are written, so a rerun
+    skips finished contexts and continues where a crash stopped.
+    """
+    print(f"🚀 Starting streaming generation: {contexts} contexts × {goldens_per_context} goldens, {workers} workers...")
+    model = GPTModel(model="gpt-4o")
+
+    index = MinHashIndex(threshold=threshold)
+    # Canonical entry key -> case id: equivalent entries (other key order, quoting, comments)
+    # are dropped exactly, before the MinHash lookup
+    keys = {}
+    for case in iter_cases(GOLDEN_DATASET_PATH):
+        index.add(f"golden:{case['id']}", index.signature(case["input"]))
+        keys.setdefault(entry_key(case["input"]), f"golden:{case['id']}")
+    golden_count = len(index)
+
+    done, written = load_progress(output_path, index, keys)
+    pending = [(cid, ctx) for cid, ctx in context_variants(contexts) if cid not in done]
+    stats = {"contexts": len(pending), "resumed": len(done), "written": 0,
+             "duplicates_batch": 0, "duplicates_golden": 0, "failed": 0}
+
+    def synthesize(context):
+        # One Synthesizer per call: it keeps the generated goldens as instance state
+        synthesizer = Synthesizer(model=model, async_mode=False)
+        return synthesizer.generate_goldens_from_contexts(
+            contexts=[context],
+            max_goldens_per_context=goldens_per_context,
+            include_expected_output=True,
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, \
+            open(output_path, "a", encoding="utf-8") as out, \
+            open(output_path + ".done", "a", encoding="utf-8") as done_file:
+        futures = {pool.submit(synthesize, ctx): cid for cid, ctx in pending}
+        for future in as_completed(futures):
+            context_id = futures[future]
+            try:
+                goldens = future.result()
+            except Exception as e:
+                # Not marked as done: the next run retries this context
+                stats["failed"] += 1
+                print(f"⚠️  Context {context_id} failed: {e}")
+                continue
+
+            n = 0
+            for golden in goldens:
+                # A crash between writing the cases and marking the context done leaves
+                # its earlier cases in the file: number the regenerated ones after them
+                while f"syn-{context_id}-{n:03d}" in written:
+                    n += 1
+                case_id = f"syn-{context_id}-{n:03d}"
+                key = entry_key(golden.input)
+                duplicate = keys.get(key) or index.add_if_new(case_id, golden.input)
+                if duplicate:
+                    stats["duplicates_golden" if duplicate.startswith("golden:") else "duplicates_batch"] += 1
+                    continue
+                keys[key] = case_id
+                written.add(case_id)
+                n += 1
+                out.write(json.dumps({
+                    "id": case_id,
+                    "input": golden.input,
+                    "expected": golden.expected_output,
+                    "metadata": {
+                        "source": "deepeval-synthetic",
+                        "context_id": context_id,
+                        "metrics": ["faithfulness", "relevancy"]
+                    }
+                }, ensure_ascii=False) + "\n")
+                stats["written"] += 1
+            out.flush()
+            done_file.write(context_id + "\n")
+            done_file.flush()
+
+    stats["total_cases"] = len(index) - golden_count
+    print(f"✅ {stats['written']} new cases in {output_path} ({stats['total_cases']} total), "
+          f"dropped {stats['duplicates_batch']} batch / {stats['duplicates_golden']} golden near-duplicates, "
+          f"{stats['failed']} contexts failed")
+    return stats
+
+
 if __name__ == "__main__":
-    generate_synthetic_data()
+    parser = argparse.ArgumentParser(description="Synthetic VEEDS test case generation")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parallel generation over many contexts into a resumable JSONL file")
+    parser.add_argument("--contexts", type=int, default=1000)
+    parser.add_argument("--goldens-per-context", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--output", default=STREAM_OUTPUT_PATH)
+    parser.add_argument("--threshold", type=float, default=0.8, help="Jaccard similarity counted as duplicate")
+    args = parser.parse_args()
+
+    if args.stream:
+        generate_streaming(args.contexts, args.goldens_per_context, args.workers, args.output, args.threshold)
+    else:
+        generate_synthetic_data()
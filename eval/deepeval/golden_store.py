@@ -0,0 +1,327 @@
+import hashlib
+import json
+import mmap
+import os
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# =============================================================================
+# Golden Dataset Store
+# =============================================================================
+# Shared, lazily loaded access to eval/golden_dataset.json for the Python eval
+# scripts. The dataset is converted once into JSONL (one case per line) plus a
+# NumPy offset index (<jsonl>.idx.npz: byte offsets, category codes, id hashes).
+# Reads go through mmap, so iterating, filtering by category, sharding and id
+# lookups only ever decode the cases they return.
+# =============================================================================
+
+DATASET_PATH = os.getenv("GOLDEN_DATASET_PATH", "eval/golden_dataset.json")
+STORE_DIR = os.getenv("GOLDEN_STORE_DIR", ".cache/golden")
+INDEX_VERSION = 1
+
+
+def id_hash(case_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(case_id.encode(), digest_size=8).digest(), "little")
+
+
+# Read size of the streaming JSON parser; a case larger than this just takes a few more reads
+CHUNK_SIZE = 1 << 20
+_DELIMITERS = tuple(",:]} \t\r\n")
+
+
+class _JsonStream:
+    """Incremental raw_decode over a text file read in chunks; only the current window is in memory."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(max(CHUNK_SIZE, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed, then append
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at the end of the file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in golden dataset, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number cut off by the window ("1" of "1e5") only counts once a delimiter follows
+                if self.eof or self.buffer[end:end + 1] in _DELIMITERS:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read()
+
+
+def _iter_json_cases(path: str) -> Tuple[dict, Iterator[dict]]:
+    """
+    Metadata and cases of a golden_dataset.json-style file. The file is parsed
+    as a stream: cases are decoded one at a time, never as one list of dicts,
+    and never more than about one chunk of text is held in memory. The
+    metadata dict is complete once the cases are exhausted (keys after
+    testCases are only read then).
+    """
+    metadata: dict = {}
+
+    def cases():
+        with open(path, "r", encoding="utf-8") as f:
+            stream = _JsonStream(f)
+            stream.expect("{")
+            if stream.peek() == "}":
+                return
+            while True:
+                key = stream.value()
+                stream.expect(":")
+                if key == "testCases":
+                    stream.expect("[")
+                    if stream.peek() == "]":
+                        stream.pos += 1
+                    else:
+                        while True:
+                            yield stream.value()
+                            if stream.expect(",]") == "]":
+                                break
+                else:
+                    metadata[key] = stream.value()
+                if stream.expect(",}") == "}":
+                    return
+
+    return metadata, cases()
+
+
+def convert(json_path: str, jsonl_path: str) -> str:
+    """Writes the cases of a golden_dataset.json file as JSONL and indexes it in the same pass (streaming)."""
+    metadata, cases = _iter_json_cases(json_path)
+    os.makedirs(os.path.dirname(jsonl_path) or ".", exist_ok=True)
+    index = _IndexBuilder()
+    tmp = f"{jsonl_path}.tmp"
+    with open(tmp, "wb") as f:
+        for case in cases:
+            line = (json.dumps(case, ensure_ascii=False) + "\n").encode()
+            index.add(case, len(line))
+            f.write(line)
+    os.replace(tmp, jsonl_path)
+    index.write(jsonl_path, metadata=metadata, source=json_path)
+    return jsonl_path
+
+
+def _fingerprint(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class _IndexBuilder:
+    def __init__(self):
+        self.offsets = array("q", [0])
+        self.hashes = array("Q")
+        self.codes = array("H")
+        self.categories: Dict[str, int] = {}
+
+    def add(self, case: dict, line_length: int):
+        self.offsets.append(self.offsets[-1] + line_length)
+        self.hashes.append(id_hash(case["id"]))
+        self.codes.append(self.categories.setdefault(case.get("category", ""), len(self.categories)))
+
+    def skip(self, line_length: int):
+        # Blank lines stay part of the previous row; json.loads ignores the whitespace
+        self.offsets[-1] += line_length
+
+    def write(self, jsonl_path: str, metadata: Optional[dict] = None, source: Optional[str] = None) -> str:
+        header = {
+            "version": INDEX_VERSION,
+            "metadata": metadata or {},
+            "categories": list(self.categories),
+            "jsonl": _fingerprint(jsonl_path),
+            "source": [os.path.abspath(source), *_fingerprint(source)] if source else None,
+        }
+        hashes = np.frombuffer(self.hashes, dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        index_path = f"{jsonl_path}.idx.npz"
+        with open(f"{index_path}.tmp", "wb") as f:
+            np.savez(
+                f,
+                header=np.frombuffer(json.dumps(header).encode(), dtype=np.uint8),
+                offsets=np.frombuffer(self.offsets, dtype=np.int64),
+                categories=np.frombuffer(self.codes, dtype=np.uint16),
+                id_hashes=hashes,
+                sorted_hashes=hashes[order],
+                sorted_rows=order.astype(np.int64),
+            )
+        os.replace(f"{index_path}.tmp", index_path)
+        return index_path
+
+
+def build_index(jsonl_path: str, metadata: Optional[dict] = None, source: Optional[str] = None) -> str:
+    """Indexes an existing JSONL dataset (e.g. synthetic_test_cases.jsonl)."""
+    index = _IndexBuilder()
+    with open(jsonl_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                index.add(json.loads(line), len(line))
+            else:
+                index.skip(len(line))
+    return index.write(jsonl_path, metadata, source)
+
+
+class GoldenView:
+    """A lazy selection of rows of a GoldenStore (category filter and/or shard)."""
+
+    def __init__(self, store: "GoldenStore", rows: np.ndarray):
+        self.store = store
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[dict]:
+        for row in self.rows:
+            yield self.store.read_row(int(row))
+
+    def ids(self) -> Iterator[str]:
+        for case in self:
+            yield case["id"]
+
+    def filter(self, category: Optional[str] = None, shard: Optional[Tuple[int, int]] = None) -> "GoldenView":
+        return GoldenView(self.store, self.store.select(category, shard, self.rows))
+
+
+class GoldenStore:
+    def __init__(self, jsonl_path: str):
+        index_path = f"{jsonl_path}.idx.npz"
+        if not _index_fresh(jsonl_path, index_path):
+            build_index(jsonl_path)
+
+        with np.load(index_path) as index:
+            header = json.loads(index["header"].tobytes())
+            self.offsets = index["offsets"]
+            self.category_codes = index["categories"]
+            self.id_hashes = index["id_hashes"]
+            self._sorted_hashes = index["sorted_hashes"]
+            self._sorted_rows = index["sorted_rows"]
+        self.metadata = header["metadata"]
+        self.category_names: List[str] = header["categories"]
+        self.path = jsonl_path
+
+        self._file = open(jsonl_path, "rb")
+        # mmap cannot map an empty file
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b""
+
+    @classmethod
+    def open(cls, path: str = DATASET_PATH, store_dir: str = STORE_DIR) -> "GoldenStore":
+        """Opens a JSONL dataset directly; a .json dataset is converted (again, if it changed) into store_dir."""
+        if path.endswith(".jsonl"):
+            return cls(path)
+        jsonl_path = os.path.join(store_dir, os.path.splitext(os.path.basename(path))[0] + ".jsonl")
+        if not _converted_from(jsonl_path, path):
+            convert(path, jsonl_path)
+        return cls(jsonl_path)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.all())
+
+    def __contains__(self, case_id: str) -> bool:
+        return self.get(case_id) is not None
+
+    def read_row(self, row: int) -> dict:
+        return json.loads(self._data[self.offsets[row]:self.offsets[row + 1]])
+
+    def get(self, case_id: str) -> Optional[dict]:
+        h = np.uint64(id_hash(case_id))
+        lo = np.searchsorted(self._sorted_hashes, h, side="left")
+        hi = np.searchsorted(self._sorted_hashes, h, side="right")
+        # Equal hashes are resolved by reading the candidates
+        for row in self._sorted_rows[lo:hi]:
+            case = self.read_row(int(row))
+            if case["id"] == case_id:
+                return case
+        return None
+
+    def categories(self) -> Dict[str, int]:
+        counts = np.bincount(self.category_codes, minlength=len(self.category_names))
+        return {name: int(counts[code]) for code, name in enumerate(self.category_names)}
+
+    def select(self, category: Optional[str] = None, shard: Optional[Tuple[int, int]] = None,
+               rows: Optional[np.ndarray] = None) -> np.ndarray:
+        rows = np.arange(len(self), dtype=np.int64) if rows is None else rows
+        if category is not None:
+            if category not in self.category_names:
+                return rows[:0]
+            rows = rows[self.category_codes[rows] == self.category_names.index(category)]
+        if shard is not None:
+            # Shard by id hash: stable no matter how the file is ordered or grows
+            index, count = shard
+            rows = rows[self.id_hashes[rows] % np.uint64(count) == np.uint64(index)]
+        return rows
+
+    def all(self) -> GoldenView:
+        return GoldenView(self, np.arange(len(self), dtype=np.int64))
+
+    def view(self, category: Optional[str] = None, shard: Optional[Tuple[int, int]] = None) -> GoldenView:
+        return GoldenView(self, self.select(category, shard))
+
+
+def _index_fresh(jsonl_path: str, index_path: str) -> bool:
+    if not os.path.exists(index_path):
+        return False
+    with np.load(index_path) as index:
+        header = json.loads(index["header"].tobytes())
+    return header.get("version") == INDEX_VERSION and header.get("jsonl") == _fingerprint(jsonl_path)
+
+
+def _converted_from(jsonl_path: str, source: str) -> bool:
+    index_path = f"{jsonl_path}.idx.npz"
+    if not (os.path.exists(jsonl_path) and _index_fresh(jsonl_path, index_path)):
+        return False
+    with np.load(index_path) as index:
+        header = json.loads(index["header"].tobytes())
+    return header.get("source") == [os.path.abspath(source), *_fingerprint(source)]
+
+
+def iter_cases(path: str = DATASET_PATH, category: Optional[str] = None,
+               shard: Optional[Tuple[int, int]] = None) -> Iterator[dict]:
+    with GoldenStore.open(path) as store:
+        yield from store.view(category, shard)
@@ -0,0 +1,377 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from opentelemetry import trace
+
+import golden_store
+from canonical_entry import entry_key
+from veeds_rules import agrees, validate_entry
+
+# =============================================================================
+# Golden Dataset Suite
+# =============================================================================
+# Runs the proofreader (eval/prompt.txt on Bedrock) over every case of
+# eval/golden_dataset.json and judges each output with Faithfulness and
+# AnswerRelevancy. Cases run concurrently under a configurable cap; each case
+# gets its own OTel span below one parent run span. With
+# DEEPEVAL_JUDGE_MODE=combined both metrics are judged in one call per case
+# (combined_judge.py).
+#
+# Cases whose entries are equivalent (canonical_entry.py: same content, other
+# key order, quoting or comments) share one proofreader call and one judging.
+# If the generator has a response cache, its answers are also stored under the
+# canonical key, so a later run over another dataset reuses them.
+# =============================================================================
+
+DATASET_PATH = golden_store.DATASET_PATH
+PROMPT_PATH = os.getenv("PROOFREADER_PROMPT_PATH", "eval/prompt.txt")
+REPORT_PATH = os.getenv("DEEPEVAL_REPORT_PATH", "eval/results/deepeval-golden-report.json")
+CONCURRENCY = int(os.getenv("DEEPEVAL_CONCURRENCY", "8"))
+METRIC_THRESHOLD = float(os.getenv("DEEPEVAL_THRESHOLD", "0.7"))
+# off | skip-judge (no metrics when LLM and rules agree) | skip-llm (rules answer definitive cases alone)
+RULES_MODE = os.getenv("DEEPEVAL_RULES_MODE", "off")
+# per-metric (deepeval's own judge calls per metric) | combined (one call for all metrics of a case)
+JUDGE_MODE = os.getenv("DEEPEVAL_JUDGE_MODE", "per-metric")
+# on | off: equivalent entries share generation and judging
+ENTRY_DEDUP = os.getenv("DEEPEVAL_ENTRY_DEDUP", "on").lower() != "off"
+
+tracer = trace.get_tracer(__name__)
+
+
+def iter_golden_cases(path: str = DATASET_PATH, category: Optional[str] = None,
+                      shard: Optional[Tuple[int, int]] = None) -> Iterator[dict]:
+    # Streams from the indexed JSONL store instead of json.load-ing the whole dataset
+    yield from golden_store.iter_cases(path, category, shard)
+
+
+def load_prompt(path: str = PROMPT_PATH) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def spec_rules(prompt: str) -> List[str]:
+    """The VEEDS rules from the prompt ("- field: rule") serve as retrieval context."""
+    return [line[2:].strip() for line in prompt.splitlines() if re.match(r"^- \w+", line)]
+
+
+def parse_proofreader_output(output: str) -> dict:
+    """Extracts {errors, isValid} from the model answer (tolerates text around the JSON)."""
+    match = re.search(r"\{.*\}", output or "", flags=re.DOTALL)
+    if not match:
+        return {"errors": [], "isValid": None}
+    try:
+        parsed = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {"errors": [], "isValid": None}
+    return {"errors": parsed.get("errors") or [], "isValid": parsed.get("isValid")}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@dataclass
+class CaseResult:
+    id: str
+    category: str
+    passed: bool
+    is_valid_match: bool
+    scores: Dict[str, Optional[float]] = field(default_factory=dict)
+    reasons: Dict[str, str] = field(default_factory=dict)
+    latency_ms: float = 0.0
+    error: Optional[str] = None
+    output: Optional[dict] = None
+    rules_definitive: bool = False
+    # Whether the LLM output matches a definitive rule verdict (None = not compared)
+    rules_agree: Optional[bool] = None
+    skipped: List[str] = field(default_factory=list)
+    # "combined" | "fallback" | "per-metric" (None = not judged)
+    judged: Optional[str] = None
+    # canonical_entry key (None = dedup off); reused: "generator" / "judge" results of an
+    # equivalent case, "cache" = proofreader answer stored under the key by an earlier run
+    entry_key: Optional[str] = None
+    reused: List[str] = field(default_factory=list)
+
+    def failure_reason(self) -> str:
+        if self.error:
+            return self.error
+        parts = [] if self.is_valid_match else ["isValid does not match expectedIsValid"]
+        parts += [f"{name}={score}: {self.reasons.get(name, '')}" for name, score in self.scores.items()
+                  if score is None or score < METRIC_THRESHOLD]
+        return "; ".join(parts)
+
+
+@dataclass
+class SuiteReport:
+    cases: Dict[str, CaseResult]
+    duration_s: float
+    concurrency: int
+    rules_mode: str = "off"
+    judge_mode: str = "per-metric"
+    judge_stats: dict = field(default_factory=dict)
+    # Shard runs: which shard of how many (shards.shard_info); merged reports: one entry per shard
+    shard: Optional[dict] = None
+    shards: List[dict] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        categories: Dict[str, List[CaseResult]] = {}
+        for result in self.cases.values():
+            categories.setdefault(result.category, []).append(result)
+
+        def stats(results: List[CaseResult]) -> dict:
+            latencies = [r.latency_ms for r in results]
+            passed = sum(r.passed for r in results)
+            return {
+                "total": len(results),
+                "passed": passed,
+                "pass_rate": round(passed / len(results), 3) if results else 0.0,
+                "latency_ms": {f"p{p}": percentile(latencies, p) for p in (50, 90, 99)},
+            }
+
+        results = list(self.cases.values())
+        compared = [r for r in results if r.rules_agree is not None]
+        keyed = [r for r in results if r.entry_key is not None]
+        unique = len({r.entry_key for r in keyed})
+        return {
+            "total": stats(results),
+            "categories": {name: stats(results) for name, results in sorted(categories.items())},
+            "duration_s": round(self.duration_s, 2),
+            "concurrency": self.concurrency,
+            "rules": {
+                "mode": self.rules_mode,
+                "definitive": sum(r.rules_definitive for r in results),
+                "generator_calls_avoided": sum("generator" in r.skipped for r in results),
+                "judged_cases_avoided": sum("judge" in r.skipped for r in results),
+                "agreement_rate": round(sum(r.rules_agree for r in compared) / len(compared), 3) if compared else None,
+            },
+            "judge": {"mode": self.judge_mode, **self.judge_stats},
+            "dedup": {
+                "cases": len(keyed),
+                "unique_entries": unique,
+                "dedup_ratio": round(1 - unique / len(keyed), 3) if keyed else 0.0,
+                "generator_calls_shared": sum("generator" in r.reused for r in results),
+                "generator_cache_hits": sum("cache" in r.reused for r in results),
+                "judged_cases_shared": sum("judge" in r.reused for r in results),
+            },
+        }
+
+    def write(self, path: str = REPORT_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            report = {"summary": self.summary(), "cases": [asdict(r) for r in self.cases.values()]}
+            if self.shard:
+                report["shard"] = self.shard
+            if self.shards:
+                report["shards"] = self.shards
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def default_metrics(judge) -> list:
+    # deepeval takes seconds to import, so it is only loaded once a case is judged
+    from deepeval.metrics import AnswerRelevancyMetric, FaithfulnessMetric
+
+    # Fresh instances per case: deepeval metrics keep per-measurement state
+    return [
+        FaithfulnessMetric(threshold=METRIC_THRESHOLD, model=judge),
+        AnswerRelevancyMetric(threshold=METRIC_THRESHOLD, model=judge),
+    ]
+
+
+class SharedEntries:
+    """
+    One proofreader call and one judging per canonical entry within a run; the
+    first case starts the work, equivalent cases await the same task.
+    """
+
+    def __init__(self, generator, prompt_template: str):
+        # Only a real response cache (BedrockClaude) persists answers across runs and datasets
+        self.cache = getattr(generator, "cache", None)
+        self.model_id = getattr(generator, "model_id", type(generator).__name__)
+        self._prompt_digest = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()[:16]
+        self._tasks: Dict[tuple, asyncio.Future] = {}
+
+    async def _once(self, key: tuple, factory: Callable) -> Tuple[object, bool]:
+        """Result of the task for key and whether another case started it."""
+        task = self._tasks.get(key)
+        shared = task is not None
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+        # Shielded: a cancelled case must not cancel the work of its equivalents
+        return await asyncio.shield(task), shared
+
+    async def generate(self, key: str, generator, prompt: str) -> Tuple[str, List[str]]:
+        """Proofreader output for the entry and what was reused ("generator", "cache")."""
+        async def produce():
+            cache_key = None
+            if self.cache is not None:
+                from bedrock_model import ResponseCache
+
+                cache_key = ResponseCache.key(self.model_id, f"proofreader-entry\n{self._prompt_digest}\n{key}")
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached, True
+            output = await generator.a_generate(prompt)
+            if cache_key is not None:
+                self.cache.put(cache_key, self.model_id, output)
+            return output, False
+
+        (output, cached), shared = await self._once(("generate", key), produce)
+        return output, ["generator"] * shared + ["cache"] * (cached and not shared)
+
+    async def judge(self, key: str, output: str, factory: Callable) -> Tuple[dict, bool]:
+        return await self._once(("judge", key, output), factory)
+
+
+async def judge_output(case: dict, output: str, judge, context: List[str], metrics_factory: Callable,
+                       combined_judge=None) -> dict:
+    """Faithfulness/Relevancy of one proofreader output: {judged, scores, reasons, successful}."""
+    from deepeval.test_case import LLMTestCase
+
+    test_case = LLMTestCase(
+        input=case["input"],
+        actual_output=output,
+        retrieval_context=context,
+        name=case["id"],
+    )
+    metrics = metrics_factory(judge)
+    if combined_judge is not None and combined_judge.supports(metrics):
+        judged = await combined_judge.measure(test_case, metrics)
+    else:
+        # The metrics of one case are independent judge calls as well
+        await asyncio.gather(*(m.a_measure(test_case, _show_indicator=False) for m in metrics))
+        judged = "per-metric"
+
+    return {
+        "judged": judged,
+        "scores": {m.__class__.__name__: m.score for m in metrics},
+        "reasons": {m.__class__.__name__: m.reason or "" for m in metrics},
+        "successful": all(m.is_successful() for m in metrics),
+    }
+
+
+async def run_case(
+    case: dict,
+    generator,
+    judge,
+    prompt_template: str,
+    context: List[str],
+    metrics_factory: Callable = default_metrics,
+    rules_mode: str = RULES_MODE,
+    combined_judge=None,
+    shared: Optional[SharedEntries] = None,
+) -> CaseResult:
+    with tracer.start_as_current_span("golden_case") as span:
+        span.set_attribute("test.case_id", case["id"])
+        span.set_attribute("test.category", case.get("category", ""))
+        span.set_attribute("test.input_size", len(case["input"]))
+        start = time.perf_counter()
+
+        result = CaseResult(id=case["id"], category=case.get("category", ""), passed=False, is_valid_match=False)
+        if shared is not None:
+            result.entry_key = entry_key(case["input"])
+            span.set_attribute("test.entry_key", result.entry_key)
+        verdict = validate_entry(case["input"]) if rules_mode != "off" else None
+        result.rules_definitive = verdict is not None and verdict.definitive
+        try:
+            if result.rules_definitive and rules_mode == "skip-llm":
+                result.output = verdict.as_output()
+                result.skipped = ["generator", "judge"]
+            else:
+                prompt = prompt_template.replace("{{yaml_entry}}", case["input"])
+                if shared is not None:
+                    output, result.reused = await shared.generate(result.entry_key, generator, prompt)
+                else:
+                    output = await generator.a_generate(prompt)
+                result.output = parse_proofreader_output(output)
+                if result.rules_definitive:
+                    result.rules_agree = agrees(verdict, result.output)
+            result.is_valid_match = result.output["isValid"] == case.get("expectedIsValid")
+
+            if result.skipped or (rules_mode == "skip-judge" and result.rules_agree):
+                # The rules already confirm the answer, the judge has nothing to add
+                result.skipped = result.skipped or ["judge"]
+                result.passed = result.is_valid_match
+            else:
+                def measure():
+                    return judge_output(case, output, judge, context, metrics_factory, combined_judge)
+
+                if shared is not None:
+                    judgement, judge_shared = await shared.judge(result.entry_key, output, measure)
+                    result.reused += ["judge"] * judge_shared
+                else:
+                    judgement = await measure()
+                result.judged = judgement["judged"]
+                result.scores = dict(judgement["scores"])
+                result.reasons = dict(judgement["reasons"])
+                result.passed = result.is_valid_match and judgement["successful"]
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            span.record_exception(e)
+
+        result.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        span.set_attribute("test.latency_ms", result.latency_ms)
+        span.set_attribute("test.status", "passed" if result.passed else "failed")
+        span.set_attribute("test.skipped", ",".join(result.skipped))
+        span.set_attribute("test.reused", ",".join(result.reused))
+        return result
+
+
+async def run_suite(
+    cases: Iterator[dict],
+    generator,
+    judge,
+    concurrency: int = CONCURRENCY,
+    prompt_template: Optional[str] = None,
+    metrics_factory: Callable = default_metrics,
+    rules_mode: str = RULES_MODE,
+    judge_mode: str = JUDGE_MODE,
+    dedup: bool = ENTRY_DEDUP,
+) -> SuiteReport:
+    prompt_template = prompt_template or load_prompt()
+    context = spec_rules(prompt_template)
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    tasks = []
+    combined_judge = None
+    if judge_mode == "combined":
+        from combined_judge import CombinedJudge
+
+        combined_judge = CombinedJudge(judge)
+    shared = SharedEntries(generator, prompt_template) if dedup else None
+
+    with tracer.start_as_current_span("golden_dataset_run") as run_span:
+        run_span.set_attribute("test.concurrency", concurrency)
+
+        # Cases are pulled from the iterator only when a slot is free; tasks are
+        # created inside the run span, so every case span becomes its child
+        for case in cases:
+            await semaphore.acquire()
+            task = asyncio.create_task(
+                run_case(case, generator, judge, prompt_template, context, metrics_factory, rules_mode,
+                         combined_judge, shared)
+            )
+            task.add_done_callback(lambda _: semaphore.release())
+            tasks.append(task)
+
+        results = await asyncio.gather(*tasks)
+        run_span.set_attribute("test.cases", len(results))
+        run_span.set_attribute("test.passed", sum(r.passed for r in results))
+
+    return SuiteReport(
+        cases={r.id: r for r in results},
+        duration_s=time.perf_counter() - start,
+        concurrency=concurrency,
+        rules_mode=rules_mode,
+        judge_mode=judge_mode,
+        judge_stats=combined_judge.stats.summary() if combined_judge is not None else {},
+    )
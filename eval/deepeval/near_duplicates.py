@@ -0,0 +1,87 @@
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# =============================================================================
+# Near-Duplicate Index (MinHash + LSH)
+# =============================================================================
+# Texts are reduced to character shingles, each shingle set to a MinHash
+# signature. Signatures are split into bands; two texts only become candidates
+# when one band matches exactly, so a lookup touches a handful of buckets
+# instead of every stored text. Candidates are confirmed by the Jaccard
+# estimate of their full signatures.
+# =============================================================================
+
+_PRIME = (1 << 31) - 1
+_WHITESPACE = re.compile(r"\s+")
+
+
+class MinHashIndex:
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 8,
+                 shingle_size: int = 5, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.int64)
+
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def shingles(self, text: str) -> set:
+        normalized = _WHITESPACE.sub(" ", text.lower()).strip()
+        k = self.shingle_size
+        if len(normalized) <= k:
+            return {normalized}
+        return {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") & _PRIME
+             for s in self.shingles(text)),
+            dtype=np.int64,
+        )
+        # (a*x + b) mod p for all permutations at once; a, x < 2^31 keeps it in int64
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Most similar stored key at or above the threshold, else None."""
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best = None
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def add(self, key: str, signature: np.ndarray):
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def add_if_new(self, key: str, text: str) -> Optional[str]:
+        """Adds the text unless a near duplicate exists; returns that duplicate's key instead."""
+        signature = self.signature(text)
+        match = self.query(signature)
+        if match:
+            return match[0]
+        self.add(key, signature)
+        return None
@@ -0,0 +1,259 @@
+import argparse
+import glob
+import hashlib
+import heapq
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from dataclasses import fields
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import golden_store
+
+# =============================================================================
+# Golden Dataset Sharding
+# =============================================================================
+# Splits the golden cases into K shards that run as separate processes or CI
+# jobs (DEEPEVAL_SHARD=i/K, 1-based like CI_NODE_INDEX/CI_NODE_TOTAL), and
+# merges their JSON reports and JUnit files into one result.
+#
+# The assignment is a pure function of the dataset and the duration history
+# (<store dir>/shard-durations.json, per-case latency from earlier merges):
+# every shard job computes the same plan on its own. Cases are placed longest
+# first onto the least loaded shard, ties broken by id hash, so without history
+# the shards differ by at most one case. Each shard records the digest of
+# the history it planned with, and the merge refuses shards that disagree or
+# do not cover every case exactly once.
+#
+# The merged report is rebuilt from the case results through
+# golden_suite.SuiteReport, so pass rates and latency percentiles are the ones
+# a single-node run over the same results reports.
+# =============================================================================
+
+DURATIONS_PATH = os.getenv("DEEPEVAL_SHARD_DURATIONS", os.path.join(golden_store.STORE_DIR, "shard-durations.json"))
+# Weight of the newest run in the per-case duration history
+DURATION_SMOOTHING = 0.5
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """ "i/K" (1-based) -> (index, count) with a 0-based index, as golden_store takes it."""
+    index, _, count = value.partition("/")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {value!r} is not in 1/{count}..{count}/{count}")
+    return index - 1, count
+
+
+def load_durations(path: str = DURATIONS_PATH) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def durations_digest(durations: Dict[str, float]) -> str:
+    return hashlib.sha256(json.dumps(durations, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def update_durations(cases: List[dict], path: str = DURATIONS_PATH) -> Dict[str, float]:
+    """Folds the latency_ms of finished (not skipped, not errored) cases into the history."""
+    durations = load_durations(path)
+    for case in cases:
+        if case.get("error") or case.get("skipped"):
+            continue
+        latency = float(case["latency_ms"])
+        previous = durations.get(case["id"])
+        durations[case["id"]] = round(latency if previous is None else
+                                      DURATION_SMOOTHING * latency + (1 - DURATION_SMOOTHING) * previous, 1)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(durations, f, indent=1, sort_keys=True)
+    return durations
+
+
+def assign(store: golden_store.GoldenStore, count: int, durations: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Shard index per store row and the expected duration (ms) per shard."""
+    hashes = store.id_hashes
+    # Durations are keyed by case id; the store already holds the id hashes, so nothing is decoded.
+    # New cases (and all cases without history) count as a typical one.
+    by_hash = {golden_store.id_hash(case_id): ms for case_id, ms in durations.items()}
+    unknown = float(np.median(list(durations.values()))) if durations else 1.0
+    expected = np.array([by_hash.get(int(h), unknown) for h in hashes], dtype=np.float64)
+
+    shards = np.empty(len(hashes), dtype=np.int64)
+    loads = [(0.0, shard) for shard in range(count)]
+    for row in np.lexsort((hashes, -expected)):
+        load, shard = heapq.heappop(loads)
+        shards[row] = shard
+        heapq.heappush(loads, (load + expected[row], shard))
+    return shards, np.bincount(shards, weights=expected, minlength=count)
+
+
+def iter_shard(path: str, index: int, count: int, durations_path: str = DURATIONS_PATH) -> Iterator[dict]:
+    with golden_store.GoldenStore.open(path) as store:
+        shards, _ = assign(store, count, load_durations(durations_path))
+        yield from golden_store.GoldenView(store, np.flatnonzero(shards == index))
+
+
+def shard_info(path: str, index: int, count: int, durations_path: str = DURATIONS_PATH) -> dict:
+    """What a shard report records about its plan, for the merge to check."""
+    durations = load_durations(durations_path)
+    with golden_store.GoldenStore.open(path) as store:
+        shards, expected = assign(store, count, durations)
+    return {
+        "index": index + 1,
+        "count": count,
+        "cases": int(np.count_nonzero(shards == index)),
+        "expected_ms": round(float(expected[index]), 1),
+        "durations": durations_digest(durations),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Merge
+# -----------------------------------------------------------------------------
+
+def merge_judge_stats(stats: List[dict]) -> dict:
+    stats = [s for s in stats if s]
+    if not stats:
+        return {}
+    additive = ["cases", "calls", "tokens_estimated", "combined", "fallbacks", "per_metric_calls", "calibrated"]
+    merged = {key: sum(s[key] for s in stats) for key in additive}
+    per_metric_tokens = [s["per_metric_tokens_estimated"] for s in stats]
+    merged["per_metric_tokens_estimated"] = None if None in per_metric_tokens else sum(per_metric_tokens)
+    merged["calls_saved"] = merged["per_metric_calls"] - merged["calls"]
+    merged["tokens_saved"] = (merged["per_metric_tokens_estimated"] - merged["tokens_estimated"]
+                              if merged["per_metric_tokens_estimated"] is not None else None)
+    # Each shard calibrates its own first cases; the rates are weighted by those
+    rated = [s for s in stats if s["agreement_rate"] is not None]
+    weight = sum(s["calibrated"] for s in rated)
+    merged["agreement_rate"] = (round(sum(s["agreement_rate"] * s["calibrated"] for s in rated) / weight, 3)
+                                if weight else None)
+    return merged
+
+
+def merge_reports(reports: List[dict], dataset_path: Optional[str] = None):
+    """SuiteReport over the cases of all shard reports; ValueError if the shards do not fit together."""
+    from golden_suite import CaseResult, SuiteReport
+
+    shards = [report.get("shard") for report in reports]
+    if all(shards):
+        counts = {s["count"] for s in shards}
+        digests = {s["durations"] for s in shards}
+        indices = sorted(s["index"] for s in shards)
+        if len(counts) > 1 or len(digests) > 1:
+            raise ValueError(f"shards were planned differently (counts {counts}, duration history {digests})")
+        if indices != list(range(1, counts.pop() + 1)):
+            raise ValueError(f"shards missing or duplicated: got {indices}")
+
+    names = {f.name for f in fields(CaseResult)}
+    cases: Dict[str, CaseResult] = {}
+    for report in reports:
+        for case in report["cases"]:
+            if case["id"] in cases:
+                raise ValueError(f"case {case['id']} was run by more than one shard")
+            cases[case["id"]] = CaseResult(**{k: v for k, v in case.items() if k in names})
+
+    if dataset_path:
+        expected = [case["id"] for case in golden_store.iter_cases(dataset_path)]
+        missing = [case_id for case_id in expected if case_id not in cases]
+        if missing:
+            raise ValueError(f"{len(missing)} cases have no result: {missing[:5]}")
+        # Same order as a single-node run
+        cases = {case_id: cases[case_id] for case_id in expected if case_id in cases} | cases
+
+    summaries = [report["summary"] for report in reports]
+    merged = SuiteReport(
+        cases=cases,
+        # The shards run side by side: the run takes as long as the slowest one
+        duration_s=max(s["duration_s"] for s in summaries),
+        concurrency=max(s["concurrency"] for s in summaries),
+        rules_mode=summaries[0]["rules"]["mode"],
+        judge_mode=summaries[0].get("judge", {}).get("mode", "per-metric"),
+        judge_stats=merge_judge_stats([{k: v for k, v in s.get("judge", {}).items() if k != "mode"}
+                                       for s in summaries]),
+        shards=[{**(shard or {}), "duration_s": s["duration_s"], "cases": len(report["cases"])}
+                for shard, s, report in zip(shards, summaries, reports)],
+    )
+    return merged
+
+
+def merge_junit(paths: List[str]) -> ET.ElementTree:
+    """One <testsuite> with the test cases of all shard JUnit files (pytest --junitxml format)."""
+    merged = ET.Element("testsuite", name="pytest")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    wall_time = 0.0
+    for path in paths:
+        root = ET.parse(path).getroot()
+        for suite in ([root] if root.tag == "testsuite" else root.iter("testsuite")):
+            for key in totals:
+                totals[key] += int(suite.get(key, 0))
+            wall_time = max(wall_time, float(suite.get("time", 0)))
+            merged.extend(suite.findall("testcase"))
+    merged.attrib.update({key: str(value) for key, value in totals.items()})
+    merged.set("time", f"{wall_time:.3f}")
+    root = ET.Element("testsuites")
+    root.append(merged)
+    return ET.ElementTree(root)
+
+
+def expand(patterns: List[str]) -> List[str]:
+    return sorted({path for pattern in patterns for path in glob.glob(pattern)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan golden dataset shards or merge shard results")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = sub.add_parser("plan", help="show the shard assignment")
+    plan_parser.add_argument("--shards", type=int, required=True)
+    plan_parser.add_argument("--dataset", default=golden_store.DATASET_PATH)
+    plan_parser.add_argument("--durations", default=DURATIONS_PATH)
+
+    merge_parser = sub.add_parser("merge", help="merge shard reports (and JUnit files) into one")
+    merge_parser.add_argument("reports", nargs="+", help="shard report files or globs")
+    merge_parser.add_argument("--out", required=True)
+    merge_parser.add_argument("--junit", nargs="*", default=[], help="shard JUnit files or globs")
+    merge_parser.add_argument("--junit-out")
+    merge_parser.add_argument("--dataset", help="check that every case of this dataset has a result")
+    merge_parser.add_argument("--durations", help="update this duration history with the merged latencies")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        for index in range(args.shards):
+            info = shard_info(args.dataset, index, args.shards, args.durations)
+            print(f"shard {info['index']}/{info['count']}: {info['cases']:>5} cases, "
+                  f"expected {info['expected_ms'] / 1000:.1f}s")
+        return
+
+    paths = expand(args.reports)
+    if not paths:
+        sys.exit(f"no shard reports match {args.reports}")
+    reports = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            reports.append(json.load(f))
+    try:
+        merged = merge_reports(reports, args.dataset)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    merged.write(args.out)
+    if args.junit_out:
+        merge_junit(expand(args.junit)).write(args.junit_out, encoding="utf-8", xml_declaration=True)
+    if args.durations:
+        update_durations([{"id": r.id, "latency_ms": r.latency_ms, "error": r.error, "skipped": r.skipped}
+                          for r in merged.cases.values()], args.durations)
+
+    summary = merged.summary()
+    print(f"📊 Merged {len(paths)} shards: {summary['total']['passed']}/{summary['total']['total']} passed, "
+          f"slowest shard {summary['duration_s']}s -> {args.out}")
+    for shard in merged.shards:
+        print(f"   shard {shard.get('index', '?')}/{shard.get('count', '?')}: {shard['cases']} cases "
+              f"in {shard['duration_s']}s (expected {shard.get('expected_ms', 0) / 1000:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+BatchBedrockClaude end to end with the LocalBatchRunner stand-in (no AWS).
+
+The processor answers proofreader prompts with a fixed verdict, forced tool
+calls (combined judge) with fixed scores, deepeval's metric steps with one
+"yes" verdict and everything else with an echo, so the tests cover job files,
+result mapping, record errors, the on-demand path for small windows and a
+golden suite run in batch mode.
+
+Run: pytest eval/deepeval/test_bedrock_batch.py
+"""
+import asyncio
+import io
+import json
+
+import pytest
+
+from bedrock_batch import BatchBedrockClaude, BatchJobError, LocalBatchRunner
+
+VERDICT = {"errors": [], "isValid": True}
+SCORES = {"FaithfulnessMetric": {"score": 0.9, "reason": "Grounded."},
+          "AnswerRelevancyMetric": {"score": 0.8, "reason": "On topic."}}
+# deepeval's own metric steps (combined judge calibration): one item each, judged "yes"
+METRIC_STEP = {"truths": ["unit is mm"], "claims": ["the entry is valid"], "statements": ["the entry is valid"],
+               "verdicts": [{"verdict": "yes", "reason": None}], "reason": "ok"}
+
+
+def process(model_id: str, model_input: dict) -> dict:
+    prompt = model_input["messages"][0]["content"]
+    if "fail" in prompt:
+        raise ValueError("model refused the record")
+    if "tools" in model_input:
+        content = [{"type": "tool_use", "id": "toolu_1", "name": model_input["tools"][0]["name"], "input": SCORES}]
+    elif prompt.startswith("Proofread"):
+        content = [{"type": "text", "text": json.dumps(VERDICT)}]
+    elif "JSON" in prompt:
+        content = [{"type": "text", "text": json.dumps(METRIC_STEP)}]
+    else:
+        content = [{"type": "text", "text": f"echo: {prompt}"}]
+    return {"content": content, "usage": {"input_tokens": 10, "output_tokens": 5}}
+
+
+class FakeOnDemandClient:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, body, modelId):
+        self.calls += 1
+        return {"body": io.BytesIO(json.dumps(process(modelId, json.loads(body))).encode())}
+
+
+@pytest.fixture
+def make_model(tmp_path, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "fake")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "fake")
+
+    def make(min_records: int = 1, cache_path: str = None) -> BatchBedrockClaude:
+        model = BatchBedrockClaude(
+            runner=LocalBatchRunner(process, str(tmp_path / "jobs")),
+            window_seconds=0.05, poll_seconds=0.01, min_records=min_records, job_dir=str(tmp_path / "jobs"),
+            cache_mode="off" if cache_path is None else "readwrite", cache_path=cache_path,
+        )
+        model.client = FakeOnDemandClient()
+        return model
+
+    return make
+
+
+def test_requests_of_one_window_share_a_job(make_model):
+    model = make_model()
+    prompts = [f"prompt {i % 30}" for i in range(40)]
+
+    async def run():
+        return await asyncio.gather(*(model.a_generate(p) for p in prompts))
+
+    assert asyncio.run(run()) == [f"echo: {p}" for p in prompts]
+    assert model.batch_stats == {"jobs": 1, "records": 30, "deduplicated": 10, "on_demand": 0, "failed_records": 0}
+    assert model.client.calls == 0
+
+
+def test_failed_record_only_fails_its_caller(make_model):
+    model = make_model()
+
+    async def run():
+        return await asyncio.gather(model.a_generate("ok"), model.a_generate("fail me"), return_exceptions=True)
+
+    ok, failed = asyncio.run(run())
+    assert ok == "echo: ok"
+    assert isinstance(failed, BatchJobError) and "model refused" in str(failed)
+    assert model.batch_stats["failed_records"] == 1
+
+
+def test_small_windows_run_on_demand(make_model):
+    model = make_model(min_records=10)
+
+    async def run():
+        return await asyncio.gather(*(model.a_generate(f"p{i}") for i in range(3)))
+
+    assert asyncio.run(run()) == ["echo: p0", "echo: p1", "echo: p2"]
+    assert (model.batch_stats["jobs"], model.batch_stats["on_demand"], model.client.calls) == (0, 3, 3)
+
+
+def test_cached_answers_skip_the_job(make_model, tmp_path):
+    cache_path = str(tmp_path / "responses.sqlite")
+
+    async def run(model):
+        return await asyncio.gather(*(model.a_generate(f"p{i}") for i in range(5)))
+
+    first = make_model(cache_path=cache_path)
+    assert asyncio.run(run(first)) == [f"echo: p{i}" for i in range(5)]
+
+    rerun = make_model(cache_path=cache_path)
+    assert asyncio.run(run(rerun)) == [f"echo: p{i}" for i in range(5)]
+    assert rerun.batch_stats["jobs"] == 0 and rerun.cache_stats()["hits"] == 5
+
+
+def test_golden_suite_in_batch_mode(make_model):
+    from golden_suite import run_suite
+
+    model = make_model()
+    cases = [{"id": f"case-{i}", "category": "true_positive", "input": f"materialNumber: ABC-1234{i}",
+              "expectedIsValid": True} for i in range(6)]
+    report = asyncio.run(run_suite(iter(cases), model, model, concurrency=len(cases),
+                                   prompt_template="Proofread:\n{{yaml_entry}}\n- unit: mm or kg",
+                                   judge_mode="combined"))
+
+    assert all(r.passed for r in report.cases.values()), [r.failure_reason() for r in report.cases.values()]
+    assert report.cases["case-0"].scores == {"FaithfulnessMetric": 0.9, "AnswerRelevancyMetric": 0.8}
+    # One job per wave: proofreader, combined judge, then the calibration cases' deepeval steps
+    # (truths/claims/statements, verdicts, reasons)
+    assert report.summary()["judge"]["calibrated"] == 2
+    assert model.batch_stats["jobs"] == 5 and model.batch_stats["on_demand"] == 0
@@ -0,0 +1,211 @@
+"""
+BedrockClaude concurrency test against a local fake Bedrock endpoint.
+
+The fake endpoint answers /model/{modelId}/invoke after a fixed latency and
+can throttle a share of the requests, so the tests cover both the async
+fan-out and the adaptive retry path without AWS access.
+
+Run: pytest eval/deepeval/test_bedrock_model.py -s
+"""
+import asyncio
+import contextvars
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bedrock_model import BedrockClaude
+
+LATENCY_SECONDS = 0.05
+PROMPTS = 64
+
+
+class FakeBedrock(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeBedrockHandler)
+        self.requests = 0
+        self.throttled = 0
+        # 0 = never throttle, n = answer every n-th request with a ThrottlingException
+        self.throttle_every = 0
+        self.lock = threading.Lock()
+
+
+class FakeBedrockHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests += 1
+            every = self.server.throttle_every
+            throttle = bool(every) and self.server.requests % every == 0
+            self.server.throttled += throttle
+
+        time.sleep(LATENCY_SECONDS)
+        if throttle:
+            payload = json.dumps({"message": "Too many requests, please wait before trying again."}).encode()
+            self.send_response(429)
+            self.send_header("x-amzn-ErrorType", "ThrottlingException")
+        else:
+            prompt = body["messages"][0]["content"]
+            payload = json.dumps({"content": [{"type": "text", "text": f"echo: {prompt}"}]}).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture(scope="module")
+def fake_bedrock(monkeypatch_module):
+    server = FakeBedrock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def endpoint(server: FakeBedrock) -> str:
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+@pytest.fixture(scope="module")
+def monkeypatch_module():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("AWS_ACCESS_KEY_ID", "fake")
+        mp.setenv("AWS_SECRET_ACCESS_KEY", "fake")
+        mp.delenv("AWS_SESSION_TOKEN", raising=False)
+        yield mp
+
+
+def run_batch(url: str, concurrency: int, prompts: int = PROMPTS) -> float:
+    model = BedrockClaude(max_in_flight=concurrency, endpoint_url=url, cache_mode="off")
+
+    async def main():
+        return await asyncio.gather(*(model.a_generate(f"prompt-{i}") for i in range(prompts)))
+
+    start = time.perf_counter()
+    outputs = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    assert outputs == [f"echo: prompt-{i}" for i in range(prompts)]
+    return elapsed
+
+
+def test_a_generate_scales_with_concurrency(fake_bedrock):
+    fake_bedrock.throttle_every = 0
+    timings = {c: run_batch(endpoint(fake_bedrock), c) for c in (1, 8, 32)}
+    speedups = {c: round(timings[1] / t, 1) for c, t in timings.items()}
+    print(f"\n⏱️  {PROMPTS} prompts, {LATENCY_SECONDS * 1000:.0f} ms latency: "
+          f"{ {c: round(t, 2) for c, t in timings.items()} } s, speedup {speedups}")
+
+    assert speedups[8] >= 4
+    assert speedups[32] >= speedups[8]
+
+
+def test_a_generate_retries_throttled_calls(fake_bedrock):
+    fake_bedrock.throttle_every = 8
+    fake_bedrock.throttled = 0
+
+    run_batch(endpoint(fake_bedrock), concurrency=8, prompts=24)
+
+    assert fake_bedrock.throttled > 0
+
+
+def test_response_cache_avoids_network_calls(fake_bedrock, tmp_path):
+    fake_bedrock.throttle_every = 0
+    cache_path = str(tmp_path / "responses.sqlite")
+    prompts = [f"cached-{i}" for i in range(3)]
+
+    first = BedrockClaude(endpoint_url=endpoint(fake_bedrock), cache_path=cache_path,
+                         cache_mode="readwrite")
+    assert [first.generate(p) for p in prompts] == [f"echo: {p}" for p in prompts]
+    assert first.cache_stats()["network_calls"] == 3
+
+    rerun = BedrockClaude(endpoint_url=endpoint(fake_bedrock), cache_path=cache_path, cache_mode="readonly")
+    assert [rerun.generate(p) for p in prompts] == [f"echo: {p}" for p in prompts]
+    stats = rerun.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["network_calls"]) == (3, 0, 0)
+
+
+class FakeStreamingClient:
+    """Mimics invoke_model_with_response_stream: Anthropic message events as chunk bytes."""
+
+    def invoke_model_with_response_stream(self, body, modelId):
+        events = [
+            {"type": "message_start", "message": {"usage": {"input_tokens": 12, "output_tokens": 1}}},
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Valid: "}},
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "true"}},
+            {"type": "message_delta", "usage": {"output_tokens": 4}},
+            {"type": "message_stop"},
+        ]
+
+        def chunks():
+            for event in events:
+                time.sleep(0.01)
+                yield {"chunk": {"bytes": json.dumps(event).encode()}}
+
+        return {"body": chunks()}
+
+
+def test_streaming_records_latency_metrics(monkeypatch_module):
+    model = BedrockClaude(cache_mode="off", streaming=True)
+    model.client = FakeStreamingClient()
+
+    assert model.generate("materialNumber: ABC-12345") == "Valid: true"
+    call = model.last_call
+    assert (call["input_tokens"], call["output_tokens"]) == (12, 4)
+    assert 0 < call["ttft_s"] < call["latency_s"]
+    assert call["output_tokens_per_second"] > 0
+
+    assert list(model.stream("materialNumber: ABC-12345")) == ["Valid: ", "true"]
+
+
+class FakeToolClient:
+    """Mimics invoke_model for a forced tool call: the answer is a tool_use content block."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def invoke_model(self, body, modelId):
+        self.bodies.append(json.loads(body))
+        content = [{"type": "tool_use", "id": "toolu_1", "name": "record_scores", "input": {"score": 0.8}}]
+        payload = json.dumps({"content": content, "usage": {"input_tokens": 30, "output_tokens": 9}}).encode()
+        return {"body": io.BytesIO(payload)}
+
+
+def test_generate_structured_forces_tool_call(monkeypatch_module):
+    model = BedrockClaude(cache_mode="off")
+    model.client = FakeToolClient()
+    tool = {"name": "record_scores", "description": "Scores", "input_schema": {"type": "object"}}
+
+    assert asyncio.run(model.a_generate_structured("grade this", tool)) == {"score": 0.8}
+    body = model.client.bodies[0]
+    assert body["tools"] == [tool]
+    assert body["tool_choice"] == {"type": "tool", "name": "record_scores"}
+
+
+def test_async_calls_keep_the_callers_context(monkeypatch_module):
+    request_id = contextvars.ContextVar("request_id", default=None)
+
+    class ContextClient(FakeToolClient):
+        def invoke_model(self, body, modelId):
+            self.seen = request_id.get()
+            return super().invoke_model(body, modelId)
+
+    model = BedrockClaude(cache_mode="off")
+    model.client = ContextClient()
+    tool = {"name": "record_scores", "description": "Scores", "input_schema": {"type": "object"}}
+
+    async def main():
+        request_id.set("eval-42")
+        return await model.a_generate_structured("grade this", tool)
+
+    assert asyncio.run(main()) == {"score": 0.8}
+    assert model.client.seen == "eval-42"
@@ -0,0 +1,136 @@
+"""
+Canonical entry keys and the golden suite's sharing of equivalent entries.
+
+The suite tests run a counting fake proofreader and fake metrics (no network),
+once within one dataset and once across two datasets through a response cache.
+
+Run: pytest eval/deepeval/test_canonical_entry.py
+"""
+import asyncio
+import json
+
+import pytest
+
+from canonical_entry import canonical, dedup_report, entry_key, iter_entries
+from golden_suite import run_suite
+
+ENTRY = "materialNumber: ABC-12345\ndescription: \"\"\nunit: kg"
+VALID = json.dumps({"errors": [], "isValid": True})
+
+
+@pytest.mark.parametrize("variant", [
+    "materialNumber: ABC-12345\ndescription: ''\nunit: kg",
+    "unit: kg\nmaterialNumber: 'ABC-12345'\ndescription: \"\"",
+    "# Leere Beschreibung\nmaterialNumber:   ABC-12345   \n\ndescription: \"\"  # Pflichtfeld\nunit: kg\n",
+])
+def test_equivalent_entries_share_a_key(variant):
+    assert entry_key(variant) == entry_key(ENTRY)
+
+
+@pytest.mark.parametrize("other", [
+    "materialNumber: 12345\ndescription: Bremsscheibe\nunit: mm",
+    "materialNumber: ABC-12345\ndescription: Bremsscheibe\nunit: mm\nunit: kg",
+    "materialNumber: ABC-12345\ndescription:\nunit: kg",
+    # A flow document looks different to the proofreader
+    "{materialNumber: ABC-12345, description: '', unit: kg}",
+])
+def test_different_entries_keep_their_own_key(other):
+    assert entry_key(other) != entry_key(ENTRY)
+
+
+@pytest.mark.parametrize("entry, other", [
+    # YAML 1.1 resolves these to equal values; the proofreader reads them as written
+    ("materialNumber: 012345", "materialNumber: 5349"),
+    ("valueRange:\n  min: 1_000\n  max: 2000", "valueRange:\n  min: 1000\n  max: 2000"),
+    ("isActive: yes", "isActive: true"),
+    ("isActive: no", "isActive: false"),
+    ("description: ~", "description:"),
+])
+def test_scalars_are_compared_as_written(entry, other):
+    assert entry_key(entry) != entry_key(other)
+
+
+def test_duplicate_keys_and_free_text_are_kept_as_text():
+    assert entry_key("materialNumber: '12345'") != entry_key("materialNumber: 12345")
+    assert canonical("unit: mm\nunit: kg  \n") == "text:unit: mm\nunit: kg"
+    assert canonical("\nPrüfe diesen Eintrag bitte.  \n\n") == "text:Prüfe diesen Eintrag bitte."
+
+
+def test_dedup_report_per_dataset(tmp_path):
+    golden = tmp_path / "golden.jsonl"
+    with golden.open("w") as f:
+        for i, entry in enumerate([ENTRY, ENTRY.replace('""', "''"), "unit: mm", "unit: mm"]):
+            f.write(json.dumps({"id": f"case-{i}", "category": "true_positive", "input": entry}) + "\n")
+    tests = tmp_path / "tests.yaml"
+    tests.write_text("- description: leer\n  vars:\n    yaml_entry: |\n      unit: kg\n      description: ''\n"
+                     "      materialNumber: ABC-12345\n- vars:\n    query: Keine VEEDS-Eingabe\n")
+
+    rows = dedup_report({str(path): list(iter_entries(str(path))) for path in (golden, tests)})
+    assert [(r["entries"], r["unique"], r["canonical_only"], r["dedup_ratio"], r["shared_with_earlier"])
+            for r in rows] == [(4, 2, 1, 0.5, 0), (1, 1, 0, 0.0, 1)]
+
+
+class CountingProofreader:
+    def __init__(self, cache=None):
+        self.prompts = []
+        self.cache = cache
+        self.model_id = "fake-proofreader"
+
+    async def a_generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        return VALID
+
+
+class FakeMetric:
+    measured = 0
+
+    def __init__(self, judge):
+        self.score = self.reason = None
+
+    async def a_measure(self, test_case, _show_indicator=False):
+        FakeMetric.measured += 1
+        self.score, self.reason = 0.9, "ok"
+
+    def is_successful(self):
+        return True
+
+
+def cases(entries):
+    return iter([{"id": f"case-{i}", "category": "true_negative", "input": entry, "expectedIsValid": True}
+                 for i, entry in enumerate(entries)])
+
+
+def run(entries, proofreader, **options):
+    return asyncio.run(run_suite(cases(entries), proofreader, None, prompt_template="Proofread:\n{{yaml_entry}}",
+                                 metrics_factory=lambda judge: [FakeMetric(judge)], **options))
+
+
+def test_equivalent_cases_share_generation_and_judging():
+    FakeMetric.measured = 0
+    proofreader = CountingProofreader()
+    entries = [ENTRY, ENTRY.replace('""', "''"), "# Kommentar\n" + ENTRY, "unit: mm"]
+    report = run(entries, proofreader)
+
+    assert len(proofreader.prompts) == 2 and FakeMetric.measured == 2
+    assert all(r.passed and r.scores == {"FakeMetric": 0.9} for r in report.cases.values())
+    assert report.cases["case-1"].reused == ["generator", "judge"]
+    assert report.summary()["dedup"] == {"cases": 4, "unique_entries": 2, "dedup_ratio": 0.5,
+                                         "generator_calls_shared": 2, "generator_cache_hits": 0,
+                                         "judged_cases_shared": 2}
+
+    run(entries, proofreader, dedup=False)
+    assert len(proofreader.prompts) == 6
+
+
+def test_cached_answers_are_reused_across_datasets(tmp_path):
+    from bedrock_model import ResponseCache
+
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    run([ENTRY, "unit: mm"], CountingProofreader(cache))
+
+    other_dataset = CountingProofreader(cache)
+    report = run(["unit: kg\ndescription: ''\nmaterialNumber: ABC-12345", "unit: m"], other_dataset)
+    assert other_dataset.prompts == ["Proofread:\nunit: m"]
+    assert report.cases["case-0"].reused == ["cache"]
+    assert report.summary()["dedup"]["generator_cache_hits"] == 1
@@ -0,0 +1,160 @@
+"""
+Combined judge against fake judge models (no network).
+
+FakeJudge answers the combined request with fixed scores (as tool input or
+as JSON text) and deepeval's own per-metric prompts with empty
+truths/claims/statements, so fallback and calibration run the real
+FaithfulnessMetric/AnswerRelevancyMetric code paths.
+
+Run: pytest eval/deepeval/test_combined_judge.py
+"""
+import asyncio
+import json
+
+import pytest
+from deepeval.metrics import AnswerRelevancyMetric, FaithfulnessMetric
+from deepeval.models.base_model import DeepEvalBaseLLM
+from deepeval.test_case import LLMTestCase
+
+from combined_judge import CombinedJudge, parse_scores
+
+SCORES = {
+    "FaithfulnessMetric": {"score": 0.9, "reason": "All claims follow from the rules."},
+    "AnswerRelevancyMetric": {"score": 0.4, "reason": "Most statements ignore the entry."},
+}
+# Answer to every deepeval step prompt: one truth/claim/statement, judged "yes", so both metrics score 1.0
+PER_METRIC_ANSWER = json.dumps({
+    "truths": ["unit is mm"], "claims": ["the entry is valid"], "statements": ["the entry is valid"],
+    "verdicts": [{"verdict": "yes", "reason": None}], "reason": "ok",
+})
+
+
+class FakeJudge(DeepEvalBaseLLM):
+    def __init__(self, combined_answer=None):
+        self.combined_answer = SCORES if combined_answer is None else combined_answer
+        self.prompts = []
+        super().__init__("fake-judge")
+
+    def load_model(self):
+        return self
+
+    def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if "Grade the actual output below on every metric" in prompt:
+            return self.combined_answer if isinstance(self.combined_answer, str) else json.dumps(self.combined_answer)
+        return PER_METRIC_ANSWER
+
+    async def a_generate(self, prompt: str) -> str:
+        return self.generate(prompt)
+
+    def get_model_name(self):
+        return "fake-judge"
+
+
+class FakeStructuredJudge(FakeJudge):
+    """Like BedrockClaude: the combined request is a forced tool call."""
+
+    async def a_generate_structured(self, prompt: str, tool: dict) -> dict:
+        assert set(tool["input_schema"]["required"]) == set(SCORES)
+        self.prompts.append(prompt)
+        return self.combined_answer
+
+
+def make_case() -> LLMTestCase:
+    return LLMTestCase(
+        input="materialNumber: ABC-12345\ndescription: Bremsscheibe\nunit: mm",
+        actual_output='{"errors": [], "isValid": true}',
+        retrieval_context=["materialNumber: Format ABC-12345", "unit: one of mm, kg, l"],
+    )
+
+
+def make_metrics(judge) -> list:
+    return [FaithfulnessMetric(threshold=0.7, model=judge), AnswerRelevancyMetric(threshold=0.7, model=judge)]
+
+
+def test_one_call_scores_all_metrics():
+    judge = FakeStructuredJudge()
+    combined = CombinedJudge(judge, calibration_cases=0)
+    metrics = make_metrics(judge)
+
+    assert asyncio.run(combined.measure(make_case(), metrics)) == "combined"
+    assert len(judge.prompts) == 1
+    assert [(m.score, m.is_successful()) for m in metrics] == [(0.9, True), (0.4, False)]
+    assert metrics[1].reason == SCORES["AnswerRelevancyMetric"]["reason"]
+
+    summary = combined.stats.summary()
+    assert (summary["calls"], summary["per_metric_calls"], summary["calls_saved"]) == (1, 7, 6)
+    assert summary["tokens_saved"] is None
+
+
+def test_text_answer_with_surrounding_prose():
+    judge = FakeJudge(combined_answer=f"Here are the scores:\n{json.dumps(SCORES)}\nDone.")
+    metrics = make_metrics(judge)
+
+    assert asyncio.run(CombinedJudge(judge, calibration_cases=0).measure(make_case(), metrics)) == "combined"
+    assert [m.score for m in metrics] == [0.9, 0.4]
+
+
+def test_unparseable_answer_falls_back_to_per_metric_calls():
+    judge = FakeStructuredJudge(combined_answer={"FaithfulnessMetric": {"score": "high"}})
+    combined = CombinedJudge(judge, calibration_cases=0)
+    metrics = make_metrics(judge)
+
+    assert asyncio.run(combined.measure(make_case(), metrics)) == "fallback"
+    assert [m.score for m in metrics] == [1.0, 1.0]
+    assert all(m.is_successful() for m in metrics)
+
+    summary = combined.stats.summary()
+    assert summary["fallbacks"] == 1
+    # A fallback costs the failed combined call on top of the per-metric calls
+    assert (summary["calls"], summary["per_metric_calls"], summary["calls_saved"]) == (8, 7, -1)
+
+
+class EmptyContentJudge(FakeStructuredJudge):
+    """Bedrock answered without content: response_text raises IndexError."""
+
+    async def a_generate_structured(self, prompt: str, tool: dict) -> dict:
+        self.prompts.append(prompt)
+        return [][0]
+
+
+def test_malformed_answer_falls_back_and_keeps_the_calibration_slot():
+    judge = EmptyContentJudge()
+    combined = CombinedJudge(judge, calibration_cases=1)
+
+    assert asyncio.run(combined.measure(make_case(), make_metrics(judge))) == "fallback"
+    assert combined.stats.calibrated == 0
+
+    judge = FakeStructuredJudge()
+    combined.judge = judge
+    assert asyncio.run(combined.measure(make_case(), make_metrics(judge))) == "combined"
+    summary = combined.stats.summary()
+    assert (summary["calibrated"], summary["agreement_rate"]) == (1, 0.5)
+
+
+def test_calibration_measures_tokens_and_agreement():
+    judge = FakeStructuredJudge()
+    combined = CombinedJudge(judge, calibration_cases=1)
+
+    async def run():
+        for _ in range(3):
+            await combined.measure(make_case(), make_metrics(judge))
+
+    asyncio.run(run())
+    summary = combined.stats.summary()
+    # 3 combined calls + 7 per-metric calls for the calibrated case, instead of 3 * 7
+    assert (summary["calls"], summary["per_metric_calls"], summary["calls_saved"]) == (10, 21, 11)
+    assert summary["tokens_saved"] > 0
+    # Per metric, Faithfulness agrees (both pass), AnswerRelevancy does not (0.4 vs 1.0)
+    assert summary["agreement_rate"] == 0.5
+
+
+@pytest.mark.parametrize("answer", [
+    "no json here",
+    {"FaithfulnessMetric": {"score": 1.2, "reason": ""}, "AnswerRelevancyMetric": {"score": 1, "reason": ""}},
+    {"FaithfulnessMetric": {"score": True, "reason": ""}, "AnswerRelevancyMetric": {"score": 1, "reason": ""}},
+    {"FaithfulnessMetric": {"score": 1, "reason": ""}},
+])
+def test_parse_scores_rejects_incomplete_answers(answer):
+    with pytest.raises(ValueError):
+        parse_scores(answer, list(SCORES))
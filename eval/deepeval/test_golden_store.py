@@ -0,0 +1,56 @@
+"""
+Golden dataset store: conversion, index lookups and lazy views.
+
+Run: pytest eval/deepeval/test_golden_store.py
+"""
+import json
+
+import golden_store
+from golden_store import GoldenStore, build_index
+
+with open("eval/golden_dataset.json", "r", encoding="utf-8") as f:
+    DATASET = json.load(f)
+
+
+def test_converted_store_matches_json_load(tmp_path):
+    with GoldenStore.open("eval/golden_dataset.json", store_dir=str(tmp_path)) as store:
+        assert list(store) == DATASET["testCases"]
+        assert store.metadata["version"] == DATASET["version"]
+        assert store.get("tp-001") == DATASET["testCases"][0]
+        assert store.get("missing") is None
+
+
+def test_convert_streams_across_chunk_boundaries(tmp_path, monkeypatch):
+    # Tiny chunks: every case, key and number is split between reads somewhere
+    monkeypatch.setattr(golden_store, "CHUNK_SIZE", 7)
+    path = tmp_path / "golden.json"
+    path.write_text(json.dumps({"version": "9", "testCases": DATASET["testCases"][:20], "total": 1e3}))
+
+    with GoldenStore.open(str(path), store_dir=str(tmp_path / "store")) as store:
+        assert list(store) == DATASET["testCases"][:20]
+        assert store.metadata["version"] == "9"
+        assert store.metadata["total"] == 1e3
+
+
+def test_views_filter_and_shard_without_overlap(tmp_path):
+    with GoldenStore.open("eval/golden_dataset.json", store_dir=str(tmp_path)) as store:
+        expected = [c["id"] for c in DATASET["testCases"] if c["category"] == "edge_case"]
+        assert list(store.view("edge_case").ids()) == expected
+        assert sum(store.categories().values()) == len(store)
+
+        shards = [set(store.view(shard=(i, 3)).ids()) for i in range(3)]
+        assert sum(len(s) for s in shards) == len(store)
+        assert set().union(*shards) == {c["id"] for c in DATASET["testCases"]}
+        assert set(store.view("true_positive").filter(shard=(0, 3)).ids()) <= shards[0]
+
+
+def test_jsonl_index_is_rebuilt_after_append(tmp_path):
+    path = tmp_path / "synthetic.jsonl"
+    path.write_text(json.dumps({"id": "syn-1", "input": "unit: mm"}) + "\n\n")
+    build_index(str(path))
+
+    with path.open("a") as f:
+        f.write(json.dumps({"id": "syn-2", "input": "unit: kg"}) + "\n")
+    with GoldenStore(str(path)) as store:
+        assert [c["id"] for c in store] == ["syn-1", "syn-2"]
+        assert store.get("syn-2")["input"] == "unit: kg"
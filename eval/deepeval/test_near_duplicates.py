@@ -0,0 +1,29 @@
+"""
+MinHash/LSH near-duplicate index used by generate_synthetic_data.py --stream.
+
+Run: pytest eval/deepeval/test_near_duplicates.py
+"""
+import json
+
+from near_duplicates import MinHashIndex
+
+ENTRY = "materialNumber: ABC-12345\ndescription: Bremsscheibe vorne links, innenbelüftet\nunit: mm"
+
+
+def test_near_duplicate_is_reported_with_its_key():
+    index = MinHashIndex()
+    assert index.add_if_new("original", ENTRY) is None
+    assert index.add_if_new("typo", ENTRY.replace("links", "linsk")) == "original"
+    assert index.add_if_new("whitespace", ENTRY.upper().replace("\n", "  \n")) == "original"
+    assert len(index) == 1
+
+
+def test_distinct_golden_inputs_are_kept():
+    with open("eval/golden_dataset.json", "r", encoding="utf-8") as f:
+        inputs = {case["input"] for case in json.load(f)["testCases"]}
+
+    index = MinHashIndex(threshold=0.95)
+    kept = [text for i, text in enumerate(sorted(inputs)) if index.add_if_new(str(i), text) is None]
+
+    # Only inputs differing in a few characters may collapse
+    assert len(kept) >= 0.8 * len(inputs)
@@ -1,80 +1,138 @@
+import asyncio
 import pytest
 import os
-from deepeval import assert_test
-from deepeval.test_case import LLMTestCase
-from deepeval.metrics import FaithfulnessMetric, AnswerRelevancyMetric
-from deepeval.models import GPTModel
+from golden_suite import DATASET_PATH, JUDGE_MODE, REPORT_PATH, iter_golden_cases, run_suite
 # from langfuse.deepeval import LangfuseCallbackHandler
 
+# Clients, the OTel exporter and deepeval/boto3 imports live in session fixtures:
+# collecting the tests (or importing this module) does not pay for them.
+
+
 # =============================================================================
 # OpenTelemetry Jaeger Tracing Configuration
 # =============================================================================
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource
-
-# Configure OpenTelemetry to export to Jaeger
-resource = Resource(attributes={
-    "service.name": "deepeval-service",
-    "service.version": "1.0.0",
-    "deployment.environment": "development"
-})
-
-# Initialize tracer provider
-tracer_provider = TracerProvider(resource=resource)
-trace.set_tracer_provider(tracer_provider)
-
-# Configure OTLP exporter to Jaeger (HTTP endpoint)
-otlp_exporter = OTLPSpanExporter(
-    endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
-    headers={}
-)
-
-# Add span processor
-span_processor = BatchSpanProcessor(otlp_exporter)
-tracer_provider.add_span_processor(span_processor)
-
-# Get tracer
-tracer = trace.get_tracer(__name__)
-
-# Initialize model and metrics
-# Note: GPT-4o is used as the 'Judge' model
-model = GPTModel(model="gpt-4o")
+@pytest.fixture(scope="session")
+def tracer_provider():
+    """Exports spans to Jaeger (OTLP/HTTP) while the suite runs, flushes at the end."""
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    # Configure OpenTelemetry to export to Jaeger
+    resource = Resource(attributes={
+        "service.name": "deepeval-service",
+        "service.version": "1.0.0",
+        "deployment.environment": "development"
+    })
+    provider = TracerProvider(resource=resource)
+    trace.set_tracer_provider(provider)
+
+    # Configure OTLP exporter to Jaeger (HTTP endpoint)
+    otlp_exporter = OTLPSpanExporter(
+        endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+        headers={}
+    )
+    provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
+    yield provider
+    provider.force_flush()
+
+
+# Initialize models
+def bedrock_model():
+    """BedrockClaude, or its batch-inference variant for nightly runs (BEDROCK_BATCH_MODE=bedrock|local)."""
+    from bedrock_batch import BATCH_MODE, BatchBedrockClaude
+    from bedrock_model import BedrockClaude
+
+    return BedrockClaude() if BATCH_MODE == "off" else BatchBedrockClaude()
+
+
+# Note: GPT-4o is used as the 'Judge' model, Claude on Bedrock is the proofreader under test.
+# The combined judge mode uses Claude on Bedrock as judge too (structured output via tool use).
+@pytest.fixture(scope="session")
+def judge_model():
+    if JUDGE_MODE == "combined":
+        return bedrock_model()
+
+    from deepeval.models import GPTModel
+
+    return GPTModel(model="gpt-4o")
+
+
+@pytest.fixture(scope="session")
+def proofreader():
+    return bedrock_model()
+
+
 # langfuse_handler = LangfuseCallbackHandler()
 
-def test_proofreader_logic():
-    """Test proofreader logic with OpenTelemetry tracing to Jaeger"""
-    with tracer.start_as_current_span("test_proofreader_logic") as span:
-        # Example input and output (normally this would come from your real application)
-        input_text = "materialNumber: ABC-12345\ndescription: Test Engine\nunit: m"
-        actual_output = "Valid: true\nErrors: 0\nSuggestions: None"
-        retrieval_context = ["The materialNumber must follow the pattern [A-Z]{3}-\\d{5}.", "Unit 'm' is valid for length components."]
-
-        # Add span attributes
-        span.set_attribute("test.input_size", len(input_text))
-        span.set_attribute("test.model", "gpt-4o")
-        span.set_attribute("test.framework", "deepeval")
-
-        # Define Metrics
-        # Faithfulness: Does the answer match the context/facts?
-        faithfulness_metric = FaithfulnessMetric(threshold=0.7, model=model)
-        # Relevancy: Is the answer relevant to the input?
-        relevancy_metric = AnswerRelevancyMetric(threshold=0.7, model=model)
-
-        test_case = LLMTestCase(
-            input=input_text,
-            actual_output=actual_output,
-            retrieval_context=retrieval_context
-        )
-
-        # Execute tests with Langfuse callback
-        # This automatically pushes metrics to Langfuse
-        # assert_test(test_case, [faithfulness_metric, relevancy_metric], callbacks=[langfuse_handler])
-        assert_test(test_case, [faithfulness_metric, relevancy_metric])
-        
-        span.set_attribute("test.status", "passed")
+
+# DEEPEVAL_SHARD=i/K runs only the i-th of K shards (shards.py; merge the reports afterwards)
+SHARD = os.getenv("DEEPEVAL_SHARD")
+
+
+def golden_cases():
+    if not SHARD:
+        return iter_golden_cases(DATASET_PATH)
+    from shards import iter_shard, parse_shard
+
+    return iter_shard(DATASET_PATH, *parse_shard(SHARD))
+
+
+# Case ids are read at collection time so every golden case becomes its own test
+CASE_IDS = [case["id"] for case in golden_cases()]
+
+
+@pytest.fixture(scope="module")
+def golden_report(tracer_provider, proofreader, judge_model):
+    """Runs the whole golden dataset concurrently once; the tests below only look up results."""
+    batch = hasattr(proofreader, "batch_stats")
+    options = {}
+    if batch:
+        # A batch job holds what is in flight, so every case has to be able to wait at once
+        options["concurrency"] = max(len(CASE_IDS), 1)
+    shard = None
+    if SHARD:
+        from shards import parse_shard, shard_info
+
+        # Recorded before the run: the merge checks that all shards planned with the same history
+        shard = shard_info(DATASET_PATH, *parse_shard(SHARD))
+    report = asyncio.run(run_suite(golden_cases(), proofreader, judge_model, **options))
+    report.shard = shard
+    yield report
+
+    report.write(REPORT_PATH)
+    summary = report.summary()
+    print(f"\n📊 Golden dataset: {summary['total']['passed']}/{summary['total']['total']} passed "
+          f"in {summary['duration_s']}s (concurrency {summary['concurrency']})")
+    for category, stats in summary["categories"].items():
+        print(f"   {category:<15} pass rate {stats['pass_rate']:.0%}  latency {stats['latency_ms']}")
+    rules = summary["rules"]
+    if rules["mode"] != "off":
+        print(f"   Rules ({rules['mode']}): {rules['definitive']} definitive, "
+              f"{rules['generator_calls_avoided']} LLM calls and {rules['judged_cases_avoided']} judged cases avoided, "
+              f"agreement {rules['agreement_rate']}")
+    if summary["judge"]["mode"] == "combined":
+        from combined_judge import format_summary
+
+        print(f"   Judge (combined): {format_summary(summary['judge'])}")
+    dedup = summary["dedup"]
+    if dedup["cases"]:
+        print(f"   Dedup: {dedup['unique_entries']} distinct of {dedup['cases']} entries "
+              f"(ratio {dedup['dedup_ratio']:.0%}), {dedup['generator_calls_shared']} proofreader calls and "
+              f"{dedup['judged_cases_shared']} judgings shared, {dedup['generator_cache_hits']} answers from cache")
+    if batch:
+        print(f"   Bedrock batch: {proofreader.batch_stats}")
+    print(f"   Report: {REPORT_PATH}")
+
+
+@pytest.mark.parametrize("case_id", CASE_IDS)
+def test_golden_case(golden_report, case_id):
+    """Proofreader output for one golden case: isValid matches and Faithfulness/Relevancy pass."""
+    result = golden_report.cases[case_id]
+    assert result.passed, result.failure_reason()
+
 
 if __name__ == "__main__":
     # To run this manually without pytest
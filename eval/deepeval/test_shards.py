@@ -0,0 +1,114 @@
+"""
+Golden dataset sharding: deterministic, duration-balanced plans and the merge of shard results.
+
+Run: pytest eval/deepeval/test_shards.py
+"""
+import json
+
+import pytest
+
+from golden_store import GoldenStore
+from golden_suite import CaseResult, SuiteReport
+from shards import assign, iter_shard, merge_junit, merge_reports, shard_info, update_durations
+
+CASES = 60
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "golden.jsonl"
+    with path.open("w") as f:
+        for i in range(CASES):
+            f.write(json.dumps({"id": f"case-{i:03d}", "category": ["true_positive", "edge_case"][i % 2],
+                                "input": f"unit: mm #{i}", "expectedIsValid": True}) + "\n")
+    return str(path)
+
+
+def durations_for(cases: int) -> dict:
+    # A few slow cases dominate, like judge-heavy edge cases do
+    return {f"case-{i:03d}": 20000.0 if i % 10 == 0 else 1000.0 + i for i in range(cases)}
+
+
+def test_without_history_shards_split_evenly(dataset, tmp_path):
+    no_history = str(tmp_path / "missing.json")
+    shards = [[c["id"] for c in iter_shard(dataset, index, 7, no_history)] for index in range(7)]
+    assert sorted(sum(shards, [])) == [f"case-{i:03d}" for i in range(CASES)]
+    assert {len(shard) for shard in shards} == {8, 9}
+    with GoldenStore.open(dataset) as store:
+        assert assign(store, 7, {})[0].tolist() == assign(store, 7, {})[0].tolist()
+
+
+def test_history_balances_shards_and_plans_are_stable(dataset, tmp_path):
+    durations_path = str(tmp_path / "durations.json")
+    update_durations([{"id": case_id, "latency_ms": ms} for case_id, ms in durations_for(CASES).items()],
+                     durations_path)
+
+    shards = [[c["id"] for c in iter_shard(dataset, index, 4, durations_path)] for index in range(4)]
+    assert sorted(sum(shards, [])) == [f"case-{i:03d}" for i in range(CASES)]
+    assert shards == [[c["id"] for c in iter_shard(dataset, index, 4, durations_path)] for index in range(4)]
+
+    durations = durations_for(CASES)
+    balanced = [sum(durations[case_id] for case_id in shard) for shard in shards]
+    with GoldenStore.open(dataset) as store:
+        hashed = [sum(durations[case_id] for case_id in store.view(shard=(index, 4)).ids()) for index in range(4)]
+    assert max(balanced) - min(balanced) < 20000
+    assert max(balanced) <= max(hashed)
+    assert shard_info(dataset, 0, 4, durations_path)["expected_ms"] == pytest.approx(balanced[0])
+
+
+def shard_report(results: list, index: int, count: int) -> dict:
+    report = SuiteReport(cases={r.id: r for r in results}, duration_s=10.0 + index, concurrency=8,
+                         shard={"index": index + 1, "count": count, "durations": "abc", "cases": len(results)})
+    return json.loads(json.dumps({"summary": report.summary(),
+                                  "cases": [vars(r) for r in results], "shard": report.shard}))
+
+
+def case_results() -> list:
+    return [CaseResult(id=f"case-{i:03d}", category=["true_positive", "edge_case"][i % 2], passed=i % 7 != 0,
+                       is_valid_match=True, scores={"FaithfulnessMetric": 0.9}, latency_ms=100.0 + i * 13)
+            for i in range(CASES)]
+
+
+def test_merged_report_matches_a_single_node_run(dataset):
+    results = case_results()
+    single = SuiteReport(cases={r.id: r for r in results}, duration_s=12.0, concurrency=8).summary()
+
+    reports = [shard_report(results[i::3], i, 3) for i in range(3)]
+    merged = merge_reports(reports, dataset)
+    assert list(merged.cases) == [r.id for r in results]
+    assert merged.summary() == single
+    assert [s["cases"] for s in merged.shards] == [20, 20, 20]
+
+
+def unsharded(report: dict) -> dict:
+    return {key: value for key, value in report.items() if key != "shard"}
+
+
+@pytest.mark.parametrize("break_reports, message", [
+    (lambda reports: reports[:2], "shards missing or duplicated"),
+    (lambda reports: reports + [reports[0]], "shards missing or duplicated"),
+    (lambda reports: [unsharded(r) for r in reports[:2]], "cases have no result"),
+    (lambda reports: [unsharded(r) for r in reports + [reports[0]]], "more than one shard"),
+    (lambda reports: [reports[0], reports[1], {**reports[2], "shard": {**reports[2]["shard"], "durations": "x"}}],
+     "planned differently"),
+])
+def test_merge_rejects_incomplete_or_inconsistent_shards(dataset, break_reports, message):
+    results = case_results()
+    reports = [shard_report(results[i::3], i, 3) for i in range(3)]
+    with pytest.raises(ValueError, match=message):
+        merge_reports(break_reports(reports), dataset)
+
+
+def test_junit_files_are_merged(tmp_path):
+    paths = []
+    for index, (tests, failures) in enumerate([(3, 1), (2, 0)]):
+        path = tmp_path / f"junit-{index}.xml"
+        cases = "".join(f'<testcase classname="test_proofreader" name="test_golden_case[s{index}-{i}]" time="1"/>'
+                        for i in range(tests))
+        path.write_text(f'<testsuites><testsuite name="pytest" tests="{tests}" failures="{failures}" errors="0" '
+                        f'skipped="0" time="{5 + index}">{cases}</testsuite></testsuites>')
+        paths.append(str(path))
+
+    suite = merge_junit(paths).getroot().find("testsuite")
+    assert (suite.get("tests"), suite.get("failures"), suite.get("time")) == ("5", "1", "6.000")
+    assert len(suite.findall("testcase")) == 5
@@ -0,0 +1,63 @@
+"""
+Prompt tournament with a fake proofreader and judge.
+
+Each fake prompt has a hidden quality; the judge prefers the better answer
+with 85 % probability. The tournament has to find the best prompt and stay
+well below the judge calls of a full round robin.
+
+Run: pytest eval/deepeval/test_tournament.py -s
+"""
+import asyncio
+import random
+
+from tournament import Comparison, PromptVariant, Tournament, bradley_terry, parse_verdict
+
+QUALITY = {f"prompt-{i}": i for i in range(10)}
+
+
+class FakeProofreader:
+    async def a_generate(self, prompt):
+        name, entry = prompt.split("\n\n", 1)
+        return f"{name}|{entry}"
+
+
+class FakeJudge:
+    def __init__(self, seed=1):
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def a_generate(self, prompt):
+        self.calls += 1
+        answer_a = prompt.split("Answer A:\n")[1].split("|")[0]
+        answer_b = prompt.split("Answer B:\n")[1].split("|")[0]
+        better_a = QUALITY[answer_a] > QUALITY[answer_b]
+        return "A" if better_a == (self.random.random() < 0.85) else "B"
+
+
+def test_bradley_terry_orders_by_wins():
+    comparisons = [Comparison("x", "y", str(i), "x", 1) for i in range(8)]
+    comparisons += [Comparison("x", "y", "t", None, 1), Comparison("y", "z", "1", "y", 1)]
+    ratings = bradley_terry(["x", "y", "z"], comparisons)
+    assert ratings["x"] > ratings["y"] > ratings["z"]
+
+
+def test_parse_verdict_only_at_start_or_end():
+    assert parse_verdict("B") == "B"
+    assert parse_verdict("**A** - it finds both errors.") == "A"
+    assert parse_verdict("Both miss the unit error. Verdict: TIE") == "T"
+    assert parse_verdict("Answer B misses the unit error, so Answer A is better.") is None
+    assert parse_verdict("The better answer explains each error.") is None
+
+
+def test_tournament_finds_best_prompt_with_fewer_judge_calls():
+    variants = [PromptVariant(name, name) for name in QUALITY]
+    cases = [{"id": f"case-{i}", "input": f"materialNumber: ABC-{i:05d}"} for i in range(40)]
+    judge = FakeJudge()
+
+    report = asyncio.run(Tournament(variants, cases, FakeProofreader(), judge).run())
+
+    print(f"\n⚔️ judge calls {report['judge_calls']} vs round robin {report['round_robin_judge_calls']}")
+    assert report["standings"][0]["prompt"] == "prompt-9"
+    assert judge.calls == report["judge_calls"]
+    assert report["judge_calls"] < report["round_robin_judge_calls"] / 3
+    assert sum(row["dropped_in_round"] is not None for row in report["standings"]) == len(QUALITY) - 1
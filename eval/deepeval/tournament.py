@@ -0,0 +1,278 @@
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# =============================================================================
+# Prompt Tournament
+# =============================================================================
+# Ranks N prompt variants on M golden cases by pairwise judge comparisons.
+# All N×M proofreader outputs are generated concurrently up front; judging runs
+# in rounds. Each round compares every active prompt with the current leader
+# (plus rating neighbours among the rest) on fresh cases, refits a
+# Bradley-Terry model and drops prompts that clearly lose against the leader.
+# =============================================================================
+
+CASES_PER_ROUND = int(os.getenv("ARENA_CASES_PER_ROUND", "5"))
+MIN_GAMES = int(os.getenv("ARENA_MIN_GAMES", "5"))
+CONCURRENCY = int(os.getenv("ARENA_CONCURRENCY", "16"))
+
+JUDGE_TEMPLATE = """You are reviewing two proofreader answers for the same VEEDS YAML entry.
+The better answer detects exactly the real rule violations of the entry (no missed errors,
+no invented errors), sets isValid correctly and explains each error precisely.
+
+YAML entry:
+{entry}
+
+Answer A:
+{output_a}
+
+Answer B:
+{output_b}
+
+Which answer is better? Reply with a single letter: A, B, or T for a tie."""
+
+# The verdict has to open or close the reply; a letter elsewhere ("Answer B misses...") is not one
+VERDICT_PATTERNS = (
+    re.compile(r"^\s*\**(A|B|T|TIE)\b"),
+    re.compile(r"\b(A|B|T|TIE)\**[.!]?\s*$"),
+)
+
+
+@dataclass
+class PromptVariant:
+    name: str
+    template: str
+
+    def render(self, entry: str) -> str:
+        if "{{yaml_entry}}" in self.template:
+            return self.template.replace("{{yaml_entry}}", entry)
+        return f"{self.template}\n\n{entry}"
+
+
+@dataclass
+class Comparison:
+    a: str
+    b: str
+    case_id: str
+    # Name of the winning variant, None for a tie (or an unparseable verdict)
+    winner: Optional[str]
+    round: int
+
+
+def load_variants(specs: List[str]) -> List[PromptVariant]:
+    """Variants from prompt files or Langfuse prompt versions ("langfuse:name@version")."""
+    variants = []
+    for spec in specs:
+        if spec.startswith("langfuse:"):
+            from langfuse import Langfuse
+
+            name, _, version = spec[len("langfuse:"):].partition("@")
+            prompt = Langfuse().get_prompt(name, version=int(version) if version else None)
+            variants.append(PromptVariant(f"{name}@v{prompt.version}", prompt.prompt))
+        else:
+            with open(spec, "r", encoding="utf-8") as f:
+                variants.append(PromptVariant(os.path.basename(spec), f.read()))
+    return variants
+
+
+def parse_verdict(text: str) -> Optional[str]:
+    """"A", "B" or "T" from the judge reply, None if it neither starts nor ends with a verdict."""
+    for pattern in VERDICT_PATTERNS:
+        match = pattern.search(text or "")
+        if match:
+            return match.group(1)[0]
+    return None
+
+
+def bradley_terry(names: List[str], comparisons: List[Comparison], iterations: int = 200) -> Dict[str, float]:
+    """
+    Fits Bradley-Terry strengths with the MM algorithm (Hunter 2004) and returns
+    them on the Elo scale (1500 = average). Ties count half a win for both sides.
+    Every prompt also plays one virtual tie against an average opponent, which
+    keeps unbeaten or winless prompts finite.
+    """
+    wins = {n: 0.5 for n in names}
+    games: Dict[Tuple[str, str], int] = {}
+    for c in comparisons:
+        if c.winner is None:
+            wins[c.a] += 0.5
+            wins[c.b] += 0.5
+        else:
+            wins[c.winner] += 1
+        games[(c.a, c.b)] = games.get((c.a, c.b), 0) + 1
+        games[(c.b, c.a)] = games.get((c.b, c.a), 0) + 1
+
+    strength = {n: 1.0 for n in names}
+    for _ in range(iterations):
+        updated = {}
+        for i in names:
+            denominator = 1 / (strength[i] + 1)
+            denominator += sum(count / (strength[i] + strength[j]) for (x, j), count in games.items() if x == i)
+            updated[i] = wins[i] / denominator
+        # Normalize to a geometric mean of 1
+        scale = math.exp(sum(math.log(s) for s in updated.values()) / len(updated))
+        delta = max(abs(updated[n] / scale - strength[n]) for n in names)
+        strength = {n: s / scale for n, s in updated.items()}
+        if delta < 1e-9:
+            break
+
+    return {n: 1500 + 400 * math.log10(s) for n, s in strength.items()}
+
+
+def wilson_upper(score: float, games: int, z: float = 1.96) -> float:
+    if games == 0:
+        return 1.0
+    p = score / games
+    centre = p + z * z / (2 * games)
+    margin = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games))
+    return (centre + margin) / (1 + z * z / games)
+
+
+class Tournament:
+    def __init__(
+        self,
+        variants: List[PromptVariant],
+        cases: List[dict],
+        generator,
+        judge,
+        cases_per_round: int = CASES_PER_ROUND,
+        min_games: int = MIN_GAMES,
+        max_rounds: Optional[int] = None,
+        concurrency: int = CONCURRENCY,
+        seed: int = 0,
+    ):
+        if len(variants) < 2:
+            raise ValueError("A tournament needs at least two prompt variants")
+        self.variants = {v.name: v for v in variants}
+        self.cases = {c["id"]: c for c in cases}
+        self.generator = generator
+        self.judge = judge
+        self.cases_per_round = cases_per_round
+        self.min_games = min_games
+        self.max_rounds = max_rounds
+        self.semaphore_limit = concurrency
+        self.random = random.Random(seed)
+
+        self.outputs: Dict[Tuple[str, str], str] = {}
+        self.comparisons: List[Comparison] = []
+        self.ratings = {name: 1500.0 for name in self.variants}
+        # The first variant (e.g. the production prompt) is the initial leader
+        self.active = list(self.variants)
+        self.dropped: Dict[str, int] = {}
+        self.judge_calls = 0
+        self._case_order: Dict[Tuple[str, str], List[str]] = {}
+
+    async def _bounded(self, semaphore: asyncio.Semaphore, coro):
+        async with semaphore:
+            return await coro
+
+    @staticmethod
+    async def _call(model, prompt: str) -> str:
+        result = await model.a_generate(prompt)
+        # deepeval's native models return (text, cost)
+        return result[0] if isinstance(result, tuple) else result
+
+    async def generate_outputs(self):
+        semaphore = asyncio.Semaphore(self.semaphore_limit)
+        keys = [(v, c) for v in self.variants for c in self.cases]
+        outputs = await asyncio.gather(*(
+            self._bounded(semaphore, self._call(self.generator, self.variants[v].render(self.cases[c]["input"])))
+            for v, c in keys
+        ))
+        self.outputs = dict(zip(keys, outputs))
+
+    def _next_cases(self, a: str, b: str) -> List[str]:
+        key = tuple(sorted((a, b)))
+        if key not in self._case_order:
+            order = list(self.cases)
+            self.random.shuffle(order)
+            self._case_order[key] = order
+        remaining = self._case_order[key]
+        taken, self._case_order[key] = remaining[:self.cases_per_round], remaining[self.cases_per_round:]
+        return taken
+
+    def leader(self) -> str:
+        return max(self.active, key=lambda n: self.ratings[n])
+
+    def schedule_round(self) -> List[Tuple[str, str, str]]:
+        leader = self.leader()
+        challengers = sorted((n for n in self.active if n != leader), key=lambda n: -self.ratings[n])
+        pairs = [(leader, n) for n in challengers] + list(zip(challengers, challengers[1:]))
+        return [(a, b, case_id) for a, b in pairs for case_id in self._next_cases(a, b)]
+
+    async def compare(self, a: str, b: str, case_id: str, round_no: int) -> Comparison:
+        # Deterministic position swap against the judge's position bias
+        swap = hashlib.sha256(f"{a}|{b}|{case_id}".encode()).digest()[0] % 2 == 1
+        first, second = (b, a) if swap else (a, b)
+        prompt = JUDGE_TEMPLATE.format(
+            entry=self.cases[case_id]["input"],
+            output_a=self.outputs[(first, case_id)],
+            output_b=self.outputs[(second, case_id)],
+        )
+        verdict = parse_verdict(await self._call(self.judge, prompt))
+        winner = {"A": first, "B": second}.get(verdict)
+        return Comparison(a=a, b=b, case_id=case_id, winner=winner, round=round_no)
+
+    def head_to_head(self, name: str, opponent: str) -> Tuple[float, int]:
+        score, games = 0.0, 0
+        for c in self.comparisons:
+            if {c.a, c.b} == {name, opponent}:
+                games += 1
+                score += 0.5 if c.winner is None else float(c.winner == name)
+        return score, games
+
+    def drop_losers(self, round_no: int):
+        leader = self.leader()
+        for name in [n for n in self.active if n != leader]:
+            score, games = self.head_to_head(name, leader)
+            if games >= self.min_games and wilson_upper(score, games) < 0.5:
+                self.active.remove(name)
+                self.dropped[name] = round_no
+
+    async def run(self) -> dict:
+        await self.generate_outputs()
+        semaphore = asyncio.Semaphore(self.semaphore_limit)
+        round_no = 0
+
+        while len(self.active) > 1 and (self.max_rounds is None or round_no < self.max_rounds):
+            round_no += 1
+            matches = self.schedule_round()
+            if not matches:
+                break
+            self.judge_calls += len(matches)
+            self.comparisons += await asyncio.gather(*(
+                self._bounded(semaphore, self.compare(a, b, case_id, round_no)) for a, b, case_id in matches
+            ))
+            self.ratings = bradley_terry(list(self.variants), self.comparisons)
+            self.drop_losers(round_no)
+
+        return self.report(round_no)
+
+    def report(self, rounds: int) -> dict:
+        n, m = len(self.variants), len(self.cases)
+        standings = []
+        for name in sorted(self.variants, key=lambda x: -self.ratings[x]):
+            played = [c for c in self.comparisons if name in (c.a, c.b)]
+            wins = sum(c.winner == name for c in played)
+            ties = sum(c.winner is None for c in played)
+            standings.append({
+                "prompt": name,
+                "rating": round(self.ratings[name], 1),
+                "games": len(played),
+                "wins": wins,
+                "losses": len(played) - wins - ties,
+                "ties": ties,
+                "dropped_in_round": self.dropped.get(name),
+            })
+        return {
+            "standings": standings,
+            "rounds": rounds,
+            "generation_calls": n * m,
+            "judge_calls": self.judge_calls,
+            "round_robin_judge_calls": n * (n - 1) // 2 * m,
+        }
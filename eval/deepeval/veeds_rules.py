@@ -0,0 +1,189 @@
+"""
+Deterministic pre-validator for VEEDS YAML entries (spec 2.1, eval/prompt.txt).
+
+Checks the rules of the proofreader prompt in Python and returns errors in
+the proofreader's own shape ({field, message, severity}). A verdict is
+"definitive" only if every field could be decided by the rules; anything
+the rules cannot judge (unparseable YAML, unknown keys, unusual units) is
+left to the LLM.
+
+Run: python eval/deepeval/veeds_rules.py [--report eval/results/deepeval-golden-report.json]
+"""
+import argparse
+import json
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import yaml
+
+MATERIAL_NUMBER_PATTERN = re.compile(r"^[A-Z]{3}-\d{5}$")
+DESCRIPTION_MAX_LENGTH = 200
+CATEGORIES = ("Motor", "Bremsanlage", "Fahrwerk", "Elektrik", "Karosserie", "Antrieb")
+KNOWN_FIELDS = ("materialNumber", "description", "unit", "valueRange", "category")
+
+# Units named in the prompt plus common SI (derived) units and prefixed forms
+BASE_UNITS = ("g", "m", "l", "s", "A", "V", "W", "N", "Pa", "Hz", "J", "Wh", "Ah", "bar", "Ω", "K", "t", "h")
+PREFIXES = ("", "k", "M", "G", "m", "µ", "n", "c", "d", "h")
+KNOWN_UNITS = {p + u for p in PREFIXES for u in BASE_UNITS} | {
+    "Nm", "°C", "%", "min", "rpm", "1/min", "km/h", "m/s", "m/s²", "l/min", "l/h", "kg/m³",
+    "m²", "m³", "mm²", "cm²", "cm³", "dm³", "ml", "kWh", "mAh", "kN", "kNm", "Nm/s",
+}
+# Letters only, but not a unit: "bananas", "xyz", "meter" (written-out names are not the symbol)
+PLAIN_WORD = re.compile(r"^[A-Za-zÄÖÜäöüß]+$")
+
+
+@dataclass
+class RuleVerdict:
+    errors: List[dict] = field(default_factory=list)
+    # Fields (or "entry") the rules could not decide; non-empty = ask the LLM
+    undecided: List[str] = field(default_factory=list)
+
+    @property
+    def definitive(self) -> bool:
+        return not self.undecided
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def error(self, field_name: str, message: str, severity: str = "error"):
+        self.errors.append({"field": field_name, "message": message, "severity": severity})
+
+    def as_output(self) -> dict:
+        return {"errors": self.errors, "isValid": self.is_valid}
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def _check_material_number(value, verdict: RuleVerdict):
+    if value is None or str(value).strip() == "":
+        verdict.error("materialNumber", "materialNumber fehlt (erforderlich, Format XXX-NNNNN)")
+        return
+    text = str(value)
+    if MATERIAL_NUMBER_PATTERN.match(text):
+        return
+    if MATERIAL_NUMBER_PATTERN.match(text.upper()):
+        verdict.error("materialNumber", f"'{text}' enthält Kleinbuchstaben, erwartet Großbuchstaben im Format XXX-NNNNN",
+                      "warning")
+    else:
+        verdict.error("materialNumber", f"'{text}' entspricht nicht dem Format XXX-NNNNN "
+                                        "(3 Großbuchstaben A-Z, Bindestrich, 5 Ziffern) – ungültig")
+
+
+def _check_description(value, verdict: RuleVerdict):
+    if isinstance(value, (dict, list)):
+        verdict.undecided.append("description")
+        return
+    text = "" if value is None else str(value)
+    if not text.strip():
+        verdict.error("description", "description darf nicht leer sein (erforderlich)")
+    elif len(text) > DESCRIPTION_MAX_LENGTH:
+        verdict.error("description", f"description ist zu lang: {len(text)} Zeichen, max. {DESCRIPTION_MAX_LENGTH}")
+
+
+def _check_unit(value, verdict: RuleVerdict):
+    if value is None or str(value).strip() == "":
+        verdict.error("unit", "unit fehlt (erforderlich, gültige SI-Einheit)")
+        return
+    text = str(value).strip()
+    if text in KNOWN_UNITS:
+        return
+    if PLAIN_WORD.match(text):
+        verdict.error("unit", f"'{text}' ist keine gültige SI-Einheit – ungültig")
+    else:
+        # e.g. "m^2" or "°F": plausible notation, let the LLM decide
+        verdict.undecided.append("unit")
+
+
+def _check_value_range(value, verdict: RuleVerdict):
+    if not isinstance(value, dict) or set(value) != {"min", "max"}:
+        verdict.undecided.append("valueRange")
+        return
+    low, high = _number(value["min"]), _number(value["max"])
+    if low is None or high is None:
+        verdict.error("valueRange", "valueRange: min und max müssen Zahlen sein")
+    elif low > high:
+        verdict.error("valueRange", f"valueRange ungültig: min ({value['min']}) ist größer als max ({value['max']})")
+    elif low == high:
+        verdict.error("valueRange", f"valueRange: min und max sind gleich ({value['min']}), kein echter Bereich",
+                      "warning")
+
+
+def _check_category(value, verdict: RuleVerdict):
+    if str(value) not in CATEGORIES:
+        verdict.error("category", f"'{value}' ist keine gültige Kategorie ({', '.join(CATEGORIES)})")
+
+
+def validate_entry(entry: str) -> RuleVerdict:
+    verdict = RuleVerdict()
+    try:
+        data = yaml.safe_load(entry)
+    except yaml.YAMLError:
+        verdict.undecided.append("entry")
+        return verdict
+    # Free text, wrapped payloads ({"yamlEntry": ...}) and unknown fields are for the LLM
+    if not isinstance(data, dict) or not set(data) <= set(KNOWN_FIELDS):
+        verdict.undecided.append("entry")
+        return verdict
+
+    _check_material_number(data.get("materialNumber"), verdict)
+    _check_description(data.get("description"), verdict)
+    _check_unit(data.get("unit"), verdict)
+    if "valueRange" in data:
+        _check_value_range(data["valueRange"], verdict)
+    if "category" in data:
+        _check_category(data["category"], verdict)
+    return verdict
+
+
+def agrees(verdict: RuleVerdict, output: dict) -> bool:
+    """Same isValid and the same set of flagged fields as a proofreader output."""
+    fields = {e.get("field") for e in output.get("errors") or []}
+    return output.get("isValid") == verdict.is_valid and fields == {e["field"] for e in verdict.errors}
+
+
+def main():
+    from golden_store import iter_cases
+
+    parser = argparse.ArgumentParser(description="VEEDS rule pre-validator on the golden dataset")
+    parser.add_argument("--report", help="golden_suite report with LLM outputs to compare against")
+    parser.add_argument("--metrics", type=int, default=2, help="Judge metrics per case (Faithfulness, Relevancy)")
+    args = parser.parse_args()
+
+    llm_outputs = {}
+    if args.report:
+        with open(args.report, "r", encoding="utf-8") as f:
+            llm_outputs = {c["id"]: c["output"] for c in json.load(f)["cases"] if c.get("output")}
+
+    total = definitive = compared = agreed = 0
+    per_category = {}
+    for case in iter_cases():
+        total += 1
+        verdict = validate_entry(case["input"])
+        if not verdict.definitive:
+            continue
+        definitive += 1
+        counts = per_category.setdefault(case.get("category", ""), [0, 0])
+        counts[0] += 1
+        counts[1] += verdict.is_valid == case.get("expectedIsValid")
+        if case["id"] in llm_outputs:
+            compared += 1
+            agreed += agrees(verdict, llm_outputs[case["id"]])
+
+    print(f"📏 VEEDS rules: {definitive}/{total} cases decided without LLM")
+    print(f"   LLM calls avoidable: {definitive}, judge metric runs avoidable: {definitive * args.metrics}")
+    for category, (decided, matched) in sorted(per_category.items()):
+        print(f"   {category:<15} {decided} decided, isValid matches expectedIsValid in {matched}/{decided}")
+    if compared:
+        print(f"   Agreement with LLM outputs: {agreed}/{compared} ({agreed / compared:.0%})")
+
+
+if __name__ == "__main__":
+    main()
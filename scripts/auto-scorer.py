@@ -1,55 +1,414 @@
+"""
+Langfuse Auto-Scoring Automation.
+
+Scores every GENERATION created since the last successful run:
+  - pages through the Langfuse public API (fixed time window, no gaps)
+  - persists the watermark locally, so each cron run picks up where the last stopped
+  - applies every rule from the rules file (auto-scorer.rules.yaml) to each page
+    of generations, one Langfuse score per rule and generation
+  - scores on a bounded worker pool (optionally in worker processes)
+  - sends scores in batches via the ingestion endpoint
+
+Rules are either simple marker checks or any get_assert-style module, e.g. the
+promptfoo assertions in assertions/*.py.
+
+With --archive the generations come from the local Parquet trace archive
+(scripts/trace_archive.py) instead of the API: historical windows are
+re-scored at disk speed and the cursor is left alone.
+
+Run:
+    python scripts/auto-scorer.py                 # incremental (cursor)
+    python scripts/auto-scorer.py --since 2026-01-01T00:00:00Z
+    python scripts/auto-scorer.py --workers 16 --batch-size 200
+    python scripts/auto-scorer.py --rules my-rules.yaml --processes 4
+    python scripts/auto-scorer.py --archive --since 2026-09-01T00:00:00Z --until 2026-10-01T00:00:00Z --dry-run
+"""
+
+import argparse
+import base64
+import importlib.util
+import json
 import os
+import sys
 import time
-    from langfuse import Langfuse
-    from dotenv import load_dotenv
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+
+import yaml
+from dotenv import load_dotenv
 
 load_dotenv()
 
-def run_auto_scoring():
-print("🔭 Starting Langfuse Auto-Scoring Automation...")
-langfuse = Langfuse()
-
-    # Fetch recent traces(last 1 hour)
-    # This simulates a background process
-traces = langfuse.get_traces(limit = 50)
-
-for trace in traces.data:
-        # Check if trace already has scores
-if not trace.scores:
-print(f"Checking trace: {trace.id}")
-            
-            # Logic 1: Cost - Alerting(Automation)
-            # If total_cost is missing or 0 but it's a generation, flag for review
-            #(Note: Real cost comes from our cost - calculator.ts)
-            
-            # Logic 2: Keyword - based Quality Scorer
-            # We look into the generation output for keywords like "Error" or "Invalid"
-generations = [obs for obs in trace.observations if obs.type == 'GENERATION']
-
-for gen in generations:
-    output_str = str(gen.output or "")
-                
-                # Auto - Score: Correctness based on explicit "Success" or "Error"
-if "Valid: false" in output_str:
-    langfuse.score(
-        trace_id = trace.id,
-        name = "auto-quality-check",
-        value = 0,
-        comment = "Automatically flagged: Output contains validation errors."
-    )
-print(f"  ❌ Scored 0 (Validation Error) for trace {trace.id}")
-                elif "Valid: true" in output_str:
-langfuse.score(
-    trace_id = trace.id,
-    name = "auto-quality-check",
-    value = 1,
-    comment = "Automatically approved: Output is valid."
+PAGE_LIMIT = 100
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_LOOKBACK_HOURS = 1
+# Ingestion is asynchronous: generations of the newest minutes may not be queryable yet,
+# so the window (and the cursor) stops short of now and the next run picks them up
+DEFAULT_LAG_MINUTES = 10
+CURSOR_PATH = os.getenv("AUTO_SCORER_CURSOR", ".cache/auto-scorer-cursor.json")
+RULES_PATH = os.getenv(
+    "AUTO_SCORER_RULES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "auto-scorer.rules.yaml")
 )
-print(f"  ✅ Scored 1 (Validation Success) for trace {trace.id}")
+
+# Stable namespace so re-scoring the same generation upserts instead of duplicating
+SCORE_ID_NAMESPACE = uuid.UUID("6f1c3c52-2f39-4a57-9a0e-3b8f6f0d7a11")
+
+
+def to_iso(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class LangfuseApi:
+    """Minimal client for the Langfuse public REST API (same endpoints as our TS scripts)."""
+
+    def __init__(self, host: str, public_key: str, secret_key: str, timeout: float = 30):
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        token = base64.b64encode(f"{public_key}:{secret_key}".encode()).decode()
+        self._headers = {"Authorization": f"Basic {token}", "Content-Type": "application/json"}
+
+    @classmethod
+    def from_env(cls) -> "LangfuseApi":
+        public_key = os.getenv("LANGFUSE_PUBLIC_KEY")
+        secret_key = os.getenv("LANGFUSE_SECRET_KEY")
+        if not public_key or not secret_key:
+            raise SystemExit("❌ Missing LANGFUSE_PUBLIC_KEY or LANGFUSE_SECRET_KEY")
+        return cls(os.getenv("LANGFUSE_HOST", "http://localhost:3000"), public_key, secret_key)
+
+    def _request(self, method: str, path: str, params: Optional[dict] = None, body=None) -> dict:
+        url = f"{self.host}{path}"
+        if params:
+            url += "?" + urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(url, data=data, method=method, headers=self._headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read() or b"{}")
+
+    def fetch_observations(self, page: int, since: datetime, until: datetime, type: Optional[str] = None) -> dict:
+        return self._request("GET", "/api/public/observations", {
+            "type": type,
+            "fromStartTime": to_iso(since),
+            "toStartTime": to_iso(until),
+            "page": page,
+            "limit": PAGE_LIMIT,
+        })
+
+    def fetch_generations(self, page: int, since: datetime, until: datetime) -> dict:
+        return self.fetch_observations(page, since, until, type="GENERATION")
+
+    def fetch_traces(self, page: int, since: datetime, until: datetime) -> dict:
+        return self._request("GET", "/api/public/traces", {
+            "fromTimestamp": to_iso(since),
+            "toTimestamp": to_iso(until),
+            "page": page,
+            "limit": PAGE_LIMIT,
+        })
+
+    def ingest(self, events: List[dict]) -> dict:
+        return self._request("POST", "/api/public/ingestion", body={"batch": events})
+
+
+# ---------------------------------------------------------------------------
+# Scoring rules
+# ---------------------------------------------------------------------------
+def output_text(gen: dict) -> str:
+    output = gen.get("output")
+    if isinstance(output, str):
+        return output
+    return json.dumps(output, ensure_ascii=False) if output is not None else ""
+
+
+class MarkerRule:
+    """Scores 0 if the fail marker is present, 1 if the pass marker is present, else nothing."""
+
+    def __init__(self, name: str, fail: str, pass_: str, fail_comment: str = "", pass_comment: str = ""):
+        self.name = name
+        self.fail = fail
+        self.pass_ = pass_
+        self.fail_comment = fail_comment or f"Automatically flagged: output contains '{fail}'."
+        self.pass_comment = pass_comment or f"Automatically approved: output contains '{pass_}'."
+
+    def evaluate(self, outputs: List[str], generations: List[dict]) -> List[Optional[tuple]]:
+        fail, pass_ = self.fail, self.pass_
+        return [
+            (0, self.fail_comment) if fail in output
+            else (1, self.pass_comment) if pass_ in output
+            else None
+            for output in outputs
+        ]
+
+
+class AssertionRule:
+    """Applies a get_assert(output, context) module (promptfoo python assertion) to each output."""
+
+    def __init__(self, name: str, module: str, base_dir: str = "."):
+        self.name = name
+        # Accepts the promptfoo notation "file://assertions/check_german.py" as well
+        if module.startswith("file://"):
+            module = module[len("file://"):]
+        path = os.path.abspath(os.path.join(base_dir, module))
+        # Like promptfoo: the assertion's directory is importable (shared helper modules)
+        module_dir = os.path.dirname(path)
+        if module_dir not in sys.path:
+            sys.path.insert(0, module_dir)
+        spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+        loaded = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(loaded)
+        self.get_assert = loaded.get_assert
+
+    def evaluate(self, outputs: List[str], generations: List[dict]) -> List[Optional[tuple]]:
+        results = []
+        for output, gen in zip(outputs, generations):
+            context = {"prompt": output_text({"output": gen.get("input")}), "vars": gen.get("metadata") or {}}
+            try:
+                result = self.get_assert(output, context)
+            except Exception as e:
+                print(f"  ⚠️ Rule '{self.name}' failed on {gen.get('id')}: {e}")
+                results.append(None)
+                continue
+            results.append((float(result.get("score", 1.0 if result.get("pass") else 0.0)), result.get("reason", "")))
+        return results
+
+
+RULE_TYPES = {"marker": MarkerRule, "assertion": AssertionRule}
+
+
+class RuleEngine:
+    def __init__(self, rules: list):
+        self.rules = rules
+
+    @classmethod
+    def from_config(cls, path: str = RULES_PATH) -> "RuleEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+
+        # Module paths in the rules file are relative to the repository root
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        rules = []
+        for spec in config.get("rules", []):
+            spec = dict(spec)
+            rule_type = spec.pop("type")
+            if rule_type == "marker":
+                spec["pass_"] = spec.pop("pass")
+            elif rule_type == "assertion":
+                spec["base_dir"] = base_dir
+            rules.append(RULE_TYPES[rule_type](**spec))
+        return cls(rules)
+
+    def score_batch(self, generations: List[dict]) -> List[dict]:
+        """Applies every rule to the whole batch, one score per rule and generation."""
+        outputs = [output_text(g) for g in generations]
+        scores = []
+        for rule in self.rules:
+            for gen, result in zip(generations, rule.evaluate(outputs, generations)):
+                if result is None:
+                    continue
+                value, comment = result
+                scores.append({
+                    "traceId": gen.get("traceId"),
+                    "observationId": gen.get("id"),
+                    "name": rule.name,
+                    "value": value,
+                    "comment": comment,
+                })
+        return scores
+
+
+# Worker processes load the rules once and then only receive generations
+_worker_engine: Optional[RuleEngine] = None
+
+
+def _init_worker(rules_path: str):
+    global _worker_engine
+    _worker_engine = RuleEngine.from_config(rules_path)
+
+
+def _score_in_worker(generations: List[dict]) -> List[dict]:
+    return _worker_engine.score_batch(generations)
+
+
+def to_ingestion_event(score: dict) -> dict:
+    score_id = uuid.uuid5(SCORE_ID_NAMESPACE, f"{score['observationId']}:{score['name']}")
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": to_iso(datetime.now(timezone.utc)),
+        "type": "score-create",
+        "body": {"id": str(score_id), **score},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cursor
+# ---------------------------------------------------------------------------
+def load_cursor(path: str) -> Optional[datetime]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_iso(json.load(f)["watermark"])
+
+
+def save_cursor(path: str, watermark: datetime, stats: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"watermark": to_iso(watermark), "lastRun": stats}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Main loop
+# ---------------------------------------------------------------------------
+def iter_pages(api: LangfuseApi, pool: ThreadPoolExecutor, since: datetime, until: datetime) -> Iterator[list]:
+    """First page tells us totalPages, the rest are fetched concurrently (window is fixed)."""
+    first = api.fetch_generations(1, since, until)
+    yield first.get("data", [])
+
+    total_pages = first.get("meta", {}).get("totalPages", 1)
+    futures = [pool.submit(api.fetch_generations, page, since, until) for page in range(2, total_pages + 1)]
+    for future in futures:
+        yield future.result().get("data", [])
+
+
+def run_auto_scoring(
+    api: LangfuseApi,
+    cursor_path: str = CURSOR_PATH,
+    since: Optional[datetime] = None,
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+    rules_path: str = RULES_PATH,
+    processes: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    archive: Optional[str] = None,
+    until: Optional[datetime] = None,
+    lag_minutes: float = DEFAULT_LAG_MINUTES,
+) -> dict:
+    print("🔭 Starting Langfuse Auto-Scoring Automation...")
+
+    if archive:
+        # pyarrow is only needed when scoring from the archive
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from trace_archive import TraceArchive
+
+        pages = TraceArchive(archive).generations(since, until)
+        window = f"{to_iso(since) if since else 'start'} → {to_iso(until) if until else 'end'}"
+        print(f"   Archive: {archive}, window: {window}")
+    else:
+        until = until or datetime.now(timezone.utc) - timedelta(minutes=lag_minutes)
+        if since is None:
+            since = load_cursor(cursor_path) or until - timedelta(hours=DEFAULT_LOOKBACK_HOURS)
+        print(f"   Window: {to_iso(since)} → {to_iso(until)}")
+
+    engine = RuleEngine.from_config(rules_path)
+    print(f"   Rules: {', '.join(rule.name for rule in engine.rules)}")
+
+    stats = {"generations": 0, "traces": 0, "scores": 0, "batches": 0, "errors": 0}
+    trace_ids = set()
+    started = time.perf_counter()
+
+    # CPU-heavy assertion rules scale across processes, the HTTP I/O stays on threads
+    scoring_pool = (
+        ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(rules_path,))
+        if processes > 0 else None
+    )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: List[dict] = []
+        ingest_futures = []
+
+        def flush():
+            if pending and not dry_run:
+                ingest_futures.append(pool.submit(api.ingest, [to_ingestion_event(s) for s in pending]))
+                stats["batches"] += 1
+            pending.clear()
+
+        if not archive:
+            pages = iter_pages(api, pool, since, until)
+        for generations in pages:
+            stats["generations"] += len(generations)
+            trace_ids.update(g.get("traceId") for g in generations)
+
+            chunks = [generations[i:i + chunk_size] for i in range(0, len(generations), chunk_size)]
+            if scoring_pool:
+                results = scoring_pool.map(_score_in_worker, chunks)
+            else:
+                results = pool.map(engine.score_batch, chunks)
+
+            for scores in results:
+                for score in scores:
+                    pending.append(score)
+                    stats["scores"] += 1
+                    if len(pending) >= batch_size:
+                        flush()
+        flush()
+
+        if scoring_pool:
+            scoring_pool.shutdown()
+
+        for future in ingest_futures:
+            response = future.result()
+            stats["errors"] += len(response.get("errors", []))
+
+    stats["traces"] = len(trace_ids)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["traces_per_second"] = round(stats["traces"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+
+    if stats["errors"]:
+        # Keep the old watermark: scores have stable ids, the next run simply upserts again
+        print(f"  ❌ {stats['errors']} scores rejected by Langfuse, cursor not advanced")
+    elif not dry_run and not archive:
+        save_cursor(cursor_path, until, stats)
+
+    print(
+        f"  ✅ {stats['generations']} generations in {stats['traces']} traces, "
+        f"{stats['scores']} scores in {stats['batches']} batches ({stats['seconds']}s)"
+    )
+    return stats
+
 
 def main():
     # In production, this would run as a cron job or worker
-run_auto_scoring()
+    parser = argparse.ArgumentParser(description="Incremental Langfuse auto-scoring")
+    parser.add_argument("--since", help="ISO timestamp, overrides the stored cursor")
+    parser.add_argument("--cursor", default=CURSOR_PATH, help="Path of the watermark file")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Score but do not send or advance the cursor")
+    parser.add_argument("--rules", default=RULES_PATH, help="Rules file (YAML)")
+    parser.add_argument("--processes", type=int, default=0, help="Worker processes for rule evaluation (0 = threads)")
+    parser.add_argument("--archive", nargs="?", const=os.getenv("TRACE_ARCHIVE_PATH", ".cache/trace-archive"),
+                        help="Score generations from the local trace archive instead of the API")
+    parser.add_argument("--until", help="ISO timestamp, end of the window (default: now minus --lag-minutes / "
+                                        "end of the archive)")
+    parser.add_argument("--lag-minutes", type=float, default=DEFAULT_LAG_MINUTES,
+                        help="Leave the newest minutes for the next run (ingestion delay)")
+    args = parser.parse_args()
+
+    run_auto_scoring(
+        # Re-scoring the archive without sending scores needs no Langfuse credentials
+        None if args.archive and args.dry_run else LangfuseApi.from_env(),
+        cursor_path=args.cursor,
+        since=parse_iso(args.since) if args.since else None,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        rules_path=args.rules,
+        processes=args.processes,
+        archive=args.archive,
+        until=parse_iso(args.until) if args.until else None,
+        lag_minutes=args.lag_minutes,
+    )
+
 
 if __name__ == "__main__":
     main()
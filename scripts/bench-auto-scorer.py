@@ -0,0 +1,136 @@
+"""
+Benchmark: auto-scorer.py against a local stub of the Langfuse public API.
+
+The stub serves N synthetic generations (paged like /api/public/observations)
+and accepts score batches on /api/public/ingestion, each request with a fixed
+simulated latency. Reports traces/second for different worker counts.
+
+Run: python scripts/bench-auto-scorer.py [--traces 5000] [--latency-ms 20]
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# auto-scorer.py has a dash in its name, load it by path
+_spec = importlib.util.spec_from_file_location("auto_scorer", os.path.join(SCRIPT_DIR, "auto-scorer.py"))
+auto_scorer = importlib.util.module_from_spec(_spec)
+# Registered so worker processes (--processes) can unpickle its functions
+sys.modules["auto_scorer"] = auto_scorer
+_spec.loader.exec_module(auto_scorer)
+
+
+def make_generations(count: int) -> list:
+    return [
+        {
+            "id": f"obs-{i:07d}",
+            "traceId": f"trace-{i:07d}",
+            "type": "GENERATION",
+            "input": "materialNumber: ABC-12345\ndescription: Bremsscheibe\nunit: mm",
+            "output": (
+                "Valid: false\nErrors: 1\nDie Einheit ist für dieses Bauteil ungültig."
+                if i % 3 == 0 else
+                "Valid: true\nErrors: 0\nDer Eintrag für das Fahrzeug ist gültig und vollständig."
+            ),
+        }
+        for i in range(count)
+    ]
+
+
+def start_stub(generations: list, latency: float, traces: list = None):
+    received = {"scores": 0, "requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            time.sleep(latency)
+            url = urllib.parse.urlparse(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            page = int(query.get("page", ["1"])[0])
+            limit = int(query.get("limit", ["50"])[0])
+            items = traces if traces is not None and url.path == "/api/public/traces" else generations
+            data = items[(page - 1) * limit: page * limit]
+            with lock:
+                received["requests"] += 1
+            self._reply(200, {
+                "data": data,
+                "meta": {"page": page, "limit": limit, "totalItems": len(items),
+                         "totalPages": math.ceil(len(items) / limit)},
+            })
+
+        def do_POST(self):
+            time.sleep(latency)
+            batch = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["batch"]
+            with lock:
+                received["scores"] += len(batch)
+                received["requests"] += 1
+            self._reply(207, {"successes": [{"id": e["id"], "status": 201} for e in batch], "errors": []})
+
+    class Server(ThreadingHTTPServer):
+        # Default backlog (5) drops connections under 32 concurrent workers
+        request_queue_size = 128
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--traces", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--workers", default="1,8,32")
+    parser.add_argument("--processes", type=int, default=0, help="Worker processes for rule evaluation")
+    args = parser.parse_args()
+
+    generations = make_generations(args.traces)
+    server, received = start_stub(generations, args.latency_ms / 1000)
+    api = auto_scorer.LangfuseApi(f"http://127.0.0.1:{server.server_port}", "pk-bench", "sk-bench")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            received.update(scores=0, requests=0)
+            stats = auto_scorer.run_auto_scoring(
+                api,
+                cursor_path=os.path.join(tmp, f"cursor-{workers}.json"),
+                workers=workers,
+                processes=args.processes,
+            )
+            assert received["scores"] == stats["scores"], "stub did not receive all scores"
+            results.append({
+                "workers": workers,
+                "traces": stats["traces"],
+                "requests": received["requests"],
+                "seconds": stats["seconds"],
+                "traces_per_second": stats["traces_per_second"],
+            })
+
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
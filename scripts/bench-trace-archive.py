@@ -0,0 +1,127 @@
+"""
+Benchmark: re-scoring from the Parquet trace archive vs. pulling from the API.
+
+Serves N synthetic generations (30 days, several models) from the local
+Langfuse stub of bench-auto-scorer.py, exports them once with
+trace_archive.export and then compares:
+  - fetching all generations: paging through the stub API vs. the archive
+  - auto-scorer (dry run) on the API vs. on the archive (same scores)
+  - raw archive scans: output column only vs. all columns, one model
+
+Run: python scripts/bench-trace-archive.py [--traces 20000] [--latency-ms 20]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+import trace_archive  # noqa: E402
+
+
+def load(name: str, file_name: str):
+    # Scripts with a dash in their name are loaded by path
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPT_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+bench_auto_scorer = load("bench_auto_scorer", "bench-auto-scorer.py")
+auto_scorer = bench_auto_scorer.auto_scorer
+
+MODELS = ["anthropic.claude-3-5-sonnet-20241022-v2:0", "anthropic.claude-3-haiku-20240307-v1:0", "gpt-4o"]
+START = datetime(2026, 9, 1, tzinfo=timezone.utc)
+
+
+def make_data(count: int):
+    generations = bench_auto_scorer.make_generations(count)
+    traces = []
+    for i, gen in enumerate(generations):
+        start = START + timedelta(days=30) * i / count
+        gen.update(
+            startTime=auto_scorer.to_iso(start),
+            endTime=auto_scorer.to_iso(start + timedelta(seconds=2)),
+            model=MODELS[i % len(MODELS)],
+            metadata={"category": "true_positive" if i % 2 else "edge_case"},
+            usageDetails={"input": 350, "output": 120, "total": 470},
+            latency=2.0,
+        )
+        traces.append({"id": gen["traceId"], "name": "veeds-proofreader", "timestamp": gen["startTime"],
+                       "tags": ["production"], "input": gen["input"], "output": gen["output"]})
+    return generations, traces
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--traces", type=int, default=20000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    generations, traces = make_data(args.traces)
+    server, _ = bench_auto_scorer.start_stub(generations, args.latency_ms / 1000, traces)
+    api = auto_scorer.LangfuseApi(f"http://127.0.0.1:{server.server_port}", "pk-bench", "sk-bench")
+    since, until = START, START + timedelta(days=31)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "archive")
+        export_stats, export_s = timed(lambda: trace_archive.export(api, root, since, until, workers=args.workers))
+        size_mb = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files) / 2**20
+
+        def fetch_api():
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                return sum(len(page) for page in auto_scorer.iter_pages(api, pool, since, until))
+
+        fetched_api, fetch_api_s = timed(fetch_api)
+        fetched_archive, fetch_archive_s = timed(
+            lambda: sum(len(page) for page in trace_archive.TraceArchive(root).generations(since, until)))
+        assert fetched_api == fetched_archive == args.traces
+
+        api_stats, api_s = timed(lambda: auto_scorer.run_auto_scoring(
+            api, cursor_path=os.path.join(tmp, "cursor.json"), since=since, workers=args.workers, dry_run=True))
+        archive_stats, archive_s = timed(lambda: auto_scorer.run_auto_scoring(
+            None, since=since, until=until, workers=args.workers, dry_run=True, archive=root))
+        assert api_stats["scores"] == archive_stats["scores"], "archive and API runs scored differently"
+
+        archive = trace_archive.TraceArchive(root)
+        scans = {}
+        for name, kwargs in {
+            "scan output column": {"columns": ["output"]},
+            "scan all columns": {"columns": None},
+            f"scan one model ({MODELS[2]})": {"columns": ["output"], "models": [MODELS[2]]},
+            "scan one week": {"columns": ["output"], "since": START, "until": START + timedelta(days=7)},
+        }.items():
+            rows, seconds = timed(lambda: sum(b.num_rows for b in archive.scan(**kwargs)))
+            scans[name] = {"rows": rows, "seconds": round(seconds, 3), "rows_per_second": round(rows / seconds)}
+
+    server.shutdown()
+    print(json.dumps({
+        "generations": args.traces,
+        "export": {"seconds": round(export_s, 2), "files": export_stats["files"], "size_mb": round(size_mb, 1)},
+        "fetch_api": {"seconds": round(fetch_api_s, 2), "generations_per_second": round(fetched_api / fetch_api_s)},
+        "fetch_archive": {"seconds": round(fetch_archive_s, 2),
+                          "generations_per_second": round(fetched_archive / fetch_archive_s)},
+        "auto_scorer_api": {"seconds": round(api_s, 2), "scores": api_stats["scores"]},
+        "auto_scorer_archive": {"seconds": round(archive_s, 2), "scores": archive_stats["scores"]},
+        "scans": scans,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
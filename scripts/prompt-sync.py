@@ -1,38 +1,204 @@
+"""
+Prompt-as-Code Sync: Git -> Langfuse Prompt Registry.
+
+Prompts come from prompts/manifest.yaml plus every *.txt/*.md file in the
+prompts directory. Each prompt is hashed (text, type, config) and compared
+with prompts/prompts.lock.json; only prompts whose hash or labels changed are
+checked against the latest remote version, and only those that differ there
+too are uploaded as a new version. If only labels are missing remotely, they
+are added to the existing version. Unchanged prompts need neither a Langfuse
+call nor a write.
+
+The lock file is a local cache (not committed), keyed by the Langfuse target
+(LANGFUSE_HOST + public key), so syncing against another project or instance
+never skips prompts that only exist elsewhere.
+
+Run: python scripts/prompt-sync.py [--workers 4] [--dry-run] [--verify-remote]
+"""
+
+import argparse
+import hashlib
+import json
 import os
-from langfuse import Langfuse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import yaml
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def sync_prompts():
-    print("🔄 Syncing local prompts to Langfuse...")
-    langfuse = Langfuse()
+PROMPTS_DIR = os.getenv("PROMPTS_DIR", "prompts")
+MANIFEST_PATH = os.path.join(PROMPTS_DIR, "manifest.yaml")
+LOCK_PATH = os.path.join(PROMPTS_DIR, "prompts.lock.json")
+PROMPT_EXTENSIONS = (".txt", ".md")
+
+
+@dataclass
+class PromptSpec:
+    name: str
+    path: str
+    type: str = "text"
+    labels: list = field(default_factory=lambda: ["production"])
+    config: dict = field(default_factory=dict)
+
+    def read(self) -> str:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+
+def content_hash(prompt, prompt_type: str, config: dict) -> str:
+    # Labels are not part of the hash: moving a label needs no new version
+    payload = json.dumps({"prompt": prompt, "type": prompt_type, "config": config or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_manifest(prompts_dir: str = PROMPTS_DIR, manifest_path: str = MANIFEST_PATH) -> list:
+    """Manifest entries first, then unlisted prompt files of the directory with the manifest defaults."""
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = yaml.safe_load(f) or {}
+    defaults = manifest.get("defaults", {})
+
+    specs = {}
+    for entry in manifest.get("prompts", []):
+        spec = PromptSpec(**{**defaults, **entry})
+        specs[spec.name] = spec
+
+    listed = {os.path.normpath(s.path) for s in specs.values()}
+    for root, _, files in os.walk(prompts_dir):
+        for filename in sorted(files):
+            path = os.path.normpath(os.path.join(root, filename))
+            name, ext = os.path.splitext(filename)
+            if ext in PROMPT_EXTENSIONS and path not in listed and name not in specs:
+                specs[name] = PromptSpec(name=name, path=path, **defaults)
+    return list(specs.values())
+
+
+def lock_target() -> str:
+    """Lock section of the Langfuse project the client talks to."""
+    return f"{os.getenv('LANGFUSE_HOST', '')}#{os.getenv('LANGFUSE_PUBLIC_KEY', '')}"
+
 
-    # Read the local system prompt
-    prompt_path = "eval/prompt.txt"
-    if not os.path.exists(prompt_path):
-        print(f"❌ Error: {prompt_path} not found.")
-        return
+def load_lock(path: str = LOCK_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    with open(prompt_path, "r", encoding="utf-8") as f:
-        prompt_content = f.read()
 
-    # Sync to Langfuse
-    # This creates a new version if the content changed
+def save_lock(lock: dict, path: str = LOCK_PATH):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def remote_latest(langfuse, name: str, prompt_type: str):
+    """Latest remote version or None if the prompt does not exist yet."""
+    from langfuse.api import NotFoundError
+
     try:
-        langfuse.create_prompt(
-            name="veeds-proofreader",
-            prompt=prompt_content,
-            labels=["production"],
-            type="text",
-            config={
-                "model": "anthropic.claude-3-5-sonnet-20240620-v1:0",
-                "temperature": 0
-            }
-        )
-        print("✅ Successfully synced 'veeds-proofreader' to Langfuse.")
-    except Exception as e:
-        print(f"❌ Failed to sync: {e}")
+        return langfuse.get_prompt(name, label="latest", type=prompt_type, cache_ttl_seconds=0, max_retries=1)
+    except NotFoundError:
+        return None
+
+
+def sync_prompt(langfuse, spec: PromptSpec, local_hash: str, dry_run: bool) -> dict:
+    prompt = spec.read()
+    remote = remote_latest(langfuse, spec.name, spec.type)
+    if remote is not None and content_hash(remote.prompt, spec.type, remote.config) == local_hash:
+        missing = [label for label in spec.labels if label not in (remote.labels or [])]
+        if not missing:
+            return {"name": spec.name, "status": "skipped", "hash": local_hash, "version": remote.version}
+        if dry_run:
+            return {"name": spec.name, "status": "would_label", "hash": local_hash, "version": remote.version}
+        # Same content: move the labels onto the existing version instead of creating a new one
+        # ("latest" is maintained by Langfuse itself)
+        labels = [label for label in remote.labels or [] if label != "latest"] + missing
+        langfuse.update_prompt(name=spec.name, version=remote.version, new_labels=labels)
+        return {"name": spec.name, "status": "labeled", "hash": local_hash, "version": remote.version}
+    if dry_run:
+        return {"name": spec.name, "status": "would_create", "hash": local_hash, "version": None}
+
+    created = langfuse.create_prompt(
+        name=spec.name,
+        prompt=prompt,
+        labels=spec.labels,
+        type=spec.type,
+        config=spec.config,
+    )
+    return {"name": spec.name, "status": "created", "hash": local_hash, "version": created.version}
+
+
+def sync_prompts(workers: int = 4, dry_run: bool = False, verify_remote: bool = False,
+                 prompts_dir: str = PROMPTS_DIR, lock_path: str = LOCK_PATH, langfuse=None) -> dict:
+    print("🔄 Syncing local prompts to Langfuse...")
+    start = time.perf_counter()
+    specs = load_manifest(prompts_dir, os.path.join(prompts_dir, "manifest.yaml"))
+    lock = load_lock(lock_path)
+    synced = lock.setdefault(lock_target(), {})
+    counts = {"created": 0, "labeled": 0, "skipped": 0, "would_create": 0, "would_label": 0, "failed": 0}
+
+    # Fast path: the lock file already knows this exact content with these labels for this target
+    changed = []
+    for spec in specs:
+        local_hash = content_hash(spec.read(), spec.type, spec.config)
+        entry = synced.get(spec.name, {})
+        if not verify_remote and entry.get("hash") == local_hash and set(spec.labels) <= set(entry.get("labels", [])):
+            counts["skipped"] += 1
+        else:
+            changed.append((spec, local_hash))
+
+    if changed:
+        if langfuse is None:
+            from langfuse import Langfuse
+            langfuse = Langfuse()
+
+        def run(item):
+            spec, local_hash = item
+            try:
+                return sync_prompt(langfuse, spec, local_hash, dry_run)
+            except Exception as e:
+                return {"name": spec.name, "status": "failed", "error": str(e)}
+
+        synced_before = dict(synced)
+        labels = {spec.name: spec.labels for spec, _ in changed}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(run, changed):
+                counts[result["status"]] += 1
+                if result["status"] in ("created", "labeled", "skipped"):
+                    synced[result["name"]] = {
+                        "hash": result["hash"], "version": result["version"], "labels": labels[result["name"]],
+                    }
+                    action = {"created": "✅ created", "labeled": "🏷️  labeled", "skipped": "⏭️  unchanged"}
+                    print(f"   {action[result['status']]} {result['name']} (v{result['version']})")
+                elif result["status"] in ("would_create", "would_label"):
+                    print(f"   📝 {result['status'].replace('_', ' ')} {result['name']}")
+                else:
+                    print(f"   ❌ {result['name']}: {result['error']}")
+
+        if synced != synced_before and not dry_run:
+            save_lock(lock, lock_path)
+
+    counts["seconds"] = round(time.perf_counter() - start, 3)
+    print(f"✅ {len(specs)} prompts: {counts['created']} created, {counts['labeled']} labeled, "
+          f"{counts['skipped']} skipped, "
+          f"{counts['failed']} failed ({counts['seconds']}s)")
+    return counts
+
 
 if __name__ == "__main__":
-    sync_prompts()
+    parser = argparse.ArgumentParser(description="Sync prompts to the Langfuse Prompt Registry")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel Langfuse requests")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without uploading")
+    parser.add_argument("--verify-remote", action="store_true",
+                        help="Compare every prompt with Langfuse, also those unchanged since the lock file")
+    args = parser.parse_args()
+
+    result = sync_prompts(workers=args.workers, dry_run=args.dry_run, verify_remote=args.verify_remote)
+    sys.exit(1 if result["failed"] else 0)
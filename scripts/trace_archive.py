@@ -0,0 +1,486 @@
+"""
+Columnar trace archive: Langfuse traces and observations as partitioned Parquet.
+
+Layout (Hive partitioning, also readable by DuckDB, Spark, pandas):
+    <root>/observations/day=2026-10-16/model=<model>/part-<run>.parquet
+    <root>/traces/day=2026-10-16/part-<run>.parquet
+    <root>/_checkpoint.json
+
+`export` pages through the Langfuse public API for the window since the last
+checkpoint and streams every page into one ParquetWriter per partition, so
+memory stays at a few pages plus the open row groups. Files are written to
+<root>/_staging/<run>/ and moved into place once the whole window is on disk.
+The checkpoint records the pending move first, so a crash in between is
+rolled forward by the next run instead of duplicating or losing rows.
+
+`TraceArchive` reads it back with partition pruning (day, model), column
+pruning and memory-mapped files; `python scripts/auto-scorer.py --archive`
+uses it to re-score history without touching the API.
+
+Run:
+    python scripts/trace_archive.py export                       # incremental (checkpoint)
+    python scripts/trace_archive.py export --since 2026-09-01T00:00:00Z
+    python scripts/trace_archive.py stats --since 2026-09-01T00:00:00Z
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+ARCHIVE_PATH = os.getenv("TRACE_ARCHIVE_PATH", ".cache/trace-archive")
+CHECKPOINT_NAME = "_checkpoint.json"
+STAGING_DIR = "_staging"
+DEFAULT_WORKERS = 8
+DEFAULT_LOOKBACK_HOURS = 24
+# Ingestion is asynchronous: the newest minutes may not be complete in the API yet
+DEFAULT_LAG_MINUTES = 10
+ROW_GROUP_SIZE = 10_000
+SCAN_BATCH_SIZE = 10_000
+UNKNOWN_MODEL = "unknown"
+
+TIMESTAMP = pa.timestamp("ms", tz="UTC")
+
+OBSERVATION_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("trace_id", pa.string()),
+    ("type", pa.string()),
+    ("name", pa.string()),
+    ("start_time", TIMESTAMP),
+    ("end_time", TIMESTAMP),
+    ("model", pa.string()),
+    ("input", pa.string()),
+    ("output", pa.string()),
+    ("metadata", pa.string()),  # JSON
+    ("level", pa.string()),
+    ("status_message", pa.string()),
+    ("prompt_name", pa.string()),
+    ("prompt_version", pa.int32()),
+    ("input_tokens", pa.int64()),
+    ("output_tokens", pa.int64()),
+    ("total_tokens", pa.int64()),
+    ("latency_ms", pa.float64()),
+    ("cost", pa.float64()),
+])
+
+TRACE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("name", pa.string()),
+    ("timestamp", TIMESTAMP),
+    ("user_id", pa.string()),
+    ("session_id", pa.string()),
+    ("release", pa.string()),
+    ("version", pa.string()),
+    ("tags", pa.list_(pa.string())),
+    ("input", pa.string()),
+    ("output", pa.string()),
+    ("metadata", pa.string()),  # JSON
+])
+
+PARTITIONING = {
+    "observations": ds.partitioning(pa.schema([("day", pa.string()), ("model", pa.string())]), flavor="hive"),
+    "traces": ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive"),
+}
+TIME_COLUMN = {"observations": "start_time", "traces": "timestamp"}
+
+# What auto-scorer and the assertions need of a generation
+GENERATION_COLUMNS = ["id", "trace_id", "type", "name", "start_time", "model", "input", "output", "metadata"]
+
+
+def to_iso(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def to_text(value) -> Optional[str]:
+    """Strings as they are, anything else as JSON - the text auto-scorer scores."""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    return parse_iso(value) if value else None
+
+
+# ---------------------------------------------------------------------------
+# Rows and partitions
+# ---------------------------------------------------------------------------
+def observation_row(obs: dict) -> dict:
+    usage = obs.get("usageDetails") or obs.get("usage") or {}
+    latency = obs.get("latency")
+    return {
+        "id": obs.get("id"),
+        "trace_id": obs.get("traceId"),
+        "type": obs.get("type"),
+        "name": obs.get("name"),
+        "start_time": _timestamp(obs.get("startTime")),
+        "end_time": _timestamp(obs.get("endTime")),
+        "model": obs.get("model"),
+        "input": to_text(obs.get("input")),
+        "output": to_text(obs.get("output")),
+        "metadata": to_text(obs.get("metadata")),
+        "level": obs.get("level"),
+        "status_message": obs.get("statusMessage"),
+        "prompt_name": obs.get("promptName"),
+        "prompt_version": obs.get("promptVersion"),
+        "input_tokens": usage.get("input"),
+        "output_tokens": usage.get("output"),
+        "total_tokens": usage.get("total"),
+        # The API reports latency in seconds
+        "latency_ms": latency * 1000 if latency is not None else None,
+        "cost": obs.get("calculatedTotalCost"),
+    }
+
+
+def trace_row(trace: dict) -> dict:
+    return {
+        "id": trace.get("id"),
+        "name": trace.get("name"),
+        "timestamp": _timestamp(trace.get("timestamp")),
+        "user_id": trace.get("userId"),
+        "session_id": trace.get("sessionId"),
+        "release": trace.get("release"),
+        "version": trace.get("version"),
+        "tags": trace.get("tags") or [],
+        "input": to_text(trace.get("input")),
+        "output": to_text(trace.get("output")),
+        "metadata": to_text(trace.get("metadata")),
+    }
+
+
+def _day(ts: Optional[datetime]) -> str:
+    return ts.astimezone(timezone.utc).date().isoformat() if ts else "unknown"
+
+
+def observation_partition(row: dict) -> str:
+    # Model ids contain ":" and "/" (bedrock ids), partition values are URI-encoded
+    return f"day={_day(row['start_time'])}/model={quote(row['model'] or UNKNOWN_MODEL, safe='')}"
+
+
+def trace_partition(row: dict) -> str:
+    return f"day={_day(row['timestamp'])}"
+
+
+class PartitionWriter:
+    """Streams rows into one Parquet file per partition (row groups of ROW_GROUP_SIZE)."""
+
+    def __init__(self, staging_dir: str, dataset: str, schema: pa.Schema, run_id: str):
+        self.staging_dir = staging_dir
+        self.dataset = dataset
+        self.schema = schema
+        self.file_name = f"part-{run_id}.parquet"
+        self.rows = 0
+        self._writers: Dict[str, pq.ParquetWriter] = {}
+        self._buffers: Dict[str, List[dict]] = {}
+
+    def add(self, partition: str, row: dict):
+        buffer = self._buffers.setdefault(partition, [])
+        buffer.append(row)
+        self.rows += 1
+        if len(buffer) >= ROW_GROUP_SIZE:
+            self._flush(partition)
+
+    def _flush(self, partition: str):
+        rows = self._buffers.pop(partition, None)
+        if not rows:
+            return
+        writer = self._writers.get(partition)
+        if writer is None:
+            path = os.path.join(self.staging_dir, self.dataset, partition, self.file_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            writer = self._writers[partition] = pq.ParquetWriter(path, self.schema, compression="zstd")
+        writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self) -> List[str]:
+        """Closes all files; returns their paths relative to the staging directory."""
+        for partition in list(self._buffers):
+            self._flush(partition)
+        for writer in self._writers.values():
+            writer.close()
+        return [f"{self.dataset}/{partition}/{self.file_name}" for partition in self._writers]
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint
+# ---------------------------------------------------------------------------
+def load_checkpoint(root: str) -> dict:
+    path = os.path.join(root, CHECKPOINT_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(root: str, checkpoint: dict):
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, CHECKPOINT_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def commit_pending(root: str, checkpoint: dict) -> dict:
+    """Moves the files of a pending run into the archive and advances the checkpoint."""
+    pending = checkpoint["pending"]
+    staging = os.path.join(root, STAGING_DIR, pending["run"])
+    for relative in pending["files"]:
+        source = os.path.join(staging, relative)
+        # Already moved before a crash: nothing left to do for this file
+        if os.path.exists(source):
+            target = os.path.join(root, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source, target)
+
+    committed = {
+        "from": min(filter(None, [checkpoint.get("from"), pending["since"]])),
+        "watermark": max(filter(None, [checkpoint.get("watermark"), pending["until"]])),
+        "lastRun": pending["stats"],
+    }
+    save_checkpoint(root, committed)
+    shutil.rmtree(staging, ignore_errors=True)
+    return committed
+
+
+def recover(root: str) -> dict:
+    """Finishes a run that crashed while moving files; drops staging data of runs that never got that far."""
+    checkpoint = load_checkpoint(root)
+    if "pending" in checkpoint:
+        print(f"   Recovering run {checkpoint['pending']['run']}")
+        checkpoint = commit_pending(root, checkpoint)
+    shutil.rmtree(os.path.join(root, STAGING_DIR), ignore_errors=True)
+    return checkpoint
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+def iter_pages(fetch: Callable[[int], dict], pool: ThreadPoolExecutor, prefetch: int) -> Iterator[list]:
+    """First page tells us totalPages; at most `prefetch` further pages are in flight (bounded memory)."""
+    first = fetch(1)
+    yield first.get("data", [])
+
+    total_pages = first.get("meta", {}).get("totalPages", 1)
+    in_flight = deque()
+    next_page = 2
+    while next_page <= total_pages or in_flight:
+        while next_page <= total_pages and len(in_flight) < prefetch:
+            in_flight.append(pool.submit(fetch, next_page))
+            next_page += 1
+        yield in_flight.popleft().result().get("data", [])
+
+
+def export(
+    api,
+    root: str = ARCHIVE_PATH,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    workers: int = DEFAULT_WORKERS,
+    lag_minutes: float = DEFAULT_LAG_MINUTES,
+) -> dict:
+    """Exports all observations and traces of [since, until) into the archive."""
+    print("🗄️  Exporting Langfuse traces to the archive...")
+    checkpoint = recover(root)
+
+    until = until or datetime.now(timezone.utc) - timedelta(minutes=lag_minutes)
+    watermark = parse_iso(checkpoint["watermark"]) if checkpoint.get("watermark") else None
+    if since is None:
+        since = watermark or until - timedelta(hours=DEFAULT_LOOKBACK_HOURS)
+    archived_from = parse_iso(checkpoint["from"]) if checkpoint.get("from") else watermark
+    # Backfilling before the archive is fine, overlapping it would duplicate rows
+    if watermark and since < watermark and until > archived_from:
+        raise SystemExit(f"❌ Window overlaps the archived range {checkpoint['from']} → {checkpoint['watermark']}")
+    if since >= until:
+        print("   Nothing to export")
+        return {"observations": 0, "traces": 0, "files": 0}
+    print(f"   Window: {to_iso(since)} → {to_iso(until)}")
+
+    run_id = f"{until:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    staging = os.path.join(root, STAGING_DIR, run_id)
+    observations = PartitionWriter(staging, "observations", OBSERVATION_SCHEMA, run_id)
+    traces = PartitionWriter(staging, "traces", TRACE_SCHEMA, run_id)
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for page in iter_pages(lambda p: api.fetch_observations(p, since, until), pool, workers * 2):
+            for obs in page:
+                row = observation_row(obs)
+                observations.add(observation_partition(row), row)
+        for page in iter_pages(lambda p: api.fetch_traces(p, since, until), pool, workers * 2):
+            for trace in page:
+                row = trace_row(trace)
+                traces.add(trace_partition(row), row)
+
+    files = observations.close() + traces.close()
+    stats = {
+        "observations": observations.rows,
+        "traces": traces.rows,
+        "files": len(files),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    # Record the move before doing it: a crash from here on is rolled forward by recover()
+    pending = {"run": run_id, "since": to_iso(since), "until": to_iso(until), "files": files, "stats": stats}
+    save_checkpoint(root, {**checkpoint, "pending": pending})
+    commit_pending(root, {**checkpoint, "pending": pending})
+
+    print(f"  ✅ {stats['observations']} observations, {stats['traces']} traces in {stats['files']} files "
+          f"({stats['seconds']}s)")
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Scanner
+# ---------------------------------------------------------------------------
+class TraceArchive:
+    """
+    Read access to an archive written by export().
+
+    Filters on day/model only open the matching partition directories, the
+    time filter is pushed down to the Parquet row groups and only the
+    requested columns are read. Files are memory-mapped.
+    """
+
+    def __init__(self, root: str = ARCHIVE_PATH):
+        self.root = os.path.abspath(root)
+        self._filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+
+    def dataset(self, name: str = "observations") -> Optional[ds.Dataset]:
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(path):
+            return None
+        # Paths starting with "_" (staging, checkpoint) are ignored by pyarrow
+        return ds.dataset(path, format="parquet", partitioning=PARTITIONING[name], filesystem=self._filesystem)
+
+    def _filter(self, name: str, since, until, models, types) -> Optional[ds.Expression]:
+        conditions = []
+        column = ds.field(TIME_COLUMN[name])
+        if since:
+            conditions += [ds.field("day") >= _day(since), column >= pa.scalar(since, type=TIMESTAMP)]
+        if until:
+            conditions += [ds.field("day") <= _day(until), column < pa.scalar(until, type=TIMESTAMP)]
+        if models and name == "observations":
+            conditions.append(ds.field("model").isin(list(models)))
+        if types and name == "observations":
+            conditions.append(ds.field("type").isin(list(types)))
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def scan(
+        self,
+        columns: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        models: Optional[Iterable[str]] = None,
+        types: Optional[Iterable[str]] = ("GENERATION",),
+        dataset: str = "observations",
+        batch_size: int = SCAN_BATCH_SIZE,
+    ) -> Iterator[pa.RecordBatch]:
+        """Record batches of the selected columns; `models` are the original model ids."""
+        data = self.dataset(dataset)
+        if data is None:
+            return
+        scanner = data.scanner(columns=columns, filter=self._filter(dataset, since, until, models, types),
+                               batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch
+
+    def table(self, columns: Optional[List[str]] = None, **filters) -> pa.Table:
+        batches = list(self.scan(columns, **filters))
+        if not batches:
+            schema = OBSERVATION_SCHEMA if filters.get("dataset", "observations") == "observations" else TRACE_SCHEMA
+            return schema.empty_table() if columns is None else schema.empty_table().select(columns)
+        return pa.Table.from_batches(batches)
+
+    def generations(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        models: Optional[Iterable[str]] = None,
+        batch_size: int = SCAN_BATCH_SIZE,
+    ) -> Iterator[List[dict]]:
+        """Pages of generations in the shape of the Langfuse API (what auto-scorer and the assertions expect)."""
+        for batch in self.scan(GENERATION_COLUMNS, since, until, models, batch_size=batch_size):
+            columns = {name: batch.column(name).to_pylist() for name in GENERATION_COLUMNS}
+            yield [
+                {
+                    "id": columns["id"][i],
+                    "traceId": columns["trace_id"][i],
+                    "type": columns["type"][i],
+                    "name": columns["name"][i],
+                    "startTime": to_iso(columns["start_time"][i]) if columns["start_time"][i] else None,
+                    "model": columns["model"][i],
+                    "input": columns["input"][i],
+                    "output": columns["output"][i],
+                    "metadata": json.loads(columns["metadata"][i]) if columns["metadata"][i] else None,
+                }
+                for i in range(batch.num_rows)
+            ]
+
+    def counts(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> pa.Table:
+        """Observations per day, model and type; reads only the partition keys and the type column."""
+        table = self.table(["day", "model", "type"], since=since, until=until, types=None)
+        return table.group_by(["day", "model", "type"]).aggregate([("type", "count")]).sort_by(
+            [("day", "ascending"), ("model", "ascending")])
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def _langfuse_api():
+    # The REST client lives in auto-scorer.py (dash in the name, loaded by path)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "auto-scorer.py")
+    spec = importlib.util.spec_from_file_location("auto_scorer", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.LangfuseApi.from_env()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar Langfuse trace archive (Parquet)")
+    parser.add_argument("command", choices=["export", "stats"])
+    parser.add_argument("--root", default=ARCHIVE_PATH, help="Archive directory")
+    parser.add_argument("--since", help="ISO timestamp (export: overrides the checkpoint)")
+    parser.add_argument("--until", help="ISO timestamp (export default: now minus --lag-minutes)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--lag-minutes", type=float, default=DEFAULT_LAG_MINUTES)
+    args = parser.parse_args()
+
+    since = parse_iso(args.since) if args.since else None
+    until = parse_iso(args.until) if args.until else None
+
+    if args.command == "export":
+        export(_langfuse_api(), args.root, since, until, args.workers, args.lag_minutes)
+        return
+
+    counts = TraceArchive(args.root).counts(since, until)
+    if not counts.num_rows:
+        print(f"📭 No observations in {args.root}")
+        sys.exit(0)
+    print(f"📊 {args.root}: {sum(counts.column('type_count').to_pylist())} observations")
+    for row in counts.to_pylist():
+        print(f"   {row['day']}  {row['model']:<50} {row['type']:<12} {row['type_count']:>10}")
+
+
+if __name__ == "__main__":
+    main()